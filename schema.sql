@@ -82,3 +82,136 @@ CREATE TABLE IF NOT EXISTS meetings (
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW()
 );
+
+-- 4. Caché de resultados del LLM (actas generadas)
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key CHAR(64) PRIMARY KEY, -- SHA-256 de (prompt, modelo, transcripción)
+    prompt_hash CHAR(64) NOT NULL,  -- Versión del prompt (las de versiones anteriores vencen por TTL)
+    model VARCHAR(50) NOT NULL,
+    result JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_cache_created_at ON llm_cache(created_at);
+
+-- 5. Estado del pipeline de procesamiento (checkpoints para reanudar tras reinicios)
+-- Reúne las mismas columnas de estado, IDs y costos que meetings, pero existe
+-- antes del login (meetings requiere client_id y user_id).
+CREATE TABLE IF NOT EXISTS pipeline_jobs (
+    job_id UUID PRIMARY KEY,
+    email VARCHAR(255) NOT NULL,
+    filename TEXT,
+    file_size BIGINT,
+
+    -- Origen del audio
+    audio_path TEXT,    -- Copia local en el spool
+    audio_url TEXT,     -- Audio ya subido a AssemblyAI
+    audio_hash CHAR(64),
+
+    -- Resultados por etapa
+    assemblyai_id TEXT,
+    transcript TEXT,
+    assemblyai_usage JSONB,
+    acta JSONB,
+    openai_usage JSONB,
+    email_sent BOOLEAN DEFAULT FALSE NOT NULL,
+    result JSONB,       -- Respuesta final del trabajo
+    error TEXT,
+
+    -- Costos directos
+    duration_minutes NUMERIC(6,2),
+    transcription_cost NUMERIC(10,6) DEFAULT 0,
+    llm_processing_cost NUMERIC(10,6) DEFAULT 0,
+    email_cost NUMERIC(10,6) DEFAULT 0,
+    total_acta_cost NUMERIC(10,6) DEFAULT 0,
+
+    -- Estado: pending, transcribing, transcribed, acta_ready, completed, failed
+    status VARCHAR(20) DEFAULT 'pending' NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()  -- Heartbeat del worker que lo procesa
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_jobs_status_updated ON pipeline_jobs(status, updated_at);
+
+-- 6. Registro de archivos de descarga (compartido entre workers/contenedores)
+CREATE TABLE IF NOT EXISTS file_registry (
+    file_id UUID PRIMARY KEY,
+    file_type VARCHAR(20) NOT NULL,  -- acta, transcript
+    original_filename TEXT,
+    path TEXT NOT NULL,              -- Clave de almacenamiento de los datos de origen
+    size_bytes BIGINT DEFAULT 0,
+    artifacts JSONB DEFAULT '{}'::jsonb NOT NULL,  -- Formatos ya renderizados: {formato: {path: clave, size_bytes}}
+    created_at TIMESTAMP DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL,
+    last_accessed TIMESTAMP DEFAULT NOW() NOT NULL  -- Última descarga (orden LRU de la cuota de bytes)
+);
+
+CREATE INDEX IF NOT EXISTS idx_file_registry_expires_at ON file_registry(expires_at);
+CREATE INDEX IF NOT EXISTS idx_file_registry_last_accessed ON file_registry(last_accessed);
+
+-- Totales del registro (estadísticas y cuota de bytes sin recorrer la tabla)
+CREATE TABLE IF NOT EXISTS file_registry_totals (
+    kind VARCHAR(20) PRIMARY KEY,    -- acta, transcript, artifacts
+    files BIGINT DEFAULT 0 NOT NULL,
+    size_bytes BIGINT DEFAULT 0 NOT NULL
+);
+
+-- Mantiene file_registry_totals al insertar, actualizar artefactos o eliminar entradas
+CREATE OR REPLACE FUNCTION file_registry_count_totals() RETURNS TRIGGER AS $$
+DECLARE
+    artifact_files BIGINT := 0;
+    artifact_bytes BIGINT := 0;
+    old_files BIGINT;
+    old_bytes BIGINT;
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        SELECT COUNT(*), COALESCE(SUM((value->>'size_bytes')::bigint), 0)
+        INTO artifact_files, artifact_bytes
+        FROM jsonb_each(NEW.artifacts);
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        SELECT COUNT(*), COALESCE(SUM((value->>'size_bytes')::bigint), 0)
+        INTO old_files, old_bytes
+        FROM jsonb_each(OLD.artifacts);
+        artifact_files := artifact_files - old_files;
+        artifact_bytes := artifact_bytes - old_bytes;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO file_registry_totals (kind, files, size_bytes) VALUES (NEW.file_type, 1, NEW.size_bytes)
+        ON CONFLICT (kind) DO UPDATE SET files = file_registry_totals.files + 1,
+                                         size_bytes = file_registry_totals.size_bytes + EXCLUDED.size_bytes;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE file_registry_totals SET files = files - 1, size_bytes = size_bytes - OLD.size_bytes
+        WHERE kind = OLD.file_type;
+    END IF;
+
+    IF artifact_files <> 0 OR artifact_bytes <> 0 THEN
+        INSERT INTO file_registry_totals (kind, files, size_bytes) VALUES ('artifacts', artifact_files, artifact_bytes)
+        ON CONFLICT (kind) DO UPDATE SET files = file_registry_totals.files + EXCLUDED.files,
+                                         size_bytes = file_registry_totals.size_bytes + EXCLUDED.size_bytes;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SET search_path FROM CURRENT;
+
+DROP TRIGGER IF EXISTS file_registry_count_totals ON file_registry;
+CREATE TRIGGER file_registry_count_totals
+    AFTER INSERT OR UPDATE OF artifacts OR DELETE ON file_registry
+    FOR EACH ROW EXECUTE FUNCTION file_registry_count_totals();
+
+-- 7. Cola de emails salientes (outbox), enviados en segundo plano con reintentos
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    idempotency_key TEXT UNIQUE NOT NULL,  -- Un email por reunión; también se envía a Resend
+    payload TEXT NOT NULL,                 -- Parámetros del email en JSON (incluye adjuntos)
+    status VARCHAR(20) DEFAULT 'pending' NOT NULL,  -- pending, sending, sent, failed
+    attempts INTEGER DEFAULT 0 NOT NULL,
+    last_error TEXT,
+    provider_id TEXT,                      -- ID del email en Resend
+    created_at TIMESTAMP DEFAULT NOW(),
+    next_attempt_at TIMESTAMP DEFAULT NOW() NOT NULL,  -- Próximo intento; en 'sending', fin del lease del worker
+    sent_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at);
@@ -0,0 +1,86 @@
+"""
+Microbenchmark del tokenizador del acta.
+
+Compara el conversor anterior de `_add_formatted_text` (`re.match`/`re.sub`
+sin compilar por línea, solo títulos, líneas en negrita y viñetas `- `)
+con `acta_markdown.tokenize`, que además reconoce listas numeradas,
+viñetas anidadas y negrita/cursiva en línea. Las líneas sin marcador ni
+`*` no pasan por ninguna regex; la clasificación sola sigue siendo más
+lenta que antes porque separa los fragmentos con formato, pero el render
+completo del cuerpo del acta en Word, que es lo que pesa, es más rápido.
+
+Uso:
+    python scripts/bench_acta_markdown.py
+"""
+
+import io
+import re
+
+from _bench import best_of, report, sample_acta, setup_environment
+
+setup_environment()
+
+from voxcliente.services.acta_markdown import tokenize  # noqa: E402
+from voxcliente.services.email_service import resend_email_service  # noqa: E402
+
+
+def previous_scan(text: str) -> list:
+    """Clasificación de líneas del conversor anterior, sin escribir el documento."""
+    blocks = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            blocks.append(('blank', ''))
+        elif re.match(r'^\d+\.\s*\*\*.*\*\*', line):
+            blocks.append(('heading2', re.sub(r'^\d+\.\s*\*\*(.*)\*\*', r'\1', line)))
+        elif line.startswith('**') and line.endswith('**'):
+            blocks.append(('heading3', line[2:-2]))
+        elif line.startswith('- '):
+            blocks.append(('bullet', line[2:]))
+        else:
+            blocks.append(('text', line))
+    return blocks
+
+
+def previous_render(text: str) -> bytes:
+    """Conversor anterior: párrafo por línea con estilo buscado por nombre."""
+    doc, body = resend_email_service._new_document('ACTA DE REUNIÓN')
+    for kind, line in previous_scan(text):
+        if kind == 'heading2':
+            body.insert_paragraph_before(line, style='Heading 2')
+        elif kind == 'heading3':
+            body.insert_paragraph_before(line, style='Heading 3')
+        elif kind == 'bullet':
+            body.insert_paragraph_before(line, style='List Bullet')
+        else:
+            body.insert_paragraph_before(line)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def current_render(text: str) -> bytes:
+    doc, body = resend_email_service._new_document('ACTA DE REUNIÓN')
+    resend_email_service._add_formatted_text(body, text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def main() -> None:
+    print("Acta por documento (mejor de 5)")
+    for topics, number in ((14, 500), (280, 20)):
+        acta = sample_acta(topics)
+        report(f"clasificación, {topics} temas",
+               best_of(lambda: previous_scan(acta), number),
+               best_of(lambda: list(tokenize(acta)), number),
+               unit="us")
+    for topics, number in ((14, 10), (280, 2)):
+        acta = sample_acta(topics)
+        report(f"render Word, {topics} temas",
+               best_of(lambda: previous_render(acta), number),
+               best_of(lambda: current_render(acta), number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de generación de documentos Word.
+
+Compara el render anterior, que construía cada documento con `Document()`
+(descomprimir y parsear la plantilla por defecto, márgenes, título y
+branding) y agregaba un párrafo python-docx por línea, con el actual de
+`ResendEmailService`: clon de la plantilla base en memoria y, para
+transcripciones largas, escritura en streaming de `word/document.xml`.
+
+Uso:
+    python scripts/bench_docx.py
+"""
+
+import io
+import re
+from datetime import datetime
+
+from _bench import best_of, report, sample_acta, sample_transcript, setup_environment
+
+setup_environment()
+
+from docx import Document  # noqa: E402
+from docx.enum.text import WD_ALIGN_PARAGRAPH  # noqa: E402
+from docx.shared import Inches  # noqa: E402
+
+from voxcliente.services.email_service import resend_email_service  # noqa: E402
+
+FILENAME = "reunion.mp3"
+
+
+# Render anterior: un Document() nuevo por documento
+
+def _previous_document(title: str) -> Document:
+    doc = Document()
+    for section in doc.sections:
+        section.top_margin = Inches(1)
+        section.bottom_margin = Inches(1)
+        section.left_margin = Inches(1)
+        section.right_margin = Inches(1)
+    doc.add_heading(title, 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph(f'Archivo procesado: {FILENAME}')
+    doc.add_paragraph(f'Fecha de generación: {datetime.now().strftime("%d/%m/%Y a las %H:%M")}')
+    doc.add_paragraph('')
+    return doc
+
+
+def _previous_save(doc: Document) -> bytes:
+    doc.add_paragraph('')
+    doc.add_paragraph('')
+    branding_paragraph = doc.add_paragraph()
+    branding_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    branding_run = branding_paragraph.add_run('Generado por VoxCliente – Actas profesionales al instante con IA')
+    branding_run.font.size = Inches(0.1)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def previous_acta(acta_data: dict) -> bytes:
+    doc = _previous_document('ACTA DE REUNIÓN')
+    resumen = acta_data["resumen_ejecutivo"]
+    doc.add_heading('RESUMEN EJECUTIVO', level=1)
+    doc.add_paragraph(f'🎯 Objetivo: {resumen["objetivo"]}')
+    doc.add_paragraph(f'🤝 Acuerdos: {resumen["acuerdos"]}')
+    doc.add_paragraph(f'📅 Próximos Pasos: {resumen["proximos_pasos"]}')
+    doc.add_paragraph('')
+    doc.add_heading('ACTA COMPLETA', level=1)
+    for line in acta_data["acta"].split('\n'):
+        line = line.strip()
+        if not line:
+            doc.add_paragraph('')
+        elif re.match(r'^\d+\.\s*\*\*.*\*\*', line):
+            doc.add_heading(re.sub(r'^\d+\.\s*\*\*(.*)\*\*', r'\1', line), level=2)
+        elif line.startswith('**') and line.endswith('**'):
+            doc.add_heading(line[2:-2], level=3)
+        elif line.startswith('- '):
+            doc.add_paragraph(line[2:], style='List Bullet')
+        else:
+            doc.add_paragraph(line)
+    return _previous_save(doc)
+
+
+def previous_transcript(transcript: str) -> bytes:
+    doc = _previous_document('TRANSCRIPCIÓN COMPLETA')
+    doc.add_paragraph('Esta transcripción contiene el texto completo tal como fue procesado por AssemblyAI, incluyendo la identificación de hablantes.')
+    doc.add_paragraph('')
+    doc.add_heading('TRANSCRIPCIÓN', level=1)
+    for line in transcript.split('\n'):
+        doc.add_paragraph(line.strip())
+    return _previous_save(doc)
+
+
+def main() -> None:
+    acta_data = {
+        "resumen_ejecutivo": {"objetivo": "Revisar el avance", "acuerdos": "Migrar la base", "proximos_pasos": "Pruebas"},
+        "acta": sample_acta()
+    }
+    service = resend_email_service
+
+    print("Render de documentos Word por documento (mejor de 5)")
+    report("acta, 14 temas",
+           best_of(lambda: previous_acta(acta_data), 10),
+           best_of(lambda: service._generate_word_document(acta_data, FILENAME), 10))
+    for lines, number in ((200, 10), (6000, 2)):
+        transcript = sample_transcript(lines)
+        report(f"transcripción, {lines} líneas",
+               best_of(lambda: previous_transcript(transcript), number),
+               best_of(lambda: service._generate_transcript_document(transcript, FILENAME), number))
+
+
+if __name__ == "__main__":
+    main()
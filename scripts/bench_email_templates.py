@@ -0,0 +1,117 @@
+"""
+Benchmark del render del cuerpo HTML del email.
+
+Compara las alternativas sin motor de plantillas con `email_templates`:
+
+- anterior: leer `email_template.html` en cada email y encadenar un
+  `str.replace` por variable sobre el documento completo, sin escapar
+- `str.replace` y `str.format` sobre la plantilla ya leída, escapando
+  los valores como hace el motor
+- motor actual: `CompiledTemplate.render`, una pasada y un `join`, y
+  `_render_html` completo (resumen, enlaces y plantilla principal)
+
+Uso:
+    python scripts/bench_email_templates.py
+"""
+
+from datetime import datetime
+from html import escape
+
+from _bench import best_of, report, sample_acta, setup_environment
+
+setup_environment()
+
+from voxcliente.services.email_service import resend_email_service  # noqa: E402
+from voxcliente.services.email_templates import TEMPLATES_DIR, VARIABLE_PATTERN, SafeHtml  # noqa: E402
+
+TEMPLATE_PATH = TEMPLATES_DIR / "email_template.html"
+FILENAME = "reunión <comercial>.mp3"
+ACTA_DATA = {
+    "resumen_ejecutivo": {
+        "objetivo": "Definir el plan de migración & \"cronograma\" del cliente",
+        "acuerdos": "Migrar la base de datos antes del viernes",
+        "proximos_pasos": "Pruebas de carga y revisión del contrato"
+    },
+    "acta": sample_acta()
+}
+
+
+def _resumen_html() -> str:
+    resumen = ACTA_DATA["resumen_ejecutivo"]
+    return f"""
+        <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
+            <h3 style="color: #2c3e50; margin-top: 0;">📋 Resumen Ejecutivo</h3>
+            <p><strong>🎯 Objetivo:</strong> {resumen["objetivo"]}</p>
+            <p><strong>🤝 Acuerdos:</strong> {resumen["acuerdos"]}</p>
+            <p><strong>📅 Próximos Pasos:</strong> {resumen["proximos_pasos"]}</p>
+        </div>
+        """
+
+
+def _values() -> dict:
+    return {
+        "resumen_ejecutivo": _resumen_html(),
+        "enlaces_descarga": "",
+        "acta_content": ACTA_DATA["acta"],
+        "filename": FILENAME,
+        "timestamp": datetime.now().strftime("%d/%m/%Y a las %H:%M")
+    }
+
+
+def previous_render() -> str:
+    """Render anterior: lectura de disco y un `str.replace` por variable, sin escape."""
+    template = TEMPLATE_PATH.read_text(encoding="utf-8")
+    values = _values()
+    return template.replace("{{ resumen_ejecutivo }}", values["resumen_ejecutivo"]) \
+                   .replace("{{ acta_content }}", values["acta_content"]) \
+                   .replace("{{ filename }}", values["filename"]) \
+                   .replace("{{ timestamp }}", values["timestamp"])
+
+
+def replace_render(template: str) -> str:
+    values = _values()
+    for name in ("acta_content", "filename", "timestamp"):
+        template = template.replace(f"{{{{ {name} }}}}", escape(values[name]))
+    for name in ("resumen_ejecutivo", "enlaces_descarga"):
+        template = template.replace(f"{{{{ {name} }}}}", values[name])
+    return template
+
+
+def format_render(template: str) -> str:
+    values = _values()
+    for name in ("acta_content", "filename", "timestamp"):
+        values[name] = escape(values[name])
+    return template.format(**values)
+
+
+def main() -> None:
+    source = TEMPLATE_PATH.read_text(encoding="utf-8")
+    # Plantilla para str.format: llaves literales duplicadas y variables como {nombre}
+    format_source = "".join(
+        part.replace("{", "{{").replace("}", "}}") if index % 2 == 0 else f"{{{part}}}"
+        for index, part in enumerate(VARIABLE_PATTERN.split(source))
+    )
+    compiled = resend_email_service.templates.get("email_template")
+
+    def compiled_render() -> str:
+        values = _values()
+        values["resumen_ejecutivo"] = SafeHtml(values["resumen_ejecutivo"])
+        return compiled.render(values)
+
+    print("Render del HTML del email por mensaje (mejor de 5)")
+    report("anterior vs _render_html",
+           best_of(previous_render, 5000),
+           best_of(lambda: resend_email_service._render_html(ACTA_DATA, FILENAME), 5000),
+           unit="us")
+    report("str.replace vs compilada",
+           best_of(lambda: replace_render(source), 5000),
+           best_of(compiled_render, 5000),
+           unit="us")
+    report("str.format vs compilada",
+           best_of(lambda: format_render(format_source), 5000),
+           best_of(compiled_render, 5000),
+           unit="us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,29 @@
 """Health check endpoints - Simplified for MVP."""
 
+import json
+import asyncio
 import logging
 import tempfile
 import os
+from email.utils import formatdate, parsedate_to_datetime
 from contextlib import asynccontextmanager
 from uuid import uuid4
 from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
 
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response, RedirectResponse
+from fastapi.encoders import jsonable_encoder
 
 from voxcliente.config import settings
 from voxcliente.utils import validate_audio_file, validate_email
-from voxcliente.services import assemblyai_service, openai_service, resend_email_service, file_manager, analytics_service
+from voxcliente.services import assemblyai_service, openai_service, resend_email_service, file_manager, analytics_service, job_manager, upload_service, export_service
+from voxcliente.services.export_service import EXPORT_FORMATS
+from voxcliente.services.download_tokens import verify_download
+from voxcliente.services.email_outbox import email_outbox
+from voxcliente.services.upload_service import AudioSpool
+from voxcliente.services.stage_graph import StageGraph
 
 logger = logging.getLogger(__name__)
 
@@ -20,71 +31,243 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+async def _save_upload_to_temp(file: UploadFile) -> tuple[str, str]:
+    """
+    Copiar archivo subido por bloques a un archivo temporal.
+    
+    La memoria usada queda acotada por el tamaño de bloque y el límite de
+    tamaño se aplica durante la copia, sin depender de `file.size`.
+    
+    Returns:
+        (ruta del archivo temporal, SHA-256 del contenido)
+    """
+    chunk_size = settings.upload_chunk_size_kb * 1024
+    spool = AudioSpool(file.filename, tee_to_assemblyai=False)
+    try:
+        while chunk := await file.read(chunk_size):
+            await spool.write(chunk)
+        await spool.close()
+    except BaseException:
+        spool.abort()
+        raise
+    return spool.path, spool.sha256
+
+
+def _remove_temp_file(temp_path: Optional[str]) -> None:
+    """Eliminar archivo temporal ignorando errores."""
+    if temp_path:
+        try:
+            os.unlink(temp_path)
+        except:
+            pass
+
+
 @asynccontextmanager
 async def temp_file_context(file: UploadFile):
-    """Context manager para manejo automático de archivos temporales."""
+    """Context manager para manejo automático de archivos temporales; entrega (ruta, hash)."""
     temp_path = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file.filename.split('.')[-1]}") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-        yield temp_path
+        temp_path, audio_hash = await _save_upload_to_temp(file)
+        yield temp_path, audio_hash
     finally:
-        if temp_path:
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
+        _remove_temp_file(temp_path)
 
 
-def _process_audio_pipeline(temp_file_path: str, email: str, filename: str) -> dict:
-    """Procesar pipeline completo de audio a acta."""
-    # Transcribir archivo
-    transcription_result = assemblyai_service.transcribe_file(temp_file_path)
-    if not transcription_result:
-        raise HTTPException(status_code=500, detail="Error en la transcripción")
+def _validate_upload(filename: str, file_size: Optional[int], email: str) -> None:
+    """Validar email y archivo subido, lanzando HTTPException si son inválidos."""
+    is_email_valid, email_error = validate_email(email)
+    if not is_email_valid:
+        raise HTTPException(status_code=400, detail=email_error)
     
-    transcript = transcription_result['transcript']
-    assemblyai_cost = transcription_result['assemblyai_cost']['cost_usd']
-    duration_minutes = transcription_result['assemblyai_cost']['duration_minutes']
+    is_file_valid, file_error = validate_audio_file(filename, file_size)
+    if not is_file_valid:
+        raise HTTPException(status_code=400, detail=file_error)
+
+
+async def _ensure_disk_space(incoming_bytes: int) -> None:
+    """Rechazar nuevos audios si no queda espacio en disco para procesarlos."""
+    if not await file_manager.has_disk_space(incoming_bytes):
+        logger.warning("Espacio en disco insuficiente, rechazando nuevo audio")
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor sin espacio disponible. Intenta nuevamente en unos minutos.",
+            headers={"Retry-After": "60"}
+        )
+
+
+def _acta_fields(acta_result: dict) -> dict:
+    """Separar el acta de los datos de uso y costo de OpenAI."""
+    return {k: v for k, v in acta_result.items() if k not in ['openai_usage', 'openai_cost']}
+
+
+async def _process_audio_pipeline(temp_file_path: Optional[str], email: str, filename: str,
+                                  on_stage: Optional[Callable[[str], None]] = None,
+                                  audio_url: Optional[str] = None,
+                                  audio_hash: Optional[str] = None,
+                                  meeting_id: Optional[str] = None,
+                                  state: Optional[dict] = None,
+                                  on_checkpoint: Optional[Callable[..., Awaitable[None]]] = None) -> dict:
+    """
+    Procesar pipeline completo de audio a acta.
     
-    # Generar acta profesional
-    acta_result = openai_service.generate_acta(transcript)
-    if not acta_result:
-        raise HTTPException(status_code=500, detail="Error generando acta")
+    Las etapas corren como grafo de dependencias: el Word de la
+    transcripción se genera mientras OpenAI redacta el acta, y el email se
+    prepara después del registro de archivos de descarga, cuyos enlaces
+    reemplazan a los adjuntos demasiado grandes; ambos usan los mismos
+    documentos generados una sola vez.
     
-    # Extraer acta y costos
-    acta = {k: v for k, v in acta_result.items() if k not in ['openai_usage', 'openai_cost']}
-    openai_cost = acta_result['openai_cost']['total_cost_usd']
+    Si el audio ya se subió a AssemblyAI durante la recepción (`audio_url`),
+    se transcribe desde ahí; la copia local solo se usa para reintentar.
+    Con `audio_hash` se reutiliza la transcripción de un audio idéntico.
+    `meeting_id` identifica la reunión (el ID del trabajo) y es la clave de
+    idempotencia del email, que así se envía una sola vez.
     
-    # Generar archivos para descarga
-    try:
-        download_files = resend_email_service.generate_download_files(acta, transcript, filename)
+    `state` trae los resultados de etapas ya completadas en una ejecución
+    anterior (ver `_state_from_checkpoint`) y esas etapas no se repiten.
+    `on_checkpoint` recibe el resultado de cada etapa para persistirlo.
+    """
+    # Reportar avance si hay un trabajo escuchando
+    report_stage = on_stage or (lambda stage: None)
+    state = state or {}
+    
+    async def save_checkpoint(**fields) -> None:
+        if on_checkpoint:
+            await on_checkpoint(**fields)
+    
+    async def transcribe(results: dict) -> dict:
+        # Retomar la transcripción si ya se completó antes de una caída
+        transcription_result = state.get('transcription_result')
+        if not transcription_result:
+            report_stage("transcribing")
+            
+            async def on_submitted(assemblyai_id: str) -> None:
+                await save_checkpoint(status="transcribing", assemblyai_id=assemblyai_id)
+            
+            source = audio_url or temp_file_path
+            if not source and not state.get('assemblyai_id'):
+                raise HTTPException(status_code=500, detail="Audio no disponible para transcribir")
+            
+            transcription_result = await assemblyai_service.transcribe_file(
+                source, audio_hash, on_submitted=on_submitted, assemblyai_id=state.get('assemblyai_id')
+            )
+            if not transcription_result and temp_file_path and source != temp_file_path and os.path.exists(temp_file_path):
+                logger.warning("Transcripción en AssemblyAI falló, reintentando con copia local")
+                transcription_result = await assemblyai_service.transcribe_file(
+                    temp_file_path, audio_hash, on_submitted=on_submitted
+                )
+            if not transcription_result:
+                raise HTTPException(status_code=500, detail="Error en la transcripción")
+            
+            await save_checkpoint(
+                status="transcribed",
+                assemblyai_id=transcription_result['assemblyai_usage']['transcript_id'],
+                transcript=transcription_result['transcript'],
+                assemblyai_usage=transcription_result['assemblyai_usage'],
+                duration_minutes=transcription_result['assemblyai_cost']['duration_minutes'],
+                transcription_cost=transcription_result['assemblyai_cost']['cost_usd']
+            )
         
-        # Limpiar archivos antiguos después de generar nuevos
-        try:
-            removed_count = file_manager.cleanup_old_files()
-            if removed_count > 0:
-                logger.info(f"Se eliminaron {removed_count} archivos antiguos")
-        except Exception as cleanup_error:
-            logger.warning(f"Error en limpieza automática: {cleanup_error}")
+        report_stage("transcript_ready")
+        return transcription_result
+    
+    async def generate_acta(results: dict) -> dict:
+        acta_result = state.get('acta_result')
+        if not acta_result:
+            report_stage("generating_acta")
+            acta_result = await openai_service.generate_acta(results['transcribe']['transcript'])
+            if not acta_result:
+                raise HTTPException(status_code=500, detail="Error generando acta")
             
-    except Exception as e:
-        logger.error(f"Error generando archivos de descarga: {e}")
-        download_files = None
+            await save_checkpoint(
+                status="acta_ready",
+                acta=_acta_fields(acta_result),
+                openai_usage=acta_result['openai_usage'],
+                llm_processing_cost=acta_result['openai_cost']['total_cost_usd']
+            )
+        
+        report_stage("acta_ready")
+        return acta_result
+    
+    # Cada Word se genera una vez en memoria y se comparte entre descarga y email
+    async def render_transcript_document(results: dict) -> Optional[bytes]:
+        try:
+            return await resend_email_service.render_transcript_document(results['transcribe']['transcript'], filename)
+        except Exception as e:
+            logger.error(f"Error generando archivos de descarga: {e}")
+            return None
+    
+    async def render_acta_document(results: dict) -> Optional[bytes]:
+        report_stage("generating_files")
+        try:
+            return await resend_email_service.render_acta_document(_acta_fields(results['acta']), filename)
+        except Exception as e:
+            logger.error(f"Error generando archivos de descarga: {e}")
+            return None
+    
+    async def register_download_files(results: dict) -> Optional[dict]:
+        # Se guardan los datos de origen; otros formatos se generan al descargarlos.
+        # Viven lo mismo que los enlaces del email, que también los usan
+        try:
+            download_files = await export_service.register(
+                _acta_fields(results['acta']), results['transcribe']['transcript'], filename,
+                acta_document=results['acta_document'],
+                transcript_document=results['transcript_document'],
+                lifetime_hours=resend_email_service.link_lifetime_hours()
+            )
+        except Exception as e:
+            logger.error(f"Error generando archivos de descarga: {e}")
+            return None
+        report_stage("docx_ready")
+        return download_files
+    
+    async def send_email(results: dict) -> dict:
+        # El email solo se encola; la cola de salida lo envía y registra si llegó o falló.
+        # Se encola una sola vez aunque el trabajo se reanude (checkpoint email_sent = encolado)
+        idempotency_key = f"acta:{meeting_id}" if meeting_id else None
+        if state.get('email_sent') and idempotency_key:
+            entry = await email_outbox.get_status(idempotency_key)
+            outbox_id = entry['id'] if entry else None
+        else:
+            report_stage("sending_email")
+            outbox_id = await resend_email_service.send_acta_email(
+                email, _acta_fields(results['acta']), filename, results['transcribe']['transcript'],
+                acta_document=results['acta_document'],
+                transcript_document=results['transcript_document'],
+                idempotency_key=idempotency_key,
+                download_urls=_download_urls(results['download_files'], filename)
+            )
+            if outbox_id is None:
+                return {'status': 'error', 'outbox_id': None}
+            await save_checkpoint(email_sent=True)
+        report_stage("email_queued")
+        return {'status': 'queued', 'outbox_id': outbox_id}
     
-    # Enviar email
-    email_sent = resend_email_service.send_acta_email(email, acta, filename, transcript)
+    graph = StageGraph()
+    graph.add('transcribe', transcribe)
+    graph.add('acta', generate_acta, depends_on=['transcribe'])
+    graph.add('transcript_document', render_transcript_document, depends_on=['transcribe'])
+    graph.add('acta_document', render_acta_document, depends_on=['acta'])
+    graph.add('download_files', register_download_files, depends_on=['acta_document', 'transcript_document'])
+    graph.add('email', send_email, depends_on=['download_files'])
+    
+    results = await graph.run()
+    
+    transcription_result = results['transcribe']
+    acta_result = results['acta']
+    assemblyai_cost = transcription_result['assemblyai_cost']['cost_usd']
+    duration_minutes = transcription_result['assemblyai_cost']['duration_minutes']
+    openai_cost = acta_result['openai_cost']['total_cost_usd']
     
     # Calcular costos totales
     email_cost = 0.0004  # Resend cost
     total_cost = round(assemblyai_cost + openai_cost + email_cost, 6)
+    await save_checkpoint(email_cost=email_cost, total_acta_cost=total_cost)
     
     return {
-        'transcript': transcript,
-        'acta': acta,
-        'email_sent': email_sent,
+        'transcript': transcription_result['transcript'],
+        'acta': _acta_fields(acta_result),
+        'email_status': results['email']['status'],
+        'email_outbox_id': results['email']['outbox_id'],
         'duration_minutes': duration_minutes,
         'total_cost': total_cost,
         'cost_breakdown': {
@@ -94,58 +277,225 @@ def _process_audio_pipeline(temp_file_path: str, email: str, filename: str) -> d
         },
         'openai_usage': acta_result['openai_usage'],
         'assemblyai_usage': transcription_result['assemblyai_usage'],
-        'download_files': download_files
+        'download_files': results['download_files'],
+        'stage_timings': graph.timings
     }
 
 
+def _state_from_checkpoint(row: dict) -> dict:
+    """Reconstruir resultados de etapas completadas a partir de un registro de pipeline_jobs."""
+    state = {
+        'assemblyai_id': row['assemblyai_id'],
+        'email_sent': row['email_sent']
+    }
+    
+    if row['transcript'] is not None:
+        state['transcription_result'] = {
+            'transcript': row['transcript'],
+            'assemblyai_usage': row['assemblyai_usage'],
+            'assemblyai_cost': {
+                'duration_minutes': float(row['duration_minutes'] or 0),
+                'cost_usd': float(row['transcription_cost'] or 0)
+            }
+        }
+    
+    if row['acta'] is not None:
+        state['acta_result'] = {
+            **row['acta'],
+            'openai_usage': row['openai_usage'],
+            'openai_cost': {'total_cost_usd': float(row['llm_processing_cost'] or 0)}
+        }
+    
+    return state
+
+
 @router.get("/health")
 async def health_check():
     """Simple health check endpoint."""
     return {"status": "healthy"}
 
 
-@router.get("/download/{file_type}/{file_id}")
-async def download_file(file_type: str, file_id: str):
+@router.get("/health/email")
+async def email_health():
+    """Profundidad de la cola de emails y latencias de envío."""
+    return await email_outbox.get_stats()
+
+
+def _not_modified(request: Request, etag: str, modified_at: float) -> bool:
+    """Evaluar If-None-Match / If-Modified-Since (el primero tiene prioridad, RFC 9110)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(modified_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+
+async def _local_export(storage_key: str, file_id: str, file_type: str,
+                        file_format: str) -> Optional[tuple[Path, os.stat_result, str]]:
+    """
+    Archivo local de un artefacto, con su stat y ETag.
+    
+    La limpieza o la cuota pueden eliminar el artefacto entre que se
+    obtiene su clave y se lee: en ese caso se genera de nuevo una vez.
+    
+    Returns:
+        (ruta, stat, etag), o None si el artefacto no se pudo obtener
+    """
+    for attempt in range(2):
+        if attempt:
+            logger.warning(f"Artefacto eliminado antes de servirlo, generando de nuevo: {storage_key}")
+            storage_key = await export_service.get_export(file_id, file_type, file_format)
+            if not storage_key:
+                return None
+        
+        file_path = file_manager.storage.local_path(storage_key)
+        try:
+            stat_result = await asyncio.to_thread(os.stat, file_path)
+            return file_path, stat_result, await file_manager.get_etag(file_path, stat_result)
+        except FileNotFoundError:
+            continue
+    return None
+
+# Declarada antes que /download/{file_type}/{token} para que 'bundle' no se tome como tipo
+@router.get("/download/bundle/{token}")
+async def download_bundle(token: str, formats: str = "docx"):
+    """
+    Descargar acta y transcripción juntas en un ZIP.
+    
+    El ZIP se genera mientras se envía (sin archivo temporal y con memoria
+    constante), así que un solo pedido reemplaza las dos descargas.
+    
+    Args:
+        token: Token de descarga firmado del paquete
+        formats: Formatos a incluir separados por coma (por defecto 'docx')
+        
+    Returns:
+        ZIP en streaming
+    """
+    
+    try:
+        bundle_formats = list(dict.fromkeys(f.strip() for f in formats.split(",") if f.strip()))
+        if not bundle_formats or any(f not in EXPORT_FORMATS for f in bundle_formats):
+            raise HTTPException(status_code=400, detail="Formato no válido")
+        
+        # Validar firma y vencimiento del enlace
+        claims = verify_download(token)
+        files = [file_manager.parse_storage_key(key) for key in claims.storage_key.split(",")] if claims else []
+        if not files or claims.file_type != "bundle" or not all(files):
+            raise HTTPException(status_code=404, detail="Archivo no encontrado o enlace expirado")
+        
+        await asyncio.gather(*(file_manager.record_download(file_id) for file_id, _ in files))
+        stream = await export_service.bundle(files, bundle_formats)
+        if stream is None:
+            raise HTTPException(status_code=404, detail="Archivo no encontrado")
+        
+        return StreamingResponse(
+            stream,
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": "attachment; filename=\"documentos.zip\"",
+                "Cache-Control": "private, no-store"
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generando ZIP de descarga: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+
+
+@router.api_route("/download/{file_type}/{token}", methods=["GET", "HEAD"])
+async def download_file(request: Request, file_type: str, token: str, format: str = "docx"):
     """
-    Descargar archivo Word generado.
+    Descargar acta o transcripción generada.
+    
+    El enlace está firmado y lleva su vencimiento, así que cualquier worker
+    lo valida sin consultar el registro. El archivo en el formato pedido se
+    genera en la primera descarga y queda en caché para las siguientes.
+    
+    Con almacenamiento S3 se redirige a una URL prefirmada del bucket. Con
+    almacenamiento local la respuesta lleva un ETag fuerte del contenido:
+    las descargas repetidas con If-None-Match (o If-Modified-Since) reciben
+    304 sin cuerpo, y se aceptan pedidos por rangos (Range / If-Range) para
+    reanudar descargas.
     
     Args:
         file_type: Tipo de archivo ('acta' o 'transcript')
-        file_id: ID único del archivo
+        token: Token de descarga firmado
+        format: Formato de descarga ('docx', 'md', 'html' o 'txt')
         
     Returns:
-        Archivo Word para descarga
+        Archivo para descarga
     """
     
     try:
         # Validar tipo de archivo
         if file_type not in ["acta", "transcript"]:
             raise HTTPException(status_code=400, detail="Tipo de archivo no válido")
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail="Formato no válido")
+        
+        # Validar firma y vencimiento del enlace
+        claims = verify_download(token)
+        file_key = file_manager.parse_storage_key(claims.storage_key) if claims else None
+        if not file_key or file_key[1] != file_type or claims.file_type != file_type:
+            raise HTTPException(status_code=404, detail="Archivo no encontrado o enlace expirado")
+        
+        # Antes de generarlo, para que la cuota no descarte lo que se está pidiendo
+        await file_manager.record_download(file_key[0])
         
-        # Obtener ruta del archivo directamente
-        file_path = file_manager.get_file_path(file_id)
-        if not file_path:
+        # Obtener o generar archivo en el formato pedido
+        storage_key = await export_service.get_export(file_key[0], file_type, format)
+        if not storage_key:
             raise HTTPException(status_code=404, detail="Archivo no encontrado")
         
         # Nombre simple de archivo
-        download_filename = f"{file_type}.docx"
+        download_filename = f"{file_type}.{format}"
         
+        # Descarga directa desde el almacenamiento, válida lo que le queda al enlace
+        expires_in = max(int((claims.expires_at - datetime.now()).total_seconds()), 1)
+        presigned_url = file_manager.storage.presigned_url(storage_key, expires_in, download_filename, EXPORT_FORMATS[format])
+        if presigned_url:
+            return RedirectResponse(presigned_url, status_code=307)
+        
+        # Validadores: ETag por contenido y fecha de modificación
+        local_export = await _local_export(storage_key, file_key[0], file_type, format)
+        if not local_export:
+            raise HTTPException(status_code=404, detail="Archivo no encontrado")
+        file_path, stat_result, etag = local_export
+        cache_headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "Cache-Control": "private, no-cache"
+        }
+        if _not_modified(request, etag, stat_result.st_mtime):
+            return Response(status_code=304, headers=cache_headers)
         
-        # Retornar archivo para descarga
+        # Retornar archivo para descarga (con pathsend/sendfile si el servidor lo soporta)
         return FileResponse(
             path=str(file_path),
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            media_type=EXPORT_FORMATS[format],
             filename=download_filename,
+            stat_result=stat_result,
             headers={
                 "Content-Disposition": f"attachment; filename=\"{download_filename}\"",
-                "Cache-Control": "no-cache"
+                **cache_headers
             }
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error sirviendo archivo {file_type}/{file_id}: {str(e)}", exc_info=True)
+        logger.error(f"Error sirviendo archivo {file_type}/{token}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
 
@@ -161,14 +511,8 @@ async def transcribe_audio(
     
     try:
         # Validación inline de email y archivo
-        is_email_valid, email_error = validate_email(email)
-        if not is_email_valid:
-            raise HTTPException(status_code=400, detail=email_error)
-        
-        is_file_valid, file_error = validate_audio_file(file.filename, file.size)
-        if not is_file_valid:
-            raise HTTPException(status_code=400, detail=file_error)
-        
+        _validate_upload(file.filename, file.size, email)
+        await _ensure_disk_space(file.size or 0)
         
         # PostHog disponible para tracking final
         posthog = request.app.state.posthog
@@ -177,57 +521,222 @@ async def transcribe_audio(
         raise
     
     # Procesar con context manager para manejo automático de archivos temporales
-    async with temp_file_context(file) as temp_file_path:
+    async with temp_file_context(file) as (temp_file_path, audio_hash):
         
         # Procesar pipeline completo
-        result = _process_audio_pipeline(temp_file_path, email, file.filename)
+        result = await _process_audio_pipeline(temp_file_path, email, file.filename, audio_hash=audio_hash)
         
         # Tracking final
         analytics_service.track_acta_generated(
-            posthog, email, file.filename, file.size,
+            posthog, email, file.filename, file.size or os.path.getsize(temp_file_path),
             result['duration_minutes'], result['total_cost'],
             result['cost_breakdown'], result['openai_usage'],
-            result['assemblyai_usage'], result['email_sent']
+            result['assemblyai_usage'], result['email_status']
+        )
+        
+        return _build_transcribe_response(result, file.filename, email)
+
+
+async def _run_pipeline_job(temp_file_path: Optional[str], email: str, filename: str, file_size: int, posthog,
+                            audio_url: Optional[str] = None, audio_hash: Optional[str] = None,
+                            meeting_id: Optional[str] = None, state: Optional[dict] = None,
+                            on_stage: Optional[Callable[[str], None]] = None,
+                            on_checkpoint: Optional[Callable[..., Awaitable[None]]] = None) -> dict:
+    """Ejecutar pipeline en segundo plano, registrar tracking y limpiar el archivo temporal."""
+    try:
+        result = await _process_audio_pipeline(
+            temp_file_path, email, filename,
+            on_stage=on_stage, audio_url=audio_url, audio_hash=audio_hash,
+            meeting_id=meeting_id, state=state, on_checkpoint=on_checkpoint
         )
         
-        # Respuesta simplificada
+        analytics_service.track_acta_generated(
+            posthog, email, filename, file_size,
+            result['duration_minutes'], result['total_cost'],
+            result['cost_breakdown'], result['openai_usage'],
+            result['assemblyai_usage'], result['email_status']
+        )
         
-        # Preparar URLs de descarga si están disponibles
-        download_urls = None
-        if result['download_files']:
-            download_urls = {
-                'acta_url': f"/api/v1/download/acta/{result['download_files']['acta_id']}",
-                'transcript_url': f"/api/v1/download/transcript/{result['download_files']['transcript_id']}",
-                'acta_filename': f"Acta_Reunion_{file.filename}.docx",
-                'transcript_filename': f"Transcripcion_{file.filename}.docx"
-            }
+        return _build_transcribe_response(result, filename, email)
+    finally:
+        _remove_temp_file(temp_file_path)
+
+
+async def resume_pipeline_job(posthog, row: dict,
+                              on_stage: Optional[Callable[[str], None]] = None,
+                              on_checkpoint: Optional[Callable[..., Awaitable[None]]] = None) -> dict:
+    """
+    Continuar un trabajo abandonado desde su último checkpoint.
+    
+    Lo invoca `job_manager` al reclamar trabajos cuyo worker dejó de
+    enviar heartbeat. La copia local del audio se usa solo si sigue en disco.
+    """
+    audio_path = row['audio_path'] if row['audio_path'] and os.path.exists(row['audio_path']) else None
+    
+    return await _run_pipeline_job(
+        audio_path, row['email'], row['filename'], row['file_size'], posthog,
+        audio_url=row['audio_url'], audio_hash=row['audio_hash'], meeting_id=str(row['job_id']),
+        state=_state_from_checkpoint(row),
+        on_stage=on_stage, on_checkpoint=on_checkpoint
+    )
+
+
+@router.post("/jobs", status_code=202)
+async def create_transcription_job(request: Request):
+    """
+    Encolar transcripción en segundo plano y retornar el ID del trabajo.
+    
+    Recibe un formulario multipart con `email` y `file`. El audio se lee en
+    streaming y, si está habilitado, se reenvía a AssemblyAI mientras llega,
+    de modo que la transcripción se envía apenas termina el upload.
+    
+    El progreso y el resultado final se consultan en GET /api/v1/jobs/{job_id}.
+    Si el disco se está quedando sin espacio se responde 503 antes de leer el audio.
+    """
+    content_length = request.headers.get("content-length", "")
+    await _ensure_disk_space(int(content_length) if content_length.isdigit() else 0)
+    
+    upload = await upload_service.receive_audio_upload(request)
+    email = upload["fields"].get("email", "")
+    
+    # El archivo temporal lo elimina el worker al terminar
+    try:
+        _validate_upload(upload["filename"], upload["size"], email)
+        posthog = request.app.state.posthog
+        job_id = job_manager.create_job(upload["filename"], email)
+    except Exception as e:
+        logger.error(f"Error en validación inicial: {str(e)}", exc_info=True)
+        _remove_temp_file(upload["temp_path"])
+        raise
+    
+    # Checkpoint inicial para poder reanudar el trabajo si el worker cae
+    await job_manager.persist_job(
+        job_id, upload["size"], upload["temp_path"], upload["audio_url"], upload["sha256"]
+    )
+    
+    job_manager.submit(
+        job_id, _run_pipeline_job,
+        upload["temp_path"], email, upload["filename"], upload["size"], posthog,
+        upload["audio_url"], upload["sha256"], job_id
+    )
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/v1/jobs/{job_id}",
+        "events_url": f"/api/v1/jobs/{job_id}/events"
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_transcription_job(job_id: str):
+    """
+    Consultar etapa, progreso y resultado de un trabajo de transcripción.
+    
+    Args:
+        job_id: ID único del trabajo
         
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "email": email,
-            "transcript": result['transcript'],
-            "acta": result['acta'],
-            "email_sent": result['email_sent'],
+    Returns:
+        Estado del trabajo; incluye 'result' con las URLs de descarga al completarse
+        y 'email_delivery' con el estado de envío del email (pending, sending,
+        sent o failed) una vez encolado
+    """
+    job = await job_manager.get_job_status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    
+    if job["status"] == "completed":
+        try:
+            job["email_delivery"] = await email_outbox.get_status(f"acta:{job_id}")
+        except Exception as e:
+            logger.error(f"Error consultando envío del email de {job_id}: {e}")
+            job["email_delivery"] = None
+    
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_transcription_job_events(job_id: str):
+    """
+    Emitir el avance del trabajo como Server-Sent Events.
+    
+    Cada etapa (uploaded, transcribing, transcript_ready, generating_acta,
+    acta_ready, docx_ready, email_queued...) llega como un evento con su
+    progreso y tiempos. El stream termina con 'completed' (incluye el
+    resultado) o 'failed' (incluye el error).
+    
+    Args:
+        job_id: ID único del trabajo
+    """
+    if not job_manager.get_job(job_id):
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    
+    async def event_stream():
+        async for event in job_manager.stream_events(job_id):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            data = json.dumps(jsonable_encoder(event), ensure_ascii=False)
+            yield f"event: {event['stage']}\ndata: {data}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Evitar buffering en proxies nginx
+        }
+    )
+
+
+def _download_urls(download_files: Optional[dict], filename: str) -> Optional[dict]:
+    """URLs de descarga (relativas) de los archivos registrados, o None si no se registraron."""
+    if not download_files:
+        return None
+    return {
+        'acta_url': f"/api/v1/download/acta/{download_files['acta_token']}",
+        'transcript_url': f"/api/v1/download/transcript/{download_files['transcript_token']}",
+        'bundle_url': f"/api/v1/download/bundle/{download_files['bundle_token']}",
+        'acta_filename': f"Acta_Reunion_{filename}.docx",
+        'transcript_filename': f"Transcripcion_{filename}.docx",
+        'bundle_filename': f"Documentos_{filename}.zip",
+        'expires_at': download_files['expires_at']
+    }
+
+
+def _build_transcribe_response(result: dict, filename: str, email: str) -> dict:
+    """Construir respuesta del endpoint de transcripción a partir del resultado del pipeline."""
+    # Preparar URLs de descarga si están disponibles
+    download_urls = _download_urls(result['download_files'], filename)
+    
+    return {
+        "status": "success",
+        "filename": filename,
+        "email": email,
+        "transcript": result['transcript'],
+        "acta": result['acta'],
+        "email_status": result['email_status'],
+        "email_outbox_id": result['email_outbox_id'],
+        "duration_minutes": result['duration_minutes'],
+        "cost_usd": result['total_cost'],
+        "cost_breakdown": result['cost_breakdown'],
+        "openai_usage": result['openai_usage'],
+        "assemblyai_usage": result['assemblyai_usage'],
+        "download_files": download_urls,
+        "stage_timings": result['stage_timings'],
+        "message": "Transcripción completada; el acta llegará por email en unos minutos" if result['email_status'] == 'queued' else "Transcripción completada, pero error enviando email",
+        # Datos para guardar después del login
+        "meeting_data": {
+            "transcript_id": str(uuid4()),
+            "assemblyai_id": result['assemblyai_usage']['transcript_id'],
+            "meeting_date": datetime.now(),
+            "filename": filename,
             "duration_minutes": result['duration_minutes'],
-            "cost_usd": result['total_cost'],
-            "cost_breakdown": result['cost_breakdown'],
-            "openai_usage": result['openai_usage'],
-            "assemblyai_usage": result['assemblyai_usage'],
-            "download_files": download_urls,
-            "message": "Transcripción completada y acta enviada por email" if result['email_sent'] else "Transcripción completada, pero error enviando email",
-            # Datos para guardar después del login
-            "meeting_data": {
-                "transcript_id": str(uuid4()),
-                "assemblyai_id": result['assemblyai_usage']['transcript_id'],
-                "meeting_date": datetime.now(),
-                "filename": file.filename,
-                "duration_minutes": result['duration_minutes'],
-                "topics": result['acta'].get('topics'),
-                "summary": result['acta'].get('summary'),
-                "transcription_cost": result['cost_breakdown']['assemblyai_cost_usd'],
-                "llm_processing_cost": result['cost_breakdown']['openai_cost_usd'],
-                "email_cost": result['cost_breakdown']['email_cost_usd'],
-                "total_acta_cost": result['total_cost']
-            }
+            "topics": result['acta'].get('topics'),
+            "summary": result['acta'].get('summary'),
+            "transcription_cost": result['cost_breakdown']['assemblyai_cost_usd'],
+            "llm_processing_cost": result['cost_breakdown']['openai_cost_usd'],
+            "email_cost": result['cost_breakdown']['email_cost_usd'],
+            "total_acta_cost": result['total_cost']
         }
+    }
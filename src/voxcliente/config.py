@@ -26,14 +26,77 @@ class Settings(BaseSettings):
     # Database
     database_url: str = Field(env="DATABASE_URL")
     
+    # Clave HMAC de los enlaces de descarga (igual en todos los workers/servidores)
+    download_signing_key: str = Field(default="", env="DOWNLOAD_SIGNING_KEY")
+    
+    # URL pública del sitio, para los enlaces de descarga de los emails
+    public_base_url: str = Field(default="https://voxcliente.com", env="PUBLIC_BASE_URL")
+    
     
     # Fixed settings for MVP (no env vars needed)
     max_file_size_mb: int = 500
+    upload_chunk_size_kb: int = 1024  # Tamaño de bloque al copiar uploads a disco
+    spool_dir: Optional[str] = None  # Directorio para uploads temporales (None = temp del sistema)
+    assemblyai_stream_upload: bool = True  # Reenviar uploads de /jobs a AssemblyAI mientras llegan
+    
+    # Caché de transcripciones por hash del audio
+    transcript_cache_max_entries: int = 256
+    transcript_cache_ttl_hours: int = 24
+    
+    # Caché de actas generadas por el LLM: 'memory', 'postgres' o 'none'
+    llm_cache_backend: str = "memory"
+    llm_cache_max_entries: int = 128
+    llm_cache_ttl_hours: int = 24
+    
+    # Transcripciones de más de este tamaño se escriben al .docx en streaming
+    docx_streaming_threshold_kb: int = 256
+    render_processes: int = 0  # Procesos para generar Word (0 = threads del proceso web)
+    render_queue_size: int = 8  # Documentos en cola o generándose en el pool a la vez
+    artifact_cache_max_mb: int = 512  # Espacio para descargas renderizadas bajo demanda
+    
+    # Registro de descargas compartido entre workers: 'sqlite' (un host), 'postgres' (cluster) o 'memory'
+    file_registry_backend: str = "sqlite"
+    file_registry_path: str = "uploads/temp/file_registry.db"
+    file_janitor_max_sleep_seconds: int = 300  # Espera máxima de la limpieza entre vencimientos
+    file_cleanup_batch_size: int = 200  # Archivos expirados eliminados por lote
+    file_store_max_mb: int = 2048  # Cuota del almacén de descargas (datos de origen + artefactos)
+    min_free_disk_mb: int = 1024  # Con menos espacio libre en disco se rechazan nuevos audios
+    low_free_disk_mb: int = 4096  # Con menos espacio libre no se guardan artefactos opcionales en caché
+    
+    # Almacenamiento de archivos generados: 'local' (uploads/temp) o 's3' (AWS, MinIO, R2...)
+    storage_backend: str = "local"
+    s3_endpoint_url: str = Field(default="", env="S3_ENDPOINT_URL")
+    s3_bucket: str = Field(default="", env="S3_BUCKET")
+    s3_region: str = Field(default="us-east-1", env="S3_REGION")
+    s3_access_key_id: str = Field(default="", env="S3_ACCESS_KEY_ID")
+    s3_secret_access_key: str = Field(default="", env="S3_SECRET_ACCESS_KEY")
+    s3_prefix: str = "voxcliente/"
+    
+    # Cola de emails salientes: 'sqlite' (un host) o 'postgres' (cluster)
+    email_outbox_backend: str = "sqlite"
+    email_outbox_path: str = "uploads/email_outbox.db"
+    email_send_concurrency: int = 4  # Envíos simultáneos a Resend por worker
+    email_max_attempts: int = 8  # Intentos antes de dar un email por fallido
+    email_retry_base_seconds: int = 5  # Espera del primer reintento; se duplica en cada intento
+    email_retry_max_seconds: int = 900
+    email_send_lease_seconds: int = 120  # Un email tomado y sin confirmar vuelve a la cola tras este tiempo
+    email_outbox_retention_hours: int = 24  # Emails enviados o fallidos se borran de la cola después de esto
+    email_attachment_max_kb: int = 2048  # Documentos más grandes van como enlace de descarga
+    email_attachments_max_mb: int = 10  # Total de adjuntos por email en base64 (Resend admite 40 MB)
+    email_attachment_recompress: bool = False  # Recomprimir Word que superan el límite antes de pasarlos a enlace
+    email_link_ttl_hours: int = 72  # Vigencia de los enlaces de descarga enviados por email (y de esos archivos)
+    email_locale: str = "es"  # Idioma por defecto de las plantillas (templates/<idioma>/ sobrescribe)
     from_email: str = "actas@actas.voxcliente.com"
     from_name: str = "VoxCliente"
     reply_to_email: str = "hola@voxcliente.com"
     allowed_origins: str = "http://localhost:3000,http://localhost:8080"
     
+    # Trabajos en segundo plano (modo asíncrono de /jobs)
+    max_concurrent_jobs: int = 2  # Pipelines ejecutándose a la vez
+    max_queued_jobs: int = 20  # Trabajos en cola + en ejecución antes de rechazar
+    pipeline_heartbeat_seconds: int = 60  # Frecuencia de heartbeat/reanudación de checkpoints
+    pipeline_stale_after_seconds: int = 300  # Sin heartbeat por este tiempo = worker caído, se reanuda
+    
     @property
     def allowed_origins_list(self) -> list[str]:
         """Convert comma-separated string to list."""
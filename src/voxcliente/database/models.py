@@ -60,3 +60,29 @@ class MeetingResponse(BaseModel):
     status: str
     total_acta_cost: Decimal
     created_at: datetime
+
+# Pipeline Job Models
+class PipelineJobCreate(BaseModel):
+    job_id: UUID
+    email: str
+    filename: str
+    file_size: Optional[int] = None
+    audio_path: Optional[str] = None
+    audio_url: Optional[str] = None
+    audio_hash: Optional[str] = None
+
+class PipelineJobUpdate(BaseModel):
+    status: Optional[str] = None
+    assemblyai_id: Optional[str] = None
+    transcript: Optional[str] = None
+    assemblyai_usage: Optional[Dict[str, Any]] = None
+    acta: Optional[Dict[str, Any]] = None
+    openai_usage: Optional[Dict[str, Any]] = None
+    email_sent: Optional[bool] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    duration_minutes: Optional[Decimal] = None
+    transcription_cost: Optional[Decimal] = None
+    llm_processing_cost: Optional[Decimal] = None
+    email_cost: Optional[Decimal] = None
+    total_acta_cost: Optional[Decimal] = None
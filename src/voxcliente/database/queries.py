@@ -1,7 +1,9 @@
 """SQL queries for database operations."""
+import json
 from typing import Optional, List
 from uuid import UUID
 from decimal import Decimal
+from datetime import datetime
 import asyncpg
 
 # User Queries
@@ -94,3 +96,276 @@ async def get_meetings_by_client(conn: asyncpg.Connection, client_id: UUID) -> L
     """Get all meetings for a client."""
     query = "SELECT * FROM voxcliente.meetings WHERE client_id = $1 ORDER BY meeting_date DESC"
     return await conn.fetch(query, client_id)
+
+# LLM Cache Queries
+async def get_llm_cache_entry(conn: asyncpg.Connection, cache_key: str, created_after: Optional[datetime]) -> Optional[dict]:
+    """Get cached LLM result by key, ignoring results created before created_after (None = no expiry)."""
+    query = """
+    SELECT result FROM voxcliente.llm_cache
+    WHERE cache_key = $1 AND ($2::timestamp IS NULL OR created_at > $2)
+    """
+    return await conn.fetchrow(query, cache_key, created_after)
+
+async def upsert_llm_cache_entry(conn: asyncpg.Connection, cache_key: str, prompt_hash: str, model: str, result: str) -> None:
+    """Insert or replace cached LLM result (result is a JSON string)."""
+    query = """
+    INSERT INTO voxcliente.llm_cache (cache_key, prompt_hash, model, result)
+    VALUES ($1, $2, $3, $4::jsonb)
+    ON CONFLICT (cache_key) DO UPDATE
+    SET result = EXCLUDED.result, created_at = NOW()
+    """
+    await conn.execute(query, cache_key, prompt_hash, model, result)
+
+async def delete_old_llm_cache_entries(conn: asyncpg.Connection, before: Optional[datetime], max_entries: int) -> str:
+    """Delete cached LLM results created before the given time (None = no expiry) and all but the newest max_entries."""
+    query = """
+    DELETE FROM voxcliente.llm_cache
+    WHERE ($1::timestamp IS NOT NULL AND created_at <= $1)
+       OR cache_key IN (
+           SELECT cache_key FROM voxcliente.llm_cache
+           ORDER BY created_at DESC
+           OFFSET $2
+       )
+    """
+    return await conn.execute(query, before, max_entries)
+
+# Pipeline Job Queries
+PIPELINE_JOB_JSON_FIELDS = {"assemblyai_usage", "acta", "openai_usage", "result"}
+
+async def create_pipeline_job(conn: asyncpg.Connection, job_data) -> None:
+    """Create pipeline job checkpoint."""
+    query = """
+    INSERT INTO voxcliente.pipeline_jobs (job_id, email, filename, file_size, audio_path, audio_url, audio_hash)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+    """
+    await conn.execute(
+        query,
+        job_data.job_id,
+        job_data.email,
+        job_data.filename,
+        job_data.file_size,
+        job_data.audio_path,
+        job_data.audio_url,
+        job_data.audio_hash
+    )
+
+async def update_pipeline_job(conn: asyncpg.Connection, job_id: UUID, update_data) -> None:
+    """Update pipeline job checkpoint with stage results."""
+    fields = []
+    values = []
+    param_count = 1
+    
+    for field, value in update_data.dict(exclude_unset=True).items():
+        if field in PIPELINE_JOB_JSON_FIELDS:
+            fields.append(f"{field} = ${param_count}::jsonb")
+            values.append(json.dumps(value, default=str) if value is not None else None)
+        else:
+            fields.append(f"{field} = ${param_count}")
+            values.append(value)
+        param_count += 1
+    
+    fields.append("updated_at = NOW()")
+    values.append(job_id)
+    
+    query = f"""
+    UPDATE voxcliente.pipeline_jobs 
+    SET {', '.join(fields)}
+    WHERE job_id = ${param_count}
+    """
+    await conn.execute(query, *values)
+
+async def get_pipeline_job(conn: asyncpg.Connection, job_id: UUID) -> Optional[dict]:
+    """Get pipeline job checkpoint."""
+    query = "SELECT * FROM voxcliente.pipeline_jobs WHERE job_id = $1"
+    return await conn.fetchrow(query, job_id)
+
+async def touch_pipeline_jobs(conn: asyncpg.Connection, job_ids: List[UUID]) -> None:
+    """Refresh heartbeat of jobs being processed by this worker."""
+    query = "UPDATE voxcliente.pipeline_jobs SET updated_at = NOW() WHERE job_id = ANY($1::uuid[])"
+    await conn.execute(query, job_ids)
+
+async def claim_stale_pipeline_jobs(conn: asyncpg.Connection, stale_after_seconds: int) -> List[dict]:
+    """Atomically claim unfinished jobs whose worker stopped sending heartbeats."""
+    query = """
+    UPDATE voxcliente.pipeline_jobs 
+    SET updated_at = NOW()
+    WHERE job_id IN (
+        SELECT job_id FROM voxcliente.pipeline_jobs
+        WHERE status NOT IN ('completed', 'failed')
+          AND updated_at < NOW() - make_interval(secs => $1)
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *
+    """
+    return await conn.fetch(query, stale_after_seconds)
+
+# File Registry Queries
+async def insert_file_registry_entry(conn: asyncpg.Connection, entry: dict) -> None:
+    """Register a downloadable file."""
+    query = """
+    INSERT INTO voxcliente.file_registry (file_id, file_type, original_filename, path, size_bytes, created_at, expires_at,
+                                          last_accessed)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $6)
+    """
+    await conn.execute(
+        query,
+        entry["file_id"],
+        entry["file_type"],
+        entry["original_filename"],
+        entry["path"],
+        entry["size_bytes"],
+        entry["created_at"],
+        entry["expires_at"]
+    )
+
+async def get_file_registry_entry(conn: asyncpg.Connection, file_id: UUID) -> Optional[dict]:
+    """Get downloadable file by ID."""
+    query = "SELECT * FROM voxcliente.file_registry WHERE file_id = $1"
+    return await conn.fetchrow(query, file_id)
+
+async def delete_file_registry_entry(conn: asyncpg.Connection, file_id: UUID) -> str:
+    """Delete downloadable file."""
+    query = "DELETE FROM voxcliente.file_registry WHERE file_id = $1"
+    return await conn.execute(query, file_id)
+
+async def set_file_registry_artifact(conn: asyncpg.Connection, file_id: UUID, file_format: str, path: str,
+                                     size_bytes: int) -> str:
+    """Record rendered artifact path and size of a file."""
+    query = """
+    UPDATE voxcliente.file_registry
+    SET artifacts = artifacts || jsonb_build_object($2::text, jsonb_build_object('path', $3::text, 'size_bytes', $4::bigint))
+    WHERE file_id = $1
+    """
+    return await conn.execute(query, file_id, file_format, path, size_bytes)
+
+async def delete_file_registry_artifact(conn: asyncpg.Connection, file_id: UUID, file_format: str) -> None:
+    """Remove rendered artifact path of a file."""
+    query = "UPDATE voxcliente.file_registry SET artifacts = artifacts - $2::text WHERE file_id = $1"
+    await conn.execute(query, file_id, file_format)
+
+async def get_expired_file_registry_entries(conn: asyncpg.Connection, before: Optional[datetime], limit: int) -> List[dict]:
+    """Get files expiring before the given time (all files if None), oldest first."""
+    if before is None:
+        query = "SELECT * FROM voxcliente.file_registry ORDER BY expires_at LIMIT $1"
+        return await conn.fetch(query, limit)
+    query = """
+    SELECT * FROM voxcliente.file_registry
+    WHERE expires_at < $1
+    ORDER BY expires_at
+    LIMIT $2
+    """
+    return await conn.fetch(query, before, limit)
+
+async def touch_file_registry_entry(conn: asyncpg.Connection, file_id: UUID, accessed_at: datetime) -> None:
+    """Record a download of a file."""
+    query = "UPDATE voxcliente.file_registry SET last_accessed = $2 WHERE file_id = $1"
+    await conn.execute(query, file_id, accessed_at)
+
+async def get_least_recently_used_file_registry_entries(conn: asyncpg.Connection, limit: int,
+                                                        with_artifacts: bool) -> List[dict]:
+    """Get files downloaded longest ago first, optionally only those with rendered artifacts."""
+    query = """
+    SELECT * FROM voxcliente.file_registry
+    WHERE NOT $2 OR artifacts <> '{}'::jsonb
+    ORDER BY last_accessed
+    LIMIT $1
+    """
+    return await conn.fetch(query, limit, with_artifacts)
+
+async def get_next_file_registry_expiry(conn: asyncpg.Connection) -> Optional[datetime]:
+    """Get the earliest expiry among registered files."""
+    query = "SELECT MIN(expires_at) FROM voxcliente.file_registry"
+    return await conn.fetchval(query)
+
+async def get_existing_file_registry_ids(conn: asyncpg.Connection, file_ids: List[UUID]) -> List[dict]:
+    """Get which of the given file IDs are registered."""
+    query = "SELECT file_id FROM voxcliente.file_registry WHERE file_id = ANY($1::uuid[])"
+    return await conn.fetch(query, file_ids)
+
+async def get_file_registry_stats(conn: asyncpg.Connection) -> List[dict]:
+    """Count and total size of registered files by type and of artifacts (trigger-maintained totals)."""
+    query = "SELECT kind, files, size_bytes FROM voxcliente.file_registry_totals"
+    return await conn.fetch(query)
+
+# Email Outbox Queries
+async def insert_email_outbox_entry(conn: asyncpg.Connection, idempotency_key: str, payload: str, now: datetime) -> dict:
+    """Queue outgoing email unless its idempotency key is already queued; returns id and whether it was inserted."""
+    query = """
+    WITH inserted AS (
+        INSERT INTO voxcliente.email_outbox (idempotency_key, payload, created_at, next_attempt_at)
+        VALUES ($1, $2, $3, $3)
+        ON CONFLICT (idempotency_key) DO NOTHING
+        RETURNING id
+    )
+    SELECT id, TRUE AS created FROM inserted
+    UNION ALL
+    SELECT id, FALSE AS created FROM voxcliente.email_outbox WHERE idempotency_key = $1
+    """
+    return await conn.fetchrow(query, idempotency_key, payload, now)
+
+async def get_email_outbox_entry(conn: asyncpg.Connection, idempotency_key: str) -> Optional[dict]:
+    """Get delivery status of a queued email by idempotency key."""
+    query = """
+    SELECT id, status, attempts, last_error, provider_id, created_at, sent_at
+    FROM voxcliente.email_outbox
+    WHERE idempotency_key = $1
+    """
+    return await conn.fetchrow(query, idempotency_key)
+
+async def claim_email_outbox_entries(conn: asyncpg.Connection, now: datetime, lease_until: datetime, limit: int) -> List[dict]:
+    """Claim due emails (pending, or sending with an expired lease) for this worker."""
+    query = """
+    UPDATE voxcliente.email_outbox
+    SET status = 'sending', attempts = attempts + 1, next_attempt_at = $2
+    WHERE id IN (
+        SELECT id FROM voxcliente.email_outbox
+        WHERE status IN ('pending', 'sending') AND next_attempt_at <= $1
+        ORDER BY next_attempt_at
+        LIMIT $3
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, idempotency_key, payload, attempts, created_at
+    """
+    return await conn.fetch(query, now, lease_until, limit)
+
+async def mark_email_outbox_sent(conn: asyncpg.Connection, entry_id: int, provider_id: Optional[str], now: datetime) -> None:
+    """Mark email as delivered to the provider."""
+    query = """
+    UPDATE voxcliente.email_outbox
+    SET status = 'sent', provider_id = $2, sent_at = $3, last_error = NULL
+    WHERE id = $1
+    """
+    await conn.execute(query, entry_id, provider_id, now)
+
+async def mark_email_outbox_retry(conn: asyncpg.Connection, entry_id: int, error: str, next_attempt_at: datetime) -> None:
+    """Schedule another delivery attempt."""
+    query = """
+    UPDATE voxcliente.email_outbox
+    SET status = 'pending', last_error = $2, next_attempt_at = $3
+    WHERE id = $1
+    """
+    await conn.execute(query, entry_id, error, next_attempt_at)
+
+async def mark_email_outbox_failed(conn: asyncpg.Connection, entry_id: int, error: str) -> None:
+    """Give up on an email."""
+    query = "UPDATE voxcliente.email_outbox SET status = 'failed', last_error = $2 WHERE id = $1"
+    await conn.execute(query, entry_id, error)
+
+async def get_next_email_outbox_attempt(conn: asyncpg.Connection) -> Optional[datetime]:
+    """Get the earliest scheduled attempt among queued emails."""
+    query = "SELECT MIN(next_attempt_at) FROM voxcliente.email_outbox WHERE status IN ('pending', 'sending')"
+    return await conn.fetchval(query)
+
+async def get_email_outbox_depth(conn: asyncpg.Connection) -> List[dict]:
+    """Count emails by status, with the oldest creation time of each."""
+    query = """
+    SELECT status, COUNT(*) AS emails, MIN(created_at) AS oldest
+    FROM voxcliente.email_outbox
+    GROUP BY status
+    """
+    return await conn.fetch(query)
+
+async def delete_old_email_outbox_entries(conn: asyncpg.Connection, before: datetime) -> str:
+    """Delete sent or failed emails created before the given time."""
+    query = "DELETE FROM voxcliente.email_outbox WHERE status IN ('sent', 'failed') AND created_at < $1"
+    return await conn.execute(query, before)
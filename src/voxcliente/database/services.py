@@ -1,6 +1,7 @@
 """Database services for business logic."""
+import json
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from uuid import UUID, uuid4
 from decimal import Decimal
 from datetime import datetime
@@ -115,3 +116,364 @@ class MeetingService:
             except Exception as e:
                 logger.error(f"Error getting meetings: {e}")
                 raise
+
+class LLMCacheService:
+    """LLM result cache persistence."""
+    
+    @staticmethod
+    async def get_entry(cache_key: str, created_after: Optional[datetime] = None) -> Optional[dict]:
+        """Get cached LLM result, or None if missing or created before created_after."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                row = await get_llm_cache_entry(conn, cache_key, created_after)
+                return json.loads(row["result"]) if row else None
+            except Exception as e:
+                logger.error(f"Error getting LLM cache entry: {e}")
+                raise
+    
+    @staticmethod
+    async def set_entry(cache_key: str, prompt_hash: str, model: str, result: dict) -> None:
+        """Store LLM result."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await upsert_llm_cache_entry(conn, cache_key, prompt_hash, model, json.dumps(result))
+            except Exception as e:
+                logger.error(f"Error storing LLM cache entry: {e}")
+                raise
+    
+    @staticmethod
+    async def purge(before: Optional[datetime], max_entries: int) -> int:
+        """Delete LLM results created before the given time and all but the newest max_entries."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                status = await delete_old_llm_cache_entries(conn, before, max_entries)
+                return int(status.split()[-1])
+            except Exception as e:
+                logger.error(f"Error purging LLM cache: {e}")
+                raise
+
+class PipelineJobService:
+    """Pipeline checkpoint persistence."""
+    
+    @staticmethod
+    def _decode(row) -> dict:
+        """Convert row to dict, decoding JSONB columns."""
+        job = dict(row)
+        for field in PIPELINE_JOB_JSON_FIELDS:
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        return job
+    
+    @staticmethod
+    async def create_job(job_data: PipelineJobCreate) -> None:
+        """Create pipeline job checkpoint."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await create_pipeline_job(conn, job_data)
+            except Exception as e:
+                logger.error(f"Error creating pipeline job: {e}")
+                raise
+    
+    @staticmethod
+    async def update_job(job_id: UUID, update_data: PipelineJobUpdate) -> None:
+        """Save stage results of a pipeline job."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await update_pipeline_job(conn, job_id, update_data)
+            except Exception as e:
+                logger.error(f"Error updating pipeline job: {e}")
+                raise
+    
+    @staticmethod
+    async def get_job(job_id: UUID) -> Optional[dict]:
+        """Get pipeline job checkpoint."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                row = await get_pipeline_job(conn, job_id)
+                return PipelineJobService._decode(row) if row else None
+            except Exception as e:
+                logger.error(f"Error getting pipeline job: {e}")
+                raise
+    
+    @staticmethod
+    async def touch_jobs(job_ids: List[UUID]) -> None:
+        """Refresh heartbeat of running jobs."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await touch_pipeline_jobs(conn, job_ids)
+            except Exception as e:
+                logger.error(f"Error refreshing pipeline jobs heartbeat: {e}")
+                raise
+    
+    @staticmethod
+    async def claim_stale_jobs(stale_after_seconds: int) -> List[dict]:
+        """Claim unfinished jobs abandoned by a stopped worker."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                rows = await claim_stale_pipeline_jobs(conn, stale_after_seconds)
+                return [PipelineJobService._decode(row) for row in rows]
+            except Exception as e:
+                logger.error(f"Error claiming stale pipeline jobs: {e}")
+                raise
+
+class FileRegistryService:
+    """Shared registry of downloadable files."""
+    
+    @staticmethod
+    def _decode(row) -> dict:
+        """Convert row to registry entry."""
+        entry = dict(row)
+        entry["file_id"] = str(entry["file_id"])
+        artifacts = json.loads(entry["artifacts"]) if entry.get("artifacts") else {}
+        entry["artifacts"] = {file_format: artifact["path"] for file_format, artifact in artifacts.items()}
+        return entry
+    
+    @staticmethod
+    async def add_file(entry: dict) -> None:
+        """Register downloadable file."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await insert_file_registry_entry(conn, entry)
+            except Exception as e:
+                logger.error(f"Error registering file: {e}")
+                raise
+    
+    @staticmethod
+    async def get_file(file_id: UUID) -> Optional[dict]:
+        """Get downloadable file, or None if missing."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                row = await get_file_registry_entry(conn, file_id)
+                return FileRegistryService._decode(row) if row else None
+            except Exception as e:
+                logger.error(f"Error getting registered file: {e}")
+                raise
+    
+    @staticmethod
+    async def delete_file(file_id: UUID) -> bool:
+        """Delete downloadable file from registry."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                status = await delete_file_registry_entry(conn, file_id)
+                return status != "DELETE 0"
+            except Exception as e:
+                logger.error(f"Error deleting registered file: {e}")
+                raise
+    
+    @staticmethod
+    async def set_artifact(file_id: UUID, file_format: str, path: str, size_bytes: int) -> bool:
+        """Record rendered artifact; False if the file is no longer registered."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                status = await set_file_registry_artifact(conn, file_id, file_format, path, size_bytes)
+                return status != "UPDATE 0"
+            except Exception as e:
+                logger.error(f"Error registering artifact: {e}")
+                raise
+    
+    @staticmethod
+    async def delete_artifact(file_id: UUID, file_format: str) -> None:
+        """Remove rendered artifact from registry."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await delete_file_registry_artifact(conn, file_id, file_format)
+            except Exception as e:
+                logger.error(f"Error deleting artifact: {e}")
+                raise
+    
+    @staticmethod
+    async def touch_file(file_id: UUID, accessed_at: datetime) -> None:
+        """Record a download of a file."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await touch_file_registry_entry(conn, file_id, accessed_at)
+            except Exception as e:
+                logger.error(f"Error recording file download: {e}")
+                raise
+    
+    @staticmethod
+    async def get_least_recently_used_files(limit: int, with_artifacts: bool) -> List[dict]:
+        """Get files downloaded longest ago first."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                rows = await get_least_recently_used_file_registry_entries(conn, limit, with_artifacts)
+                return [FileRegistryService._decode(row) for row in rows]
+            except Exception as e:
+                logger.error(f"Error getting least recently used files: {e}")
+                raise
+    
+    @staticmethod
+    async def get_expired_files(before: Optional[datetime], limit: int) -> List[dict]:
+        """Get files expiring before the given time (all files if None)."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                rows = await get_expired_file_registry_entries(conn, before, limit)
+                return [FileRegistryService._decode(row) for row in rows]
+            except Exception as e:
+                logger.error(f"Error getting expired files: {e}")
+                raise
+    
+    @staticmethod
+    async def get_next_expiry() -> Optional[datetime]:
+        """Earliest expiry among registered files."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                return await get_next_file_registry_expiry(conn)
+            except Exception as e:
+                logger.error(f"Error getting next file expiry: {e}")
+                raise
+    
+    @staticmethod
+    async def get_existing_ids(file_ids: List[UUID]) -> set:
+        """Subset of the given file IDs still registered."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                rows = await get_existing_file_registry_ids(conn, file_ids)
+                return {str(row["file_id"]) for row in rows}
+            except Exception as e:
+                logger.error(f"Error checking registered files: {e}")
+                raise
+    
+    @staticmethod
+    async def get_stats() -> dict:
+        """Count and total size of registered files by type and of artifacts."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                rows = await get_file_registry_stats(conn)
+                return {row["kind"]: {"files": row["files"], "size_bytes": row["size_bytes"]} for row in rows}
+            except Exception as e:
+                logger.error(f"Error getting file registry stats: {e}")
+                raise
+
+class EmailOutboxService:
+    """Durable queue of outgoing emails."""
+    
+    @staticmethod
+    def _decode(row) -> dict:
+        """Convert claimed row to outbox entry."""
+        entry = dict(row)
+        entry["payload"] = json.loads(entry["payload"])
+        return entry
+    
+    @staticmethod
+    async def enqueue(idempotency_key: str, payload: dict, now: datetime) -> Tuple[int, bool]:
+        """Queue email; returns its ID and False if the idempotency key was already queued."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                row = await insert_email_outbox_entry(conn, idempotency_key, json.dumps(payload), now)
+                return row["id"], row["created"]
+            except Exception as e:
+                logger.error(f"Error queueing email: {e}")
+                raise
+    
+    @staticmethod
+    async def get_status(idempotency_key: str) -> Optional[dict]:
+        """Get delivery status of a queued email."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                row = await get_email_outbox_entry(conn, idempotency_key)
+                return dict(row) if row else None
+            except Exception as e:
+                logger.error(f"Error getting email status: {e}")
+                raise
+    
+    @staticmethod
+    async def claim(now: datetime, lease_until: datetime, limit: int) -> List[dict]:
+        """Claim due emails for delivery."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                rows = await claim_email_outbox_entries(conn, now, lease_until, limit)
+                return [EmailOutboxService._decode(row) for row in rows]
+            except Exception as e:
+                logger.error(f"Error claiming queued emails: {e}")
+                raise
+    
+    @staticmethod
+    async def mark_sent(entry_id: int, provider_id: Optional[str], now: datetime) -> None:
+        """Mark email as sent."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await mark_email_outbox_sent(conn, entry_id, provider_id, now)
+            except Exception as e:
+                logger.error(f"Error marking email as sent: {e}")
+                raise
+    
+    @staticmethod
+    async def mark_retry(entry_id: int, error: str, next_attempt_at: datetime) -> None:
+        """Schedule email retry."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await mark_email_outbox_retry(conn, entry_id, error, next_attempt_at)
+            except Exception as e:
+                logger.error(f"Error scheduling email retry: {e}")
+                raise
+    
+    @staticmethod
+    async def mark_failed(entry_id: int, error: str) -> None:
+        """Mark email as failed."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                await mark_email_outbox_failed(conn, entry_id, error)
+            except Exception as e:
+                logger.error(f"Error marking email as failed: {e}")
+                raise
+    
+    @staticmethod
+    async def get_next_attempt() -> Optional[datetime]:
+        """Earliest scheduled attempt among queued emails."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                return await get_next_email_outbox_attempt(conn)
+            except Exception as e:
+                logger.error(f"Error getting next email attempt: {e}")
+                raise
+    
+    @staticmethod
+    async def get_depth() -> dict:
+        """Email count and oldest creation time by status."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                rows = await get_email_outbox_depth(conn)
+                return {row["status"]: {"emails": row["emails"], "oldest": row["oldest"]} for row in rows}
+            except Exception as e:
+                logger.error(f"Error getting email outbox depth: {e}")
+                raise
+    
+    @staticmethod
+    async def purge(before: datetime) -> int:
+        """Delete sent or failed emails created before the given time."""
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            try:
+                status = await delete_old_email_outbox_entries(conn, before)
+                return int(status.split()[-1])
+            except Exception as e:
+                logger.error(f"Error purging email outbox: {e}")
+                raise
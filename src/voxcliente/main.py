@@ -2,6 +2,7 @@
 
 import logging
 import sys
+from functools import partial
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -12,7 +13,9 @@ from fastapi.responses import JSONResponse
 from posthog import Posthog
 
 from voxcliente.config import settings
-from voxcliente.api import router as health_router
+from voxcliente.api import router as health_router, resume_pipeline_job
+from voxcliente.services import job_manager, resend_email_service, file_manager, analytics_service
+from voxcliente.services.email_outbox import email_outbox
 from voxcliente.database import get_db_pool, close_db_pool
 
 # Configurar logging detallado para EasyPanel
@@ -127,10 +130,29 @@ def create_app() -> FastAPI:
         except Exception as e:
             logger.error(f"Error initializing database: {str(e)}")
             raise
+        
+        # Heartbeat de trabajos propios y reanudación de trabajos abandonados
+        job_manager.start(partial(resume_pipeline_job, app.state.posthog))
+        
+        # Procesos de render de documentos Word (si están configurados)
+        resend_email_service.start_render_pool()
+        
+        # Limpieza de descargas vencidas y archivos huérfanos
+        file_manager.start()
+        
+        # Envío en segundo plano de la cola de emails
+        email_outbox.start(
+            resend_email_service.deliver,
+            on_result=partial(analytics_service.track_email_result, app.state.posthog)
+        )
 
     @app.on_event("shutdown")
     async def shutdown_event():
         """Close database connection."""
+        await job_manager.stop()
+        await file_manager.stop()
+        await email_outbox.stop()
+        resend_email_service.stop_render_pool()
         try:
             await close_db_pool()
             logger.info("Database connection closed")
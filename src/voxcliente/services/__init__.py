@@ -5,11 +5,17 @@ from .ai_service import openai_service
 from .email_service import resend_email_service
 from .analytics_service import analytics_service
 from .file_manager import file_manager
+from .job_manager import job_manager
+from .upload_service import upload_service
+from .export_service import export_service
 
 __all__ = [
     "assemblyai_service",
     "openai_service", 
     "resend_email_service",
     "analytics_service",
-    "file_manager"
+    "file_manager",
+    "job_manager",
+    "upload_service",
+    "export_service"
 ]
@@ -0,0 +1,113 @@
+"""Tokenizador del markdown simple que genera el LLM en el campo `acta`."""
+
+import re
+from typing import Iterator, List, NamedTuple, Tuple
+
+# Nivel máximo de anidación de listas (estilos 'List Bullet 3' / 'List 3')
+MAX_LIST_LEVEL = 2
+
+# Marcador al inicio de la línea, ya sin sangría: título, número o viñeta
+_MARKER = re.compile(r"""
+    (?P<heading>\#{1,6})\s+
+  | (?P<number>\d{1,3}[.)])(?:\s+|(?=\*\*))
+  | (?P<bullet>[-*•])\s+
+""", re.VERBOSE)
+
+# Primeros caracteres posibles de un marcador; las demás líneas no pasan por la regex
+_MARKER_START = frozenset("#-*•0123456789")
+
+# Énfasis en línea: **negrita** o *cursiva*
+_INLINE = re.compile(r"\*\*(?P<bold>.+?)\*\*|\*(?P<italic>[^\s*](?:.*?[^\s*])?)\*")
+
+# Línea completa en negrita (título)
+_BOLD_LINE = re.compile(r"\*\*([^*]+)\*\*")
+
+# Fragmento de texto: (texto, negrita, cursiva)
+Run = Tuple[str, bool, bool]
+
+
+class Block(NamedTuple):
+    """Párrafo del acta ya clasificado."""
+    kind: str       # 'blank', 'heading', 'number', 'bullet' o 'text'
+    level: int      # Nivel de título (2-3) o de anidación de lista (0-2)
+    runs: List[Run]
+
+
+def parse_inline(text: str) -> List[Run]:
+    """Separar texto en fragmentos con su formato de negrita/cursiva."""
+    if "*" not in text:
+        return [(text, False, False)]
+
+    # split() intercala cada énfasis como (negrita, cursiva) entre los tramos de texto
+    parts = _INLINE.split(text)
+    runs: List[Run] = [(parts[0], False, False)] if parts[0] else []
+    for index in range(1, len(parts), 3):
+        bold, italic, plain = parts[index:index + 3]
+        runs.append((bold, True, False) if bold is not None else (italic, False, True))
+        if plain:
+            runs.append((plain, False, False))
+    return runs
+
+
+def _indent_width(indent: str) -> int:
+    return len(indent.expandtabs(4))
+
+
+def tokenize(text: str) -> Iterator[Block]:
+    """
+    Convertir el texto del acta en bloques, con una sola pasada por línea.
+
+    Reconoce:
+        - `1. **Tema**` como título de nivel 2 y `**Subtítulo**` como nivel 3
+        - `#`, `##`, `###` como títulos
+        - listas numeradas (`1.` / `1)`) y viñetas (`-`, `*`, `•`) anidadas por sangría
+        - `**negrita**` y `*cursiva*` dentro de cualquier línea
+    """
+    # Sangrías de los ítems de lista abiertos, para calcular el nivel de anidación
+    list_indents: List[int] = []
+
+    for line in text.split("\n"):
+        stripped = line.lstrip(" \t")
+        match = _MARKER.match(stripped) if stripped[:1] in _MARKER_START else None
+        if match is None:
+            # Texto o línea en blanco: sin regex de marcador
+            content = stripped.rstrip()
+            if not content:
+                yield Block("blank", 0, [])
+                continue
+            heading = number = bullet = None
+        else:
+            content = stripped[match.end():].rstrip()
+            heading, number, bullet = match.group("heading", "number", "bullet")
+            if not content and not number:
+                yield Block("blank", 0, [])
+                continue
+
+        if heading:
+            list_indents.clear()
+            yield Block("heading", min(len(heading) + 1, 3), parse_inline(content))
+            continue
+
+        bold_line = _BOLD_LINE.fullmatch(content) if content.startswith("**") and not bullet else None
+        if bold_line:
+            # Título numerado (`1. **Tema**`) o subtítulo (`**Subtítulo**`)
+            list_indents.clear()
+            yield Block("heading", 2 if number else 3, [(bold_line.group(1), False, False)])
+            continue
+
+        if number or bullet:
+            indent = _indent_width(line[:len(line) - len(stripped)])
+            while list_indents and indent < list_indents[-1]:
+                list_indents.pop()
+            if not list_indents or indent > list_indents[-1]:
+                list_indents.append(indent)
+            level = min(len(list_indents) - 1, MAX_LIST_LEVEL)
+
+            if number:
+                yield Block("number", level, [(f"{number} ", False, False)] + parse_inline(content))
+            else:
+                yield Block("bullet", level, parse_inline(content))
+            continue
+
+        list_indents.clear()
+        yield Block("text", 0, parse_inline(content))
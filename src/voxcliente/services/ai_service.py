@@ -1,12 +1,16 @@
 """Servicio de IA con OpenAI - Simplificado para MVP."""
 
 import openai
+import copy
+import asyncio
 import json
 import re
+import hashlib
 from typing import Optional, Dict, Any
 from datetime import datetime
 from pathlib import Path
 from voxcliente.config import settings
+from voxcliente.services.llm_cache import create_llm_cache, build_cache_key
 
 
 class OpenAIService:
@@ -14,10 +18,19 @@ class OpenAIService:
     
     def __init__(self):
         """Inicializar cliente de OpenAI."""
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+        self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+        self.model = "gpt-5-mini"
         self.prompt_path = Path(__file__).parent.parent / "prompts" / "acta_generation.txt"
+        
+        # Caché de actas por (prompt, modelo, transcripción)
+        self.cache = create_llm_cache(settings.llm_cache_backend)
+        
+        # Prompt cargado: se relee solo si cambia la fecha de modificación del archivo
+        self._prompt_mtime: Optional[float] = None
+        self._prompt_text: Optional[str] = None
+        self.prompt_hash: Optional[str] = None
     
-    def generate_acta(self, transcript: str) -> Optional[Dict[str, Any]]:
+    async def generate_acta(self, transcript: str) -> Optional[Dict[str, Any]]:
         """
         Generar acta profesional a partir de transcripción.
         
@@ -29,13 +42,21 @@ class OpenAIService:
         """
         try:
             # Cargar prompt desde archivo
-            prompt_template = self._load_prompt()
+            prompt_template = await self._load_prompt()
             if not prompt_template:
                 print("Error: No se pudo cargar el prompt")
                 return None
             
-            response = self.client.chat.completions.create(
-                model="gpt-5-mini",
+            # Reutilizar acta si esta transcripción ya se procesó con el mismo prompt y modelo
+            cache_key = build_cache_key(self.prompt_hash, self.model, transcript)
+            if self.cache:
+                cached = await self.cache.get(cache_key)
+                if cached:
+                    print("Acta obtenida de caché")
+                    return self._as_cache_hit(cached)
+            
+            response = await self.client.chat.completions.create(
+                model=self.model,
                 messages=[
                     {"role": "system", "content": prompt_template},
                     {"role": "user", "content": transcript}
@@ -47,7 +68,7 @@ class OpenAIService:
             raw_response = response.choices[0].message.content
             
             # Guardar respuesta de OpenAI en archivo local para debugging
-            self._save_openai_response(raw_response, transcript[:50])
+            await asyncio.to_thread(self._save_openai_response, raw_response, transcript[:50])
             
             parsed_data = self._parse_response(raw_response)
             
@@ -56,7 +77,8 @@ class OpenAIService:
                 parsed_data['openai_usage'] = {
                     'prompt_tokens': response.usage.prompt_tokens,
                     'completion_tokens': response.usage.completion_tokens,
-                    'total_tokens': response.usage.total_tokens
+                    'total_tokens': response.usage.total_tokens,
+                    'cache_hit': False
                 }
                 
                 # Calcular costo real (precios de GPT-5-mini)
@@ -71,6 +93,9 @@ class OpenAIService:
                     'output_cost_usd': round(output_cost, 6),
                     'total_cost_usd': round(total_openai_cost, 6)
                 }
+                
+                if self.cache:
+                    await self.cache.set(cache_key, self.prompt_hash, self.model, parsed_data)
             
             return parsed_data
             
@@ -78,10 +103,43 @@ class OpenAIService:
             print(f"Error generando acta: {e}")
             return None
     
-    def _load_prompt(self) -> Optional[str]:
-        """Cargar prompt desde archivo."""
+    def _as_cache_hit(self, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Marcar resultado cacheado: no hubo llamada a OpenAI, costo cero."""
+        result = copy.deepcopy(cached)
+        result['openai_usage']['cache_hit'] = True
+        result['openai_cost'] = {
+            'input_cost_usd': 0.0,
+            'output_cost_usd': 0.0,
+            'total_cost_usd': 0.0
+        }
+        return result
+    
+    async def _load_prompt(self) -> Optional[str]:
+        """
+        Cargar prompt desde archivo.
+        
+        Si el archivo cambió desde la última carga se actualiza su hash. Si
+        además cambió su contenido mientras el proceso corre, se invalidan
+        las actas cacheadas con la versión anterior; al arrancar no, porque
+        la versión forma parte de la clave de caché.
+        """
         try:
-            return self.prompt_path.read_text(encoding='utf-8')
+            mtime = self.prompt_path.stat().st_mtime
+            if mtime == self._prompt_mtime:
+                return self._prompt_text
+            
+            prompt_text = self.prompt_path.read_text(encoding='utf-8')
+            prompt_hash = hashlib.sha256(prompt_text.encode('utf-8')).hexdigest()
+            
+            if self.prompt_hash and prompt_hash != self.prompt_hash:
+                print("Prompt de actas modificado, invalidando caché")
+                if self.cache:
+                    await self.cache.invalidate_stale(prompt_hash)
+            
+            self._prompt_mtime = mtime
+            self._prompt_text = prompt_text
+            self.prompt_hash = prompt_hash
+            return prompt_text
         except Exception as e:
             print(f"Error cargando prompt: {e}")
             return None
@@ -106,7 +164,7 @@ class OpenAIService:
             content = f"""
 === RESPUESTA DE OPENAI ===
 Timestamp: {datetime.now().isoformat()}
-Modelo: gpt-5-mini
+Modelo: {self.model}
 Transcripción (primeros 50 chars): {transcript_preview}
 
 === RESPUESTA COMPLETA ===
@@ -13,7 +13,7 @@ class AnalyticsService:
     def track_acta_generated(self, posthog, email: str, filename: str, file_size: int, 
                            duration_minutes: float, total_cost: float, 
                            cost_breakdown: Dict[str, Any], openai_usage: Dict[str, Any], 
-                           assemblyai_usage: Dict[str, Any], email_sent: bool) -> None:
+                           assemblyai_usage: Dict[str, Any], email_status: str) -> None:
         """Track final acta generation."""
         if not posthog:
             logger.warning("PostHog no disponible, saltando tracking de acta_generated")
@@ -31,13 +31,36 @@ class AnalyticsService:
                     'cost_breakdown': cost_breakdown,
                     'openai_usage': openai_usage,
                     'assemblyai_usage': assemblyai_usage,
-                    'email_sent': email_sent,
+                    'email_status': email_status,
                     'timestamp': datetime.now().isoformat()
                 }
             )
             logger.info("Tracking acta_generated enviado a PostHog")
         except Exception as e:
             logger.error(f"Error enviando tracking acta_generated: {e}")
+    
+    async def track_email_result(self, posthog, entry: Dict[str, Any], status: str, error: Optional[str]) -> None:
+        """Track final delivery result of a queued email (email_delivered / email_failed)."""
+        if not posthog:
+            return
+        
+        event = 'email_delivered' if status == 'sent' else 'email_failed'
+        try:
+            posthog.capture(
+                distinct_id=entry['payload']['to'][0],
+                event=event,
+                properties={
+                    'outbox_id': entry['id'],
+                    'idempotency_key': entry['idempotency_key'],
+                    'attempts': entry['attempts'],
+                    'error': error,
+                    'queued_seconds': round((datetime.now() - entry['created_at']).total_seconds(), 1),
+                    'timestamp': datetime.now().isoformat()
+                }
+            )
+            logger.info(f"Tracking {event} enviado a PostHog")
+        except Exception as e:
+            logger.error(f"Error enviando tracking {event}: {e}")
 
 
 # Instancia global del servicio de analytics
@@ -0,0 +1,96 @@
+"""Política de adjuntos de email según tamaño: adjuntar o enviar enlace de descarga."""
+
+import io
+import asyncio
+import logging
+import zipfile
+from typing import List, NamedTuple, Optional
+
+from voxcliente.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDocument(NamedTuple):
+    """Documento a entregar por email."""
+    filename: str
+    content: bytes
+    url: Optional[str] = None  # Enlace de descarga firmado y absoluto, si está registrado
+
+
+class AttachmentPlan(NamedTuple):
+    """Documentos que van adjuntos y documentos que van como enlace."""
+    attachments: List[EmailDocument]
+    links: List[EmailDocument]
+
+
+def encoded_size(size: int) -> int:
+    """Tamaño en base64 de `size` bytes, como viaja en el JSON a Resend (≈ +33%)."""
+    return (size + 2) // 3 * 4
+
+
+def recompress_zip(content: bytes) -> bytes:
+    """Reescribir un ZIP (.docx) con compresión deflate máxima; mismo contenido, ≈5% menos bytes."""
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(content)) as source, \
+            zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as target:
+        for info in source.infolist():
+            target.writestr(info, source.read(info), zipfile.ZIP_DEFLATED, 9)
+    return output.getvalue()
+
+
+class AttachmentPolicy:
+    """
+    Decidir cómo entrega el email cada documento.
+
+    Un documento se adjunta si no supera `email_attachment_max_kb` y, en
+    base64, cabe en lo que queda de `email_attachments_max_mb` para el
+    email; si no, va como enlace de descarga firmado. Con
+    `email_attachment_recompress` un documento que supera el límite se
+    recomprime antes de decidir, por si así entra.
+
+    Sin enlace (registro de descargas fallido) un documento grande se
+    adjunta igual mientras quepa en el total, y si no cabe se omite.
+    """
+
+    async def plan(self, documents: List[EmailDocument]) -> AttachmentPlan:
+        """
+        Repartir documentos entre adjuntos y enlaces, en orden de prioridad.
+
+        Args:
+            documents: Documentos del email, el más importante primero
+
+        Returns:
+            Plan con los adjuntos (con el contenido a enviar) y los enlaces
+        """
+        max_bytes = settings.email_attachment_max_kb * 1024
+        budget = settings.email_attachments_max_mb * 1024 * 1024
+        attachments: List[EmailDocument] = []
+        links: List[EmailDocument] = []
+
+        for document in documents:
+            if len(document.content) > max_bytes and settings.email_attachment_recompress:
+                content = await asyncio.to_thread(recompress_zip, document.content)
+                if len(content) < len(document.content):
+                    document = document._replace(content=content)
+
+            size = encoded_size(len(document.content))
+            if len(document.content) <= max_bytes and size <= budget:
+                attachments.append(document)
+                budget -= size
+            elif document.url:
+                links.append(document)
+            elif size <= budget:
+                logger.warning(f"{document.filename} supera el límite de adjuntos y no tiene enlace; se adjunta")
+                attachments.append(document)
+                budget -= size
+            else:
+                logger.error(f"{document.filename} no cabe en el email y no tiene enlace de descarga; se omite")
+
+        if links:
+            logger.info(f"Documentos enviados como enlace: {', '.join(document.filename for document in links)}")
+        return AttachmentPlan(attachments, links)
+
+
+# Instancia global de la política de adjuntos
+attachment_policy = AttachmentPolicy()
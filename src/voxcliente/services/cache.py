@@ -0,0 +1,88 @@
+"""Caché en memoria con expiración y límite de entradas."""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Caché LRU simple con tiempo de vida por entrada.
+
+    Al superar `max_entries` se descarta la entrada usada hace más tiempo;
+    las entradas vencidas se descartan al leerlas o al insertar nuevas.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        """Inicializar caché vacía."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # {key: (expires_at, value)} ordenado de menos a más recientemente usado
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Obtener valor si existe y no venció; None en caso contrario."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guardar valor, descartando vencidos y los menos usados si hace falta."""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else float("inf")
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def delete(self, key: Hashable) -> bool:
+        """Eliminar entrada; retorna True si existía."""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def delete_matching(self, predicate: Callable[[Any], bool]) -> int:
+        """Eliminar entradas cuyo valor cumple el predicado; retorna cuántas se eliminaron."""
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items() if predicate(value)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Vaciar la caché."""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self) -> None:
+        """Descartar entradas vencidas y luego las menos usadas sobre el límite."""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at < now]
+        for key in expired:
+            del self._entries[key]
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtener estadísticas de uso."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,86 @@
+"""Enlaces de descarga firmados con HMAC, validables sin estado compartido."""
+
+import hmac
+import base64
+import hashlib
+import logging
+import secrets
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from voxcliente.config import settings
+
+logger = logging.getLogger(__name__)
+
+if settings.download_signing_key:
+    _SIGNING_KEY = settings.download_signing_key.encode("utf-8")
+else:
+    # Sin clave configurada los enlaces solo sirven en este proceso
+    _SIGNING_KEY = secrets.token_bytes(32)
+    logger.warning("DOWNLOAD_SIGNING_KEY no configurada; los enlaces de descarga no sirven entre workers")
+
+
+class DownloadClaims(NamedTuple):
+    """Datos firmados dentro de un enlace de descarga."""
+    storage_key: str      # Ruta relativa de los datos de origen, p. ej. 'actas/<id>.json' (separadas por coma en 'bundle')
+    file_type: str        # 'acta', 'transcript' o 'bundle'
+    expires_at: datetime
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _signature(payload: str) -> str:
+    return _b64encode(hmac.new(_SIGNING_KEY, payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def sign_download(storage_key: str, file_type: str, expires_at: datetime) -> str:
+    """
+    Crear token de descarga.
+
+    El token es `<payload>.<firma>` en base64url, con payload
+    `tipo|clave|vencimiento (epoch)` y firma HMAC-SHA256 del payload. Un
+    servidor estático o CDN con la misma clave puede validarlo igual.
+
+    Args:
+        storage_key: Clave de almacenamiento de los datos de origen
+        file_type: Tipo de archivo
+        expires_at: Momento a partir del cual el enlace deja de servir
+
+    Returns:
+        Token para la URL de descarga
+    """
+    payload = _b64encode(f"{file_type}|{storage_key}|{int(expires_at.timestamp())}".encode("utf-8"))
+    return f"{payload}.{_signature(payload)}"
+
+
+def sign_bundle(storage_keys: List[str], expires_at: datetime) -> str:
+    """Crear token de descarga de varios archivos en un ZIP (tipo 'bundle')."""
+    return sign_download(",".join(storage_keys), "bundle", expires_at)
+
+
+def verify_download(token: str) -> Optional[DownloadClaims]:
+    """
+    Validar token de descarga.
+
+    Returns:
+        Datos firmados, o None si la firma no corresponde, el token está
+        mal formado o ya venció
+    """
+    payload, _, signature = token.partition(".")
+    try:
+        if not payload or not hmac.compare_digest(signature.encode("ascii"), _signature(payload).encode("ascii")):
+            return None
+        file_type, storage_key, expires = _b64decode(payload).decode("utf-8").split("|")
+        expires_at = datetime.fromtimestamp(int(expires))
+    except ValueError:
+        return None
+
+    if expires_at <= datetime.now():
+        return None
+    return DownloadClaims(storage_key, file_type, expires_at)
@@ -0,0 +1,458 @@
+"""Cola persistente de emails salientes (outbox) con envío en segundo plano."""
+
+import json
+import time
+import random
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from voxcliente.config import settings
+from voxcliente.database import EmailOutboxService
+
+logger = logging.getLogger(__name__)
+
+# Un email en la cola:
+# {id, idempotency_key, payload (parámetros de Resend), attempts, created_at}
+# Estados: pending -> sending -> sent | failed; un 'sending' cuyo lease vence vuelve a tomarse
+Entry = Dict[str, Any]
+
+# Envía el email y retorna el ID del proveedor; recibe (payload, idempotency_key)
+Sender = Callable[[Dict[str, Any], str], Awaitable[Optional[str]]]
+
+# Recibe el resultado final de cada email: (entry, 'sent' o 'failed', error)
+ResultHandler = Callable[[Entry, str, Optional[str]], Awaitable[None]]
+
+
+class PermanentEmailError(Exception):
+    """Error de envío que no se resuelve reintentando (p. ej. destinatario inválido)."""
+
+
+class SQLiteEmailOutbox:
+    """Backend en un archivo SQLite, compartido por los workers de un mismo host."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT UNIQUE NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        provider_id TEXT,
+        created_at REAL NOT NULL,
+        next_attempt_at REAL NOT NULL,
+        sent_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at);
+    """
+
+    def __init__(self, db_path: str):
+        """Inicializar base de datos de la cola."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión del thread actual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _enqueue(self, idempotency_key: str, payload: Dict[str, Any], now: datetime) -> Tuple[int, bool]:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO email_outbox (idempotency_key, payload, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?)",
+                (idempotency_key, json.dumps(payload), now.timestamp(), now.timestamp())
+            )
+            if cursor.rowcount > 0:
+                return cursor.lastrowid, True
+            row = conn.execute("SELECT id FROM email_outbox WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            return row["id"], False
+
+    def _status(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT id, status, attempts, last_error, provider_id, created_at, sent_at "
+            "FROM email_outbox WHERE idempotency_key = ?", (idempotency_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            **dict(row),
+            "created_at": datetime.fromtimestamp(row["created_at"]),
+            "sent_at": datetime.fromtimestamp(row["sent_at"]) if row["sent_at"] is not None else None
+        }
+
+    def _claim(self, now: datetime, lease_until: datetime, limit: int) -> List[Entry]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "UPDATE email_outbox SET status = 'sending', attempts = attempts + 1, next_attempt_at = ? "
+                "WHERE id IN (SELECT id FROM email_outbox WHERE status IN ('pending', 'sending') "
+                "AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?) "
+                "RETURNING id, idempotency_key, payload, attempts, created_at",
+                (lease_until.timestamp(), now.timestamp(), limit)
+            ).fetchall()
+        return [
+            {**dict(row), "payload": json.loads(row["payload"]), "created_at": datetime.fromtimestamp(row["created_at"])}
+            for row in rows
+        ]
+
+    def _mark_sent(self, entry_id: int, provider_id: Optional[str], now: datetime) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE email_outbox SET status = 'sent', provider_id = ?, sent_at = ?, last_error = NULL WHERE id = ?",
+                (provider_id, now.timestamp(), entry_id)
+            )
+
+    def _mark_retry(self, entry_id: int, error: str, next_attempt_at: datetime) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE email_outbox SET status = 'pending', last_error = ?, next_attempt_at = ? WHERE id = ?",
+                (error, next_attempt_at.timestamp(), entry_id)
+            )
+
+    def _mark_failed(self, entry_id: int, error: str) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE email_outbox SET status = 'failed', last_error = ? WHERE id = ?", (error, entry_id))
+
+    def _next_attempt(self) -> Optional[datetime]:
+        row = self._connect().execute(
+            "SELECT MIN(next_attempt_at) AS next_attempt_at FROM email_outbox WHERE status IN ('pending', 'sending')"
+        ).fetchone()
+        return datetime.fromtimestamp(row["next_attempt_at"]) if row["next_attempt_at"] is not None else None
+
+    def _depth(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT status, COUNT(*) AS emails, MIN(created_at) AS oldest FROM email_outbox GROUP BY status"
+        )
+        return {row["status"]: {"emails": row["emails"], "oldest": datetime.fromtimestamp(row["oldest"])} for row in rows}
+
+    def _purge(self, before: datetime) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM email_outbox WHERE status IN ('sent', 'failed') AND created_at < ?", (before.timestamp(),)
+            ).rowcount
+
+    async def enqueue(self, idempotency_key: str, payload: Dict[str, Any], now: datetime) -> Tuple[int, bool]:
+        """Encolar email; retorna su ID y False si la clave de idempotencia ya estaba en la cola."""
+        return await asyncio.to_thread(self._enqueue, idempotency_key, payload, now)
+
+    async def status(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """Estado de envío del email con esa clave, o None si no está en la cola."""
+        return await asyncio.to_thread(self._status, idempotency_key)
+
+    async def claim(self, now: datetime, lease_until: datetime, limit: int) -> List[Entry]:
+        """Tomar emails pendientes para enviarlos (o cuyo lease venció)."""
+        return await asyncio.to_thread(self._claim, now, lease_until, limit)
+
+    async def mark_sent(self, entry_id: int, provider_id: Optional[str], now: datetime) -> None:
+        """Marcar email como enviado."""
+        await asyncio.to_thread(self._mark_sent, entry_id, provider_id, now)
+
+    async def mark_retry(self, entry_id: int, error: str, next_attempt_at: datetime) -> None:
+        """Programar un nuevo intento."""
+        await asyncio.to_thread(self._mark_retry, entry_id, error, next_attempt_at)
+
+    async def mark_failed(self, entry_id: int, error: str) -> None:
+        """Dar el email por fallido."""
+        await asyncio.to_thread(self._mark_failed, entry_id, error)
+
+    async def next_attempt(self) -> Optional[datetime]:
+        """Próximo intento programado, o None si la cola está vacía."""
+        return await asyncio.to_thread(self._next_attempt)
+
+    async def depth(self) -> Dict[str, Dict[str, Any]]:
+        """Cantidad de emails y creación del más antiguo, por estado."""
+        return await asyncio.to_thread(self._depth)
+
+    async def purge(self, before: datetime) -> int:
+        """Borrar emails enviados o fallidos creados antes de `before`."""
+        return await asyncio.to_thread(self._purge, before)
+
+
+class PostgresEmailOutbox:
+    """Backend compartido en la tabla email_outbox de PostgreSQL (varios hosts)."""
+
+    async def enqueue(self, idempotency_key: str, payload: Dict[str, Any], now: datetime) -> Tuple[int, bool]:
+        """Encolar email; retorna su ID y False si la clave de idempotencia ya estaba en la cola."""
+        return await EmailOutboxService.enqueue(idempotency_key, payload, now)
+
+    async def status(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """Estado de envío del email con esa clave, o None si no está en la cola."""
+        return await EmailOutboxService.get_status(idempotency_key)
+
+    async def claim(self, now: datetime, lease_until: datetime, limit: int) -> List[Entry]:
+        """Tomar emails pendientes para enviarlos (o cuyo lease venció)."""
+        return await EmailOutboxService.claim(now, lease_until, limit)
+
+    async def mark_sent(self, entry_id: int, provider_id: Optional[str], now: datetime) -> None:
+        """Marcar email como enviado."""
+        await EmailOutboxService.mark_sent(entry_id, provider_id, now)
+
+    async def mark_retry(self, entry_id: int, error: str, next_attempt_at: datetime) -> None:
+        """Programar un nuevo intento."""
+        await EmailOutboxService.mark_retry(entry_id, error, next_attempt_at)
+
+    async def mark_failed(self, entry_id: int, error: str) -> None:
+        """Dar el email por fallido."""
+        await EmailOutboxService.mark_failed(entry_id, error)
+
+    async def next_attempt(self) -> Optional[datetime]:
+        """Próximo intento programado, o None si la cola está vacía."""
+        return await EmailOutboxService.get_next_attempt()
+
+    async def depth(self) -> Dict[str, Dict[str, Any]]:
+        """Cantidad de emails y creación del más antiguo, por estado."""
+        return await EmailOutboxService.get_depth()
+
+    async def purge(self, before: datetime) -> int:
+        """Borrar emails enviados o fallidos creados antes de `before`."""
+        return await EmailOutboxService.purge(before)
+
+
+def create_email_outbox_backend(backend: str):
+    """
+    Crear backend de la cola de emails según configuración.
+
+    Args:
+        backend: 'sqlite' o 'postgres'
+
+    Returns:
+        Backend de la cola
+    """
+    if backend == "postgres":
+        return PostgresEmailOutbox()
+    if backend != "sqlite":
+        logger.warning(f"Backend de cola de emails desconocido '{backend}', usando sqlite")
+    return SQLiteEmailOutbox(settings.email_outbox_path)
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    """p50, p95 y máximo en milisegundos."""
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+        "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1)
+    }
+
+
+class EmailOutbox:
+    """
+    Cola de emails con envío en segundo plano.
+
+    El pipeline solo encola (una escritura local), así que la latencia y los
+    errores de Resend no llegan al usuario. Un sender por worker toma los
+    emails pendientes, los envía con concurrencia acotada y reintenta los
+    fallidos con espera exponencial. Cada email lleva una clave de
+    idempotencia por reunión: encolarlo dos veces (p. ej. al reanudar un
+    trabajo) no lo duplica, y Resend la recibe para descartar reenvíos si
+    un worker cae entre enviar y confirmar.
+    """
+
+    def __init__(self):
+        """Inicializar cola y métricas."""
+        self.backend = create_email_outbox_backend(settings.email_outbox_backend)
+
+        # Aviso al sender de que hay emails nuevos, para no esperar al próximo sondeo
+        self._wakeup = asyncio.Event()
+        self._sender_task: Optional[asyncio.Task] = None
+        self._on_result: Optional[ResultHandler] = None
+
+        # Métricas del proceso: duración de la llamada a Resend y tiempo desde que se encoló
+        self._send_latencies: Deque[float] = deque(maxlen=1024)
+        self._delivery_latencies: Deque[float] = deque(maxlen=1024)
+        self._counters = {"sent": 0, "retried": 0, "failed": 0}
+
+        # Espera máxima del sender entre revisiones de la cola
+        self.poll_seconds = 30
+
+    async def enqueue(self, idempotency_key: str, email_data: Dict[str, Any]) -> int:
+        """
+        Encolar email para envío.
+
+        Args:
+            idempotency_key: Clave única del email (una por reunión)
+            email_data: Parámetros de Resend (from, to, subject, html, attachments...)
+
+        Returns:
+            ID del email en la cola (el existente si esa clave ya estaba encolada)
+        """
+        entry_id, created = await self.backend.enqueue(idempotency_key, email_data, datetime.now())
+        if created:
+            logger.info(f"Email encolado: {idempotency_key} (#{entry_id})")
+        else:
+            logger.info(f"Email ya encolado, se omite duplicado: {idempotency_key} (#{entry_id})")
+        self._wakeup.set()
+        return entry_id
+
+    async def get_status(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Consultar el estado de envío de un email.
+
+        Returns:
+            {id, status (pending, sending, sent, failed), attempts, last_error,
+            provider_id, created_at, sent_at} o None si no está en la cola
+        """
+        return await self.backend.status(idempotency_key)
+
+    def start(self, sender: Sender, on_result: Optional[ResultHandler] = None) -> None:
+        """
+        Iniciar envío en segundo plano.
+
+        Args:
+            sender: Función que envía un email y retorna el ID del proveedor
+            on_result: Función que recibe el resultado final de cada email (enviado o fallido)
+        """
+        self._on_result = on_result
+        self._sender_task = asyncio.create_task(self._sender_loop(sender))
+
+    async def stop(self) -> None:
+        """Detener envío en segundo plano; lo pendiente queda en la cola."""
+        if self._sender_task:
+            self._sender_task.cancel()
+            self._sender_task = None
+
+    async def _sender_loop(self, sender: Sender) -> None:
+        """Enviar emails pendientes y esperar al próximo reintento o email nuevo."""
+        last_purge = 0.0
+        while True:
+            next_attempt = None
+            try:
+                await self.drain(sender)
+                next_attempt = await self.backend.next_attempt()
+
+                if time.monotonic() - last_purge >= 3600:
+                    await self.backend.purge(datetime.now() - timedelta(hours=settings.email_outbox_retention_hours))
+                    last_purge = time.monotonic()
+            except Exception as e:
+                logger.error(f"Error en envío de emails: {e}")
+
+            delay = self.poll_seconds
+            if next_attempt:
+                delay = min(delay, max((next_attempt - datetime.now()).total_seconds(), 0.05))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def drain(self, sender: Sender) -> int:
+        """
+        Enviar todos los emails pendientes que ya deben enviarse.
+
+        Returns:
+            Número de emails procesados (enviados, reprogramados o fallidos)
+        """
+        concurrency = settings.email_send_concurrency
+        slots = asyncio.Semaphore(concurrency)
+        processed = 0
+
+        async def deliver(entry: Entry) -> None:
+            async with slots:
+                await self._deliver(entry, sender)
+
+        while True:
+            now = datetime.now()
+            batch = await self.backend.claim(
+                now, now + timedelta(seconds=settings.email_send_lease_seconds), concurrency * 2
+            )
+            if not batch:
+                return processed
+            await asyncio.gather(*(deliver(entry) for entry in batch))
+            processed += len(batch)
+
+    async def _deliver(self, entry: Entry, sender: Sender) -> None:
+        """Enviar un email y registrar el resultado."""
+        started = time.perf_counter()
+        try:
+            provider_id = await sender(entry["payload"], entry["idempotency_key"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if isinstance(e, PermanentEmailError) or entry["attempts"] >= settings.email_max_attempts:
+                self._counters["failed"] += 1
+                logger.error(f"Email {entry['idempotency_key']} fallido tras {entry['attempts']} intento(s): {error}")
+                await self.backend.mark_failed(entry["id"], error)
+                await self._report(entry, "failed", error)
+                return
+
+            delay = self._retry_delay(entry["attempts"])
+            self._counters["retried"] += 1
+            logger.warning(f"Error enviando email {entry['idempotency_key']}, reintento en {delay:.0f}s: {error}")
+            await self.backend.mark_retry(entry["id"], error, datetime.now() + timedelta(seconds=delay))
+            return
+
+        self._send_latencies.append(time.perf_counter() - started)
+        self._delivery_latencies.append((datetime.now() - entry["created_at"]).total_seconds())
+        self._counters["sent"] += 1
+        await self.backend.mark_sent(entry["id"], provider_id, datetime.now())
+        logger.info(f"Email enviado: {entry['idempotency_key']} ({provider_id})")
+        await self._report(entry, "sent", None)
+
+    async def _report(self, entry: Entry, status: str, error: Optional[str]) -> None:
+        """Avisar el resultado final del email; un error del aviso no afecta el envío."""
+        if not self._on_result:
+            return
+        try:
+            await self._on_result(entry, status, error)
+        except Exception as e:
+            logger.error(f"Error registrando resultado del email {entry['idempotency_key']}: {e}")
+
+    @staticmethod
+    def max_delivery_seconds() -> float:
+        """Demora máxima entre encolar un email y su último intento (esperas con jitter y leases vencidos)."""
+        waits = sum(
+            min(settings.email_retry_base_seconds * 2 ** (attempt - 1), settings.email_retry_max_seconds) * 1.2
+            for attempt in range(1, settings.email_max_attempts)
+        )
+        return waits + settings.email_max_attempts * settings.email_send_lease_seconds
+
+    @staticmethod
+    def _retry_delay(attempts: int) -> float:
+        """Espera exponencial desde `email_retry_base_seconds`, con tope y ±20% de jitter."""
+        delay = min(settings.email_retry_base_seconds * 2 ** (attempts - 1), settings.email_retry_max_seconds)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtener métricas de la cola.
+
+        Returns:
+            Profundidad por estado y antigüedad del pendiente más viejo (cola
+            compartida), y contadores y latencias de envío de este proceso
+        """
+        try:
+            depth = await self.backend.depth()
+            queued = [depth[status] for status in ("pending", "sending") if status in depth]
+            oldest = min((item["oldest"] for item in queued), default=None)
+
+            return {
+                "queue_depth": sum(item["emails"] for item in queued),
+                "by_status": {status: item["emails"] for status, item in depth.items()},
+                "oldest_queued_seconds": round((datetime.now() - oldest).total_seconds(), 1) if oldest else None,
+                "send_latency": _percentiles(self._send_latencies),
+                "delivery_latency": _percentiles(self._delivery_latencies),
+                **self._counters
+            }
+
+        except Exception as e:
+            logger.error(f"Error obteniendo estadísticas de emails: {e}")
+            return {"error": str(e)}
+
+
+# Instancia global de la cola de emails
+email_outbox = EmailOutbox()
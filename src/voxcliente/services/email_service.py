@@ -1,21 +1,53 @@
 """Servicio de email con Resend - Simplificado para MVP."""
 
+import io
+import copy
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
 import resend
-import tempfile
 import base64
-import re
-from typing import Optional, Dict, Any
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Callable
 from datetime import datetime
-from pathlib import Path
 from docx import Document
 from docx.shared import Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.text.paragraph import Paragraph
 from voxcliente.config import settings
+from voxcliente.services.docx_stream import stream_document, iter_lines
+from voxcliente.services.acta_markdown import tokenize
+from voxcliente.services.email_outbox import email_outbox, PermanentEmailError
 from voxcliente.services.file_manager import file_manager
+from voxcliente.services.email_templates import email_templates, SafeHtml
+from voxcliente.services.attachment_policy import attachment_policy, EmailDocument
+
+logger = logging.getLogger(__name__)
 
 # Constantes para tipos MIME
 WORD_MIME_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
+# Pie de página de los documentos Word (2 líneas en blanco + texto de branding)
+BRANDING_TEXT = 'Generado por VoxCliente – Actas profesionales al instante con IA'
+BRANDING_PARAGRAPHS = 3
+
+# Estilos Word por nivel de anidación de listas del acta
+BULLET_STYLES = ('List Bullet', 'List Bullet 2', 'List Bullet 3')
+NUMBER_STYLES = ('List', 'List 2', 'List 3')
+
+# Nota al pie del resumen ejecutivo según cómo se entrega el acta
+ACTA_NOTES = {
+    'attached': 'Para detalles completos, consulta el acta adjunta.',
+    'link': 'Para detalles completos, descarga el acta desde el enlace más abajo.',
+    'missing': 'El acta completa no pudo incluirse en este email.'
+}
+
+# Párrafo reemplazado por las líneas de la transcripción en el modo streaming
+TRANSCRIPT_MARKER = '{{ transcripcion }}'
+
 
 class ResendEmailService:
     """Servicio simple para Resend."""
@@ -23,50 +55,83 @@ class ResendEmailService:
     def __init__(self):
         """Inicializar cliente de Resend."""
         resend.api_key = settings.resend_api_key
-        self.template_path = Path(__file__).parent.parent / "templates" / "email_template.html"
+        self.templates = email_templates
+        
+        # Plantillas base de documentos Word por título, clonadas en cada render
+        self._base_documents: Dict[str, Document] = {}
+        self._base_documents_lock = threading.Lock()
+        self._style_ids: Dict[str, str] = {}
+        
+        # Pool de procesos de render (opcional, ver start_render_pool)
+        self._render_pool: Optional[ProcessPoolExecutor] = None
+        self._render_slots: Optional[asyncio.Semaphore] = None
     
-    def send_acta_email(self, email: str, acta_data: Dict[str, Any], filename: str, transcript: str = None) -> bool:
+    async def send_acta_email(self, email: str, acta_data: Dict[str, Any], filename: str, transcript: str = None,
+                              acta_document: Optional[bytes] = None,
+                              transcript_document: Optional[bytes] = None,
+                              idempotency_key: Optional[str] = None,
+                              locale: Optional[str] = None,
+                              download_urls: Optional[Dict[str, Any]] = None) -> Optional[int]:
         """
         Enviar acta por email usando Resend con archivos Word adjuntos.
         
+        Los documentos grandes van como enlace de descarga en lugar de
+        adjuntos (ver `attachment_policy`) para no enviar emails de varios MB.
+        El email se deja en la cola de salida y lo envía en segundo plano
+        el sender de `email_outbox`, que reintenta si Resend falla.
+        
         Args:
             email: Email del destinatario
             acta_data: Diccionario con resumen_ejecutivo y acta completa
             filename: Nombre del archivo procesado
             transcript: Transcripción completa de Assembly (opcional)
+            acta_document: Word del acta ya generado (se genera si falta)
+            transcript_document: Word de la transcripción ya generado (se genera si falta)
+            idempotency_key: Clave única del email; con la misma clave se envía una sola vez
+            locale: Idioma de la plantilla (por defecto `email_locale`)
+            download_urls: Enlaces de descarga firmados (acta_url, transcript_url, expires_at)
             
         Returns:
-            True si se envió correctamente, False si hubo error
+            ID del email en la cola (también si ya estaba encolado), o None si hubo error
         """
-        acta_file_path = None
-        transcript_file_path = None
         try:
-            # Cargar template HTML
-            template_content = self._load_template()
-            if not template_content:
-                print("Error: No se pudo cargar el template de email")
-                return False
-            
-            # Personalizar template con resumen ejecutivo en el cuerpo
-            html_content = self._personalize_template(template_content, acta_data, filename)
-            
-            # Generar archivo Word del acta
-            acta_file_path = self._generate_word_document(acta_data, filename)
-            if not acta_file_path:
+            # Generar archivo Word del acta (trabajo CPU, fuera del event loop)
+            if acta_document is None:
+                acta_document = await self._render(_render_acta, acta_data, filename)
+            if not acta_document:
                 print("Error: No se pudo generar el archivo Word del acta")
-                return False
-            
-            # Preparar lista de adjuntos
-            attachments = []
+                return None
             
-            # Adjunto 1: Acta de reunión
-            attachments.append(self._create_attachment(acta_file_path, self._generate_filename("Acta_Reunion", filename)))
+            # Documento 1: Acta de reunión
+            download_urls = download_urls or {}
+            documents = [EmailDocument(
+                self._generate_filename("Acta_Reunion", filename), acta_document,
+                self._absolute_url(download_urls.get("acta_url"))
+            )]
             
-            # Adjunto 2: Transcripción completa (si está disponible)
+            # Documento 2: Transcripción completa (si está disponible)
             if transcript:
-                transcript_file_path = self._generate_transcript_document(transcript, filename)
-                if transcript_file_path:
-                    attachments.append(self._create_attachment(transcript_file_path, self._generate_filename("Transcripcion_Completa", filename)))
+                if transcript_document is None:
+                    transcript_document = await self._render(_render_transcript, transcript, filename)
+                if transcript_document:
+                    documents.append(EmailDocument(
+                        self._generate_filename("Transcripcion_Completa", filename), transcript_document,
+                        self._absolute_url(download_urls.get("transcript_url"))
+                    ))
+            
+            # Adjuntar los documentos chicos y enlazar los grandes
+            plan = await attachment_policy.plan(documents)
+            attachments = [self._create_attachment(document.content, document.filename) for document in plan.attachments]
+            
+            # Renderizar template con resumen ejecutivo y enlaces en el cuerpo
+            acta_filename = documents[0].filename
+            acta_delivery = (
+                'attached' if any(document.filename == acta_filename for document in plan.attachments)
+                else 'link' if any(document.filename == acta_filename for document in plan.links) else 'missing'
+            )
+            html_content = self._render_html(
+                acta_data, filename, locale, plan.links, download_urls.get("expires_at"), acta_delivery
+            )
             
             # Preparar datos del email
             email_data = {
@@ -78,27 +143,37 @@ class ResendEmailService:
                 "reply_to": settings.reply_to_email
             }
             
-            # Enviar email
-            response = resend.Emails.send(email_data)
+            # Encolar email; el envío y los reintentos ocurren en segundo plano
+            outbox_id = await email_outbox.enqueue(idempotency_key or f"email:{uuid.uuid4()}", email_data)
             
-            print(f"Email enviado exitosamente con {len(attachments)} adjunto(s)")
-            return True
+            print(f"Email encolado con {len(attachments)} adjunto(s) y {len(plan.links)} enlace(s)")
+            return outbox_id
             
         except Exception as e:
             print(f"Error enviando email: {e}")
-            return False
-        finally:
-            # Limpiar archivos temporales
-            self._cleanup_temp_files([acta_file_path, transcript_file_path])
+            return None
     
-    def _cleanup_temp_files(self, file_paths: list) -> None:
-        """Limpiar archivos temporales."""
-        for file_path in file_paths:
-            if file_path:
-                try:
-                    Path(file_path).unlink()
-                except Exception as e:
-                    print(f"Error eliminando archivo temporal: {e}")
+    async def deliver(self, email_data: Dict[str, Any], idempotency_key: str) -> Optional[str]:
+        """
+        Enviar email ya preparado a Resend (sender de la cola de salida).
+        
+        Resend descarta el envío si recibe de nuevo la misma clave de
+        idempotencia, así que reintentar tras un corte no duplica el email.
+        
+        Returns:
+            ID del email en Resend
+            
+        Raises:
+            PermanentEmailError: Si Resend rechaza el email por datos inválidos
+        """
+        try:
+            # El SDK de Resend solo es síncrono
+            response = await asyncio.to_thread(
+                resend.Emails.send, email_data, {"idempotency_key": idempotency_key}
+            )
+        except (resend.exceptions.ValidationError, resend.exceptions.MissingRequiredFieldsError) as e:
+            raise PermanentEmailError(str(e)) from e
+        return response.get("id") if isinstance(response, dict) else None
     
     def _generate_filename(self, prefix: str, original_filename: str) -> str:
         """Generar nombre de archivo para adjunto."""
@@ -114,58 +189,117 @@ class ResendEmailService:
             section.left_margin = Inches(1)
             section.right_margin = Inches(1)
     
-    def _create_attachment(self, file_path: str, filename: str) -> Dict[str, str]:
-        """Crear adjunto para email desde archivo."""
-        with open(file_path, 'rb') as file:
-            content = file.read()
-            content_base64 = base64.b64encode(content).decode('utf-8')
-        
+    def _create_attachment(self, content: bytes, filename: str) -> Dict[str, str]:
+        """Crear adjunto para email desde el contenido del archivo."""
         return {
             "filename": filename,
-            "content": content_base64,
+            "content": base64.b64encode(content).decode('utf-8'),
             "content_type": WORD_MIME_TYPE
         }
     
-    def _load_template(self) -> Optional[str]:
-        """Cargar template HTML desde archivo."""
-        try:
-            return self.template_path.read_text(encoding='utf-8')
-        except Exception as e:
-            print(f"Error cargando template: {e}")
-            return None
+    def link_lifetime_hours(self) -> float:
+        """
+        Vigencia de los archivos y enlaces de descarga que van en el email.
+        
+        Al menos `email_link_ttl_hours`, y siempre más que la demora máxima
+        de la cola de salida más el tiempo de vida normal de un archivo, para
+        que un email entregado tras varios reintentos no llegue con enlaces vencidos.
+        """
+        worst_delivery_hours = email_outbox.max_delivery_seconds() / 3600
+        return max(settings.email_link_ttl_hours, worst_delivery_hours + file_manager.file_lifetime_hours)
+    
+    def _absolute_url(self, path: Optional[str]) -> Optional[str]:
+        """URL pública de un enlace de descarga relativo."""
+        return f"{settings.public_base_url.rstrip('/')}{path}" if path else None
     
-    def _personalize_template(self, template: str, acta_data: Dict[str, Any], filename: str) -> str:
-        """Personalizar template con datos específicos."""
-        timestamp = datetime.now().strftime("%d/%m/%Y a las %H:%M")
+    def _render_html(self, acta_data: Dict[str, Any], filename: str, locale: Optional[str] = None,
+                     links: Optional[List[EmailDocument]] = None, links_expire_at: Optional[str] = None,
+                     acta_delivery: str = 'attached') -> str:
+        """
+        Renderizar cuerpo HTML del email con el resumen ejecutivo y los
+        enlaces de los documentos que no van adjuntos.
+        
+        `acta_delivery` ('attached', 'link' o 'missing') elige la nota que
+        indica dónde encontrar el acta completa.
         
-        # Extraer resumen ejecutivo
+        Los textos del acta (generados por el LLM) y el nombre del archivo
+        se escapan como HTML al insertarlos en la plantilla.
+        """
         resumen = acta_data.get("resumen_ejecutivo", {})
-        objetivo = resumen.get("objetivo", "No especificado")
-        acuerdos = resumen.get("acuerdos", "No especificados")
-        proximos_pasos = resumen.get("proximos_pasos", "No especificados")
+        resumen_ejecutivo_html = self.templates.render("email_resumen", {
+            "objetivo": resumen.get("objetivo", "No especificado"),
+            "acuerdos": resumen.get("acuerdos", "No especificados"),
+            "proximos_pasos": resumen.get("proximos_pasos", "No especificados"),
+            "nota_acta": ACTA_NOTES[acta_delivery]
+        }, locale)
+        
+        enlaces_html = ""
+        if links:
+            expires_at = datetime.fromisoformat(links_expire_at) if links_expire_at else None
+            enlaces_html = self.templates.render("email_enlaces", {
+                "enlaces": SafeHtml("".join(
+                    self.templates.render("email_enlace", {"url": link.url, "filename": link.filename}, locale)
+                    for link in links
+                )),
+                "vencimiento": expires_at.strftime("%d/%m/%Y a las %H:%M") if expires_at else ""
+            }, locale)
+        
+        return self.templates.render("email_template", {
+            "resumen_ejecutivo": resumen_ejecutivo_html,
+            "enlaces_descarga": enlaces_html,
+            "acta_content": acta_data.get("acta", ""),
+            "filename": filename,
+            "timestamp": datetime.now().strftime("%d/%m/%Y a las %H:%M")
+        }, locale)
+    
+    def _build_base_document(self, title: str) -> Document:
+        """
+        Crear plantilla base con márgenes, título y branding ya aplicados.
+        
+        El contenido de cada documento se inserta antes del bloque de branding.
+        """
+        doc = Document()
+        
+        # Configurar márgenes estándar
+        self._configure_document_margins(doc)
+        
+        # Título principal
+        title_paragraph = doc.add_heading(title, 0)
+        title_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
-        # Crear resumen ejecutivo para el cuerpo del email
-        resumen_ejecutivo_html = f"""
-        <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-            <h3 style="color: #2c3e50; margin-top: 0;">📋 Resumen Ejecutivo</h3>
-            <p><strong>🎯 Objetivo:</strong> {objetivo}</p>
-            <p><strong>🤝 Acuerdos:</strong> {acuerdos}</p>
-            <p><strong>📅 Próximos Pasos:</strong> {proximos_pasos}</p>
-        </div>
-        <p style="color: #666; font-size: 14px;">
-            <em>Para detalles completos, consulta el acta adjunta.</em>
-        </p>
+        # Agregar branding discreto al final del documento
+        doc.add_paragraph('')  # Línea en blanco
+        doc.add_paragraph('')  # Línea en blanco
+        
+        # Branding discreto y profesional
+        branding_paragraph = doc.add_paragraph()
+        branding_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        branding_run = branding_paragraph.add_run(BRANDING_TEXT)
+        branding_run.font.size = Inches(0.1)  # Tamaño pequeño
+        branding_run.font.color.rgb = None  # Color gris por defecto
+        
+        return doc
+    
+    def _new_document(self, title: str) -> Tuple[Document, Paragraph]:
         """
+        Clonar la plantilla base del título (se construye una sola vez por proceso).
         
-        # Acta completa para adjunto (si se necesita en el template)
-        acta_completa = acta_data.get("acta", "")
+        Returns:
+            (documento, párrafo antes del cual se agrega el contenido)
+        """
+        base = self._base_documents.get(title)
+        if base is None:
+            with self._base_documents_lock:
+                base = self._base_documents.get(title)
+                if base is None:
+                    base = self._build_base_document(title)
+                    self._base_documents[title] = base
         
-        return template.replace("{{ resumen_ejecutivo }}", resumen_ejecutivo_html) \
-                     .replace("{{ acta_content }}", acta_completa) \
-                     .replace("{{ filename }}", filename) \
-                     .replace("{{ timestamp }}", timestamp)
+        # Los elementos XML se copian por parte, así que se toma el documento de la parte copiada
+        doc = copy.deepcopy(base).part.document
+        return doc, doc.paragraphs[-BRANDING_PARAGRAPHS]
     
-    def _generate_word_document(self, acta_data: Dict[str, Any], filename: str) -> Optional[str]:
+    def _generate_word_document(self, acta_data: Dict[str, Any], filename: str) -> Optional[bytes]:
         """
         Generar archivo Word del acta.
         
@@ -174,101 +308,92 @@ class ResendEmailService:
             filename: Nombre del archivo original
             
         Returns:
-            Ruta del archivo Word generado o None si hay error
+            Contenido del archivo Word generado o None si hay error
         """
         try:
-            # Crear documento Word
-            doc = Document()
-            
-            # Configurar márgenes estándar
-            self._configure_document_margins(doc)
-            
-            # Título principal
-            title = doc.add_heading('ACTA DE REUNIÓN', 0)
-            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            # Crear documento Word desde la plantilla con título y branding
+            doc, body = self._new_document('ACTA DE REUNIÓN')
             
             # Información del archivo
-            doc.add_paragraph(f'Archivo procesado: {filename}')
-            doc.add_paragraph(f'Fecha de generación: {datetime.now().strftime("%d/%m/%Y a las %H:%M")}')
-            doc.add_paragraph('')  # Línea en blanco
+            body.insert_paragraph_before(f'Archivo procesado: {filename}')
+            body.insert_paragraph_before(f'Fecha de generación: {datetime.now().strftime("%d/%m/%Y a las %H:%M")}')
+            body.insert_paragraph_before('')  # Línea en blanco
             
             # Resumen ejecutivo
             resumen = acta_data.get("resumen_ejecutivo", {})
             if resumen:
-                doc.add_heading('RESUMEN EJECUTIVO', level=1)
+                body.insert_paragraph_before('RESUMEN EJECUTIVO', style='Heading 1')
                 
                 objetivo = resumen.get("objetivo", "No especificado")
-                doc.add_paragraph(f'🎯 Objetivo: {objetivo}')
+                body.insert_paragraph_before(f'🎯 Objetivo: {objetivo}')
                 
                 acuerdos = resumen.get("acuerdos", "No especificados")
-                doc.add_paragraph(f'🤝 Acuerdos: {acuerdos}')
+                body.insert_paragraph_before(f'🤝 Acuerdos: {acuerdos}')
                 
                 proximos_pasos = resumen.get("proximos_pasos", "No especificados")
-                doc.add_paragraph(f'📅 Próximos Pasos: {proximos_pasos}')
+                body.insert_paragraph_before(f'📅 Próximos Pasos: {proximos_pasos}')
                 
-                doc.add_paragraph('')  # Línea en blanco
+                body.insert_paragraph_before('')  # Línea en blanco
             
             # Acta completa
             acta_completa = acta_data.get("acta", "")
             if acta_completa:
-                doc.add_heading('ACTA COMPLETA', level=1)
+                body.insert_paragraph_before('ACTA COMPLETA', style='Heading 1')
                 
                 # Procesar el texto del acta (convertir markdown básico a formato Word)
-                self._add_formatted_text(doc, acta_completa)
-            
-            # Agregar branding discreto al final del documento
-            doc.add_paragraph('')  # Línea en blanco
-            doc.add_paragraph('')  # Línea en blanco
-            
-            # Branding discreto y profesional
-            branding_paragraph = doc.add_paragraph()
-            branding_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            branding_run = branding_paragraph.add_run('Generado por VoxCliente – Actas profesionales al instante con IA')
-            branding_run.font.size = Inches(0.1)  # Tamaño pequeño
-            branding_run.font.color.rgb = None  # Color gris por defecto
+                self._add_formatted_text(body, acta_completa)
             
-            # Crear archivo temporal
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.docx')
-            temp_path = temp_file.name
-            temp_file.close()
+            # Guardar documento en memoria
+            buffer = io.BytesIO()
+            doc.save(buffer)
             
-            # Guardar documento
-            doc.save(temp_path)
-            
-            return temp_path
+            return buffer.getvalue()
             
         except Exception as e:
             print(f"Error generando documento Word: {e}")
             return None
     
-    def _add_formatted_text(self, doc: Document, text: str):
-        """Agregar texto formateado al documento Word."""
-        lines = text.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                doc.add_paragraph('')
+    def _add_formatted_text(self, body: Paragraph, text: str):
+        """Agregar texto formateado al documento Word, antes del párrafo `body`."""
+        for block in tokenize(text):
+            if block.kind == "blank":
+                body.insert_paragraph_before('')
                 continue
             
-            # Detectar títulos (líneas que empiezan con números y **)
-            if re.match(r'^\d+\.\s*\*\*.*\*\*', line):
-                # Es un título principal
-                title_text = re.sub(r'^\d+\.\s*\*\*(.*)\*\*', r'\1', line)
-                doc.add_heading(title_text, level=2)
-            elif line.startswith('**') and line.endswith('**'):
-                # Es un subtítulo
-                title_text = line[2:-2]
-                doc.add_heading(title_text, level=3)
-            elif line.startswith('- '):
-                # Es un elemento de lista
-                item_text = line[2:]
-                p = doc.add_paragraph(item_text, style='List Bullet')
+            if block.kind == "heading":
+                style = f'Heading {block.level}'
+            elif block.kind == "bullet":
+                style = BULLET_STYLES[block.level]
+            elif block.kind == "number":
+                style = NUMBER_STYLES[block.level]
+            else:
+                style = None
+            
+            # Caso común: texto sin formato en línea
+            if len(block.runs) == 1 and not block.runs[0][1] and not block.runs[0][2]:
+                paragraph = body.insert_paragraph_before(block.runs[0][0])
             else:
-                # Es texto normal
-                doc.add_paragraph(line)
+                paragraph = body.insert_paragraph_before()
+                for run_text, bold, italic in block.runs:
+                    run = paragraph.add_run(run_text)
+                    if bold:
+                        run.bold = True
+                    if italic:
+                        run.italic = True
+            
+            if style:
+                # Asignar el ID del estilo directamente: buscarlo por nombre recorre todos los estilos
+                paragraph._p.style = self._style_id(body, style)
+    
+    def _style_id(self, paragraph: Paragraph, style_name: str) -> str:
+        """ID del estilo por nombre (igual en todas las copias de la plantilla base)."""
+        style_id = self._style_ids.get(style_name)
+        if style_id is None:
+            style_id = paragraph.part.styles[style_name].style_id
+            self._style_ids[style_name] = style_id
+        return style_id
     
-    def _generate_transcript_document(self, transcript: str, filename: str) -> Optional[str]:
+    def _generate_transcript_document(self, transcript: str, filename: str) -> Optional[bytes]:
         """
         Generar documento Word con transcripción completa de Assembly.
         
@@ -277,112 +402,134 @@ class ResendEmailService:
             filename: Nombre del archivo original
             
         Returns:
-            Ruta del archivo Word generado o None si hay error
+            Contenido del archivo Word generado o None si hay error
         """
         try:
-            # Crear documento Word
-            doc = Document()
-            
-            # Configurar márgenes estándar
-            self._configure_document_margins(doc)
-            
-            # Título principal
-            title = doc.add_heading('TRANSCRIPCIÓN COMPLETA', 0)
-            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            # Crear documento Word desde la plantilla con título y branding
+            doc, body = self._new_document('TRANSCRIPCIÓN COMPLETA')
             
             # Información del archivo
-            doc.add_paragraph(f'Archivo procesado: {filename}')
-            doc.add_paragraph(f'Fecha de generación: {datetime.now().strftime("%d/%m/%Y a las %H:%M")}')
-            doc.add_paragraph('')  # Línea en blanco
+            body.insert_paragraph_before(f'Archivo procesado: {filename}')
+            body.insert_paragraph_before(f'Fecha de generación: {datetime.now().strftime("%d/%m/%Y a las %H:%M")}')
+            body.insert_paragraph_before('')  # Línea en blanco
             
             # Nota sobre el contenido
-            doc.add_paragraph('Esta transcripción contiene el texto completo tal como fue procesado por AssemblyAI, incluyendo la identificación de hablantes.')
-            doc.add_paragraph('')  # Línea en blanco
+            body.insert_paragraph_before('Esta transcripción contiene el texto completo tal como fue procesado por AssemblyAI, incluyendo la identificación de hablantes.')
+            body.insert_paragraph_before('')  # Línea en blanco
             
             # Transcripción completa (formato crudo)
-            doc.add_heading('TRANSCRIPCIÓN', level=1)
+            body.insert_paragraph_before('TRANSCRIPCIÓN', style='Heading 1')
+            
+            # Transcripciones largas: escribir las líneas directo al zip sin crear un párrafo por línea
+            if len(transcript) > settings.docx_streaming_threshold_kb * 1024:
+                body.insert_paragraph_before(TRANSCRIPT_MARKER)
+                template = io.BytesIO()
+                doc.save(template)
+                return stream_document(
+                    template.getvalue(), TRANSCRIPT_MARKER,
+                    (line.strip() for line in iter_lines(transcript))
+                )
             
             # Agregar transcripción línea por línea manteniendo formato original
             lines = transcript.split('\n')
             for line in lines:
                 if line.strip():  # Solo agregar líneas no vacías
-                    doc.add_paragraph(line.strip())
+                    body.insert_paragraph_before(line.strip())
                 else:
-                    doc.add_paragraph('')  # Mantener saltos de línea
-            
-            # Agregar branding discreto al final del documento de transcripción
-            doc.add_paragraph('')  # Línea en blanco
-            doc.add_paragraph('')  # Línea en blanco
-            
-            # Branding discreto y profesional
-            branding_paragraph = doc.add_paragraph()
-            branding_paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            branding_run = branding_paragraph.add_run('Generado por VoxCliente – Actas profesionales al instante con IA')
-            branding_run.font.size = Inches(0.1)  # Tamaño pequeño
-            branding_run.font.color.rgb = None  # Color gris por defecto
+                    body.insert_paragraph_before('')  # Mantener saltos de línea
             
-            # Crear archivo temporal
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.docx')
-            temp_path = temp_file.name
-            temp_file.close()
+            # Guardar documento en memoria
+            buffer = io.BytesIO()
+            doc.save(buffer)
             
-            # Guardar documento
-            doc.save(temp_path)
-            
-            return temp_path
+            return buffer.getvalue()
             
         except Exception as e:
             print(f"Error generando documento de transcripción: {e}")
             return None
 
-    def generate_download_files(self, acta_data: Dict[str, Any], transcript: str, filename: str) -> Dict[str, str]:
+    def start_render_pool(self) -> None:
         """
-        Generar archivos Word para descarga y retornar IDs únicos.
+        Iniciar procesos de render si `render_processes` > 0.
+        
+        Cada proceso importa python-docx y construye las plantillas base al
+        arrancar, así el primer documento no paga ese costo. Sin procesos,
+        el render corre en threads del event loop.
+        """
+        if settings.render_processes <= 0 or self._render_pool:
+            return
+        
+        self._render_pool = ProcessPoolExecutor(
+            max_workers=settings.render_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_render_worker
+        )
+        self._render_slots = asyncio.Semaphore(settings.render_queue_size)
+        
+        # Forzar el arranque de todos los procesos ahora y no con el primer pedido
+        for _ in range(settings.render_processes):
+            self._render_pool.submit(time.sleep, 0.1)
+        logger.info(f"Render de documentos en {settings.render_processes} procesos")
+    
+    def stop_render_pool(self) -> None:
+        """Detener procesos de render."""
+        if self._render_pool:
+            self._render_pool.shutdown(wait=False, cancel_futures=True)
+            self._render_pool = None
+    
+    async def _render(self, func: Callable[..., Optional[bytes]], *args) -> Optional[bytes]:
+        """
+        Ejecutar función de render en el pool de procesos o en un thread.
+        
+        Con pool, como máximo `render_queue_size` documentos esperan o se
+        generan a la vez; el resto espera sin bloquear el event loop.
+        """
+        if not self._render_pool:
+            return await asyncio.to_thread(func, *args)
+        
+        async with self._render_slots:
+            return await asyncio.wrap_future(self._render_pool.submit(func, *args))
+    
+    async def render_acta_document(self, acta_data: Dict[str, Any], filename: str) -> bytes:
+        """
+        Generar archivo Word del acta fuera del event loop.
         
-        Args:
-            acta_data: Diccionario con resumen_ejecutivo y acta completa
-            transcript: Transcripción completa de Assembly
-            filename: Nombre del archivo original
-            
         Returns:
-            Diccionario con IDs de archivos generados
+            Contenido del archivo generado
         """
-        try:
-            # Generar archivo Word del acta
-            acta_file_path = self._generate_word_document(acta_data, filename)
-            if not acta_file_path:
-                raise Exception("Error generando archivo Word del acta")
-            
-            # Guardar acta en sistema de archivos temporales
-            acta_id = file_manager.save_file(acta_file_path, "acta", filename)
-            
-            # Generar archivo Word de la transcripción
-            transcript_file_path = self._generate_transcript_document(transcript, filename)
-            if not transcript_file_path:
-                raise Exception("Error generando archivo Word de la transcripción")
-            
-            # Guardar transcripción en sistema de archivos temporales
-            transcript_id = file_manager.save_file(transcript_file_path, "transcript", filename)
-            
-            # Limpiar archivos temporales originales
-            self._cleanup_temp_files([acta_file_path, transcript_file_path])
-            
-            print(f"Archivos de descarga generados - Acta: {acta_id}, Transcript: {transcript_id}")
-            
-            return {
-                "acta_id": acta_id,
-                "transcript_id": transcript_id
-            }
-            
-        except Exception as e:
-            print(f"Error generando archivos de descarga: {e}")
-            # Limpiar archivos temporales en caso de error
-            if 'acta_file_path' in locals():
-                self._cleanup_temp_files([acta_file_path])
-            if 'transcript_file_path' in locals():
-                self._cleanup_temp_files([transcript_file_path])
-            raise
+        acta_document = await self._render(_render_acta, acta_data, filename)
+        if not acta_document:
+            raise Exception("Error generando archivo Word del acta")
+        return acta_document
+    
+    async def render_transcript_document(self, transcript: str, filename: str) -> bytes:
+        """
+        Generar archivo Word de la transcripción fuera del event loop.
+        
+        Returns:
+            Contenido del archivo generado
+        """
+        transcript_document = await self._render(_render_transcript, transcript, filename)
+        if not transcript_document:
+            raise Exception("Error generando archivo Word de la transcripción")
+        return transcript_document
 
 
 # Instancia global del servicio
 resend_email_service = ResendEmailService()
+
+
+# Funciones de render a nivel de módulo para poder enviarlas a otros procesos;
+# en cada proceso usan su propia instancia del servicio.
+def _render_acta(acta_data: Dict[str, Any], filename: str) -> Optional[bytes]:
+    return resend_email_service._generate_word_document(acta_data, filename)
+
+
+def _render_transcript(transcript: str, filename: str) -> Optional[bytes]:
+    return resend_email_service._generate_transcript_document(transcript, filename)
+
+
+def _warm_render_worker() -> None:
+    """Construir plantillas base al iniciar un proceso de render."""
+    resend_email_service._new_document('ACTA DE REUNIÓN')
+    resend_email_service._new_document('TRANSCRIPCIÓN COMPLETA')
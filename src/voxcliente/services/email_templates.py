@@ -0,0 +1,121 @@
+"""Plantillas HTML de email compiladas una sola vez y renderizadas con escape."""
+
+import re
+import logging
+import threading
+from html import escape
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from voxcliente.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Variables de plantilla: {{ nombre }}
+VARIABLE_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+
+class SafeHtml(str):
+    """HTML ya escapado (p. ej. otra plantilla renderizada) que se inserta tal cual."""
+
+
+class CompiledTemplate:
+    """
+    Plantilla partida en texto fijo y variables.
+
+    El render recorre las partes una sola vez y une el resultado con un
+    único `join`, en vez de recorrer el documento completo por cada
+    variable. Los valores se escapan como HTML salvo los `SafeHtml`; las
+    variables sin valor quedan vacías.
+    """
+
+    def __init__(self, source: str, name: str = "<string>"):
+        """Compilar plantilla."""
+        self.name = name
+        parts = VARIABLE_PATTERN.split(source)
+        # Partes pares: texto fijo; impares: nombres de variables
+        self._parts: List[str] = parts
+        self.variables = frozenset(parts[1::2])
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """Renderizar plantilla con los valores dados."""
+        parts = self._parts[:]
+        for index in range(1, len(parts), 2):
+            value = values.get(parts[index], "")
+            parts[index] = value if isinstance(value, SafeHtml) else escape(str(value))
+        return "".join(parts)
+
+
+class TemplateEngine:
+    """
+    Plantillas de email por nombre e idioma.
+
+    `templates/<locale>/<nombre>.html` tiene prioridad sobre
+    `templates/<nombre>.html`, que es la versión por defecto (español).
+    Cada archivo se lee y compila la primera vez que se usa; en modo debug
+    se vuelve a compilar si cambió en disco, para editar plantillas sin
+    reiniciar.
+    """
+
+    def __init__(self, root: Path = TEMPLATES_DIR, auto_reload: Optional[bool] = None):
+        """Inicializar motor sobre el directorio `root`."""
+        self.root = root
+        self.auto_reload = settings.debug if auto_reload is None else auto_reload
+
+        # Plantillas compiladas: {(nombre, idioma): (ruta, mtime, plantilla)}
+        self._templates: Dict[Tuple[str, str], Tuple[Path, float, CompiledTemplate]] = {}
+        self._lock = threading.Lock()
+
+    def _resolve(self, name: str, locale: str) -> Path:
+        """Archivo de la plantilla para el idioma, o la versión por defecto."""
+        localized = self.root / locale / f"{name}.html"
+        if localized.is_file():
+            return localized
+        return self.root / f"{name}.html"
+
+    def _compile(self, name: str, locale: str) -> Tuple[Path, float, CompiledTemplate]:
+        path = self._resolve(name, locale)
+        template = CompiledTemplate(path.read_text(encoding="utf-8"), path.name)
+        logger.info(f"Plantilla de email compilada: {path.relative_to(self.root)}")
+        return path, path.stat().st_mtime, template
+
+    def get(self, name: str, locale: Optional[str] = None) -> CompiledTemplate:
+        """
+        Obtener plantilla compilada.
+
+        Args:
+            name: Nombre del archivo sin extensión
+            locale: Idioma (por defecto `email_locale`)
+
+        Returns:
+            Plantilla compilada
+
+        Raises:
+            FileNotFoundError: Si la plantilla no existe
+        """
+        key = (name, locale or settings.email_locale)
+        cached = self._templates.get(key)
+        if cached and not (self.auto_reload and self._changed(cached)):
+            return cached[2]
+
+        with self._lock:
+            cached = self._compile(*key)
+            self._templates[key] = cached
+        return cached[2]
+
+    @staticmethod
+    def _changed(cached: Tuple[Path, float, CompiledTemplate]) -> bool:
+        try:
+            return cached[0].stat().st_mtime != cached[1]
+        except FileNotFoundError:
+            return True
+
+    def render(self, name: str, values: Dict[str, Any], locale: Optional[str] = None) -> SafeHtml:
+        """Renderizar plantilla por nombre (el resultado se puede anidar en otra)."""
+        return SafeHtml(self.get(name, locale).render(values))
+
+
+# Instancia global del motor de plantillas
+email_templates = TemplateEngine()
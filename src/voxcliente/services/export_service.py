@@ -0,0 +1,375 @@
+"""Exportación de actas y transcripciones a distintos formatos, bajo demanda."""
+
+import json
+import time
+import asyncio
+import logging
+import zipfile
+from datetime import datetime, timedelta
+from html import escape
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from voxcliente.services.acta_markdown import Run, tokenize
+from voxcliente.services.download_tokens import sign_bundle, sign_download
+from voxcliente.services.email_service import resend_email_service
+from voxcliente.services.file_manager import file_manager
+
+logger = logging.getLogger(__name__)
+
+# Formatos de descarga disponibles y su tipo MIME
+EXPORT_FORMATS = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "md": "text/markdown; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+    "txt": "text/plain; charset=utf-8",
+}
+
+HTML_PAGE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Arial, sans-serif; max-width: 800px; margin: 40px auto; line-height: 1.5; color: #2c3e50; }}
+.nivel-1 {{ margin-left: 1.5em; }}
+.nivel-2 {{ margin-left: 3em; }}
+.branding {{ text-align: center; color: #888; font-size: 12px; margin-top: 40px; }}
+</style>
+</head>
+<body>
+{body}
+<p class="branding">Generado por VoxCliente – Actas profesionales al instante con IA</p>
+</body>
+</html>
+"""
+
+
+def _generated_at() -> str:
+    return datetime.now().strftime("%d/%m/%Y a las %H:%M")
+
+
+def _resumen_items(acta_data: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Filas del resumen ejecutivo con los mismos textos que el documento Word."""
+    resumen = acta_data.get("resumen_ejecutivo") or {}
+    if not resumen:
+        return []
+    return [
+        ("Objetivo", resumen.get("objetivo", "No especificado")),
+        ("Acuerdos", resumen.get("acuerdos", "No especificados")),
+        ("Próximos Pasos", resumen.get("proximos_pasos", "No especificados")),
+    ]
+
+
+def acta_to_markdown(acta_data: Dict[str, Any], filename: str) -> str:
+    """Acta en Markdown (el campo `acta` ya viene en Markdown del LLM)."""
+    lines = [
+        "# ACTA DE REUNIÓN",
+        "",
+        f"Archivo procesado: {filename}  ",
+        f"Fecha de generación: {_generated_at()}",
+        "",
+    ]
+    resumen = _resumen_items(acta_data)
+    if resumen:
+        lines += ["## RESUMEN EJECUTIVO", ""]
+        lines += [f"- **{label}:** {value}" for label, value in resumen]
+        lines.append("")
+    if acta_data.get("acta"):
+        lines += ["## ACTA COMPLETA", "", acta_data["acta"]]
+    return "\n".join(lines) + "\n"
+
+
+def _runs_text(runs: List[Run]) -> str:
+    return "".join(text for text, _, _ in runs)
+
+
+def acta_to_text(acta_data: Dict[str, Any], filename: str) -> str:
+    """Acta en texto plano, sin marcas de Markdown."""
+    lines = [
+        "ACTA DE REUNIÓN",
+        "",
+        f"Archivo procesado: {filename}",
+        f"Fecha de generación: {_generated_at()}",
+        "",
+    ]
+    resumen = _resumen_items(acta_data)
+    if resumen:
+        lines += ["RESUMEN EJECUTIVO", ""]
+        lines += [f"{label}: {value}" for label, value in resumen]
+        lines.append("")
+    if acta_data.get("acta"):
+        lines += ["ACTA COMPLETA", ""]
+        for block in tokenize(acta_data["acta"]):
+            indent = "  " * block.level if block.kind in ("bullet", "number") else ""
+            bullet = "• " if block.kind == "bullet" else ""
+            lines.append(f"{indent}{bullet}{_runs_text(block.runs)}")
+    return "\n".join(lines) + "\n"
+
+
+def _runs_html(runs: List[Run]) -> str:
+    parts = []
+    for text, bold, italic in runs:
+        html = escape(text)
+        if bold:
+            html = f"<strong>{html}</strong>"
+        if italic:
+            html = f"<em>{html}</em>"
+        parts.append(html)
+    return "".join(parts)
+
+
+def acta_to_html(acta_data: Dict[str, Any], filename: str) -> str:
+    """Acta como página HTML; todo el texto del LLM se escapa."""
+    body = [
+        "<h1>ACTA DE REUNIÓN</h1>",
+        f"<p>Archivo procesado: {escape(filename)}<br>Fecha de generación: {_generated_at()}</p>",
+    ]
+    resumen = _resumen_items(acta_data)
+    if resumen:
+        body.append("<h2>RESUMEN EJECUTIVO</h2>")
+        body += [f"<p><strong>{label}:</strong> {escape(str(value))}</p>" for label, value in resumen]
+    if acta_data.get("acta"):
+        body.append("<h2>ACTA COMPLETA</h2>")
+        for block in tokenize(acta_data["acta"]):
+            if block.kind == "blank":
+                continue
+            if block.kind == "heading":
+                body.append(f"<h{block.level + 1}>{_runs_html(block.runs)}</h{block.level + 1}>")
+            elif block.kind == "bullet":
+                body.append(f'<p class="nivel-{block.level}">• {_runs_html(block.runs)}</p>')
+            elif block.kind == "number":
+                body.append(f'<p class="nivel-{block.level}">{_runs_html(block.runs)}</p>')
+            else:
+                body.append(f"<p>{_runs_html(block.runs)}</p>")
+    return HTML_PAGE.format(title=escape(f"Acta de Reunión - {filename}"), body="\n".join(body))
+
+
+def transcript_to_markdown(transcript: str, filename: str) -> str:
+    """Transcripción en Markdown, un párrafo por intervención."""
+    lines = [line.strip() for line in transcript.split("\n") if line.strip()]
+    return "\n\n".join([
+        "# TRANSCRIPCIÓN COMPLETA",
+        f"Archivo procesado: {filename}  \nFecha de generación: {_generated_at()}",
+        "## TRANSCRIPCIÓN",
+        *lines,
+    ]) + "\n"
+
+
+def transcript_to_text(transcript: str, filename: str) -> str:
+    """Transcripción en texto plano tal como la entregó AssemblyAI."""
+    return "\n".join([
+        "TRANSCRIPCIÓN COMPLETA",
+        "",
+        f"Archivo procesado: {filename}",
+        f"Fecha de generación: {_generated_at()}",
+        "",
+        transcript,
+    ]) + "\n"
+
+
+def transcript_to_html(transcript: str, filename: str) -> str:
+    """Transcripción como página HTML."""
+    body = [
+        "<h1>TRANSCRIPCIÓN COMPLETA</h1>",
+        f"<p>Archivo procesado: {escape(filename)}<br>Fecha de generación: {_generated_at()}</p>",
+        "<h2>TRANSCRIPCIÓN</h2>",
+    ]
+    body += [f"<p>{escape(line.strip())}</p>" for line in transcript.split("\n") if line.strip()]
+    return HTML_PAGE.format(title=escape(f"Transcripción - {filename}"), body="\n".join(body))
+
+
+class _ZipSink:
+    """Destino sin seek para zipfile: acumula lo escrito hasta que se entrega al cliente."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# Renderers de texto por (tipo de archivo, formato); reciben el dato de origen y el nombre
+TEXT_RENDERERS: Dict[Tuple[str, str], Callable[[Any, str], str]] = {
+    ("acta", "md"): acta_to_markdown,
+    ("acta", "txt"): acta_to_text,
+    ("acta", "html"): acta_to_html,
+    ("transcript", "md"): transcript_to_markdown,
+    ("transcript", "txt"): transcript_to_text,
+    ("transcript", "html"): transcript_to_html,
+}
+
+
+class ExportService:
+    """
+    Registro de actas/transcripciones y render de descargas al primer pedido.
+
+    Al terminar el pipeline solo se guardan los datos de origen. Cada
+    formato se genera la primera vez que se descarga y queda en la caché
+    de artefactos de `file_manager`; los Word generados para el email se
+    agregan a esa caché directamente. Las descargas usan enlaces firmados,
+    así que servirlas no requiere consultar el registro.
+    """
+
+    def __init__(self):
+        """Inicializar servicio."""
+        # Renders en curso, para que pedidos simultáneos del mismo artefacto no lo generen dos veces
+        self._rendering: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def register(self, acta_data: Dict[str, Any], transcript: str, filename: str,
+                       acta_document: Optional[bytes] = None,
+                       transcript_document: Optional[bytes] = None,
+                       lifetime_hours: Optional[float] = None) -> Dict[str, str]:
+        """
+        Registrar acta y transcripción para descarga.
+
+        Args:
+            acta_data: Diccionario con resumen_ejecutivo y acta completa
+            transcript: Transcripción completa de Assembly
+            filename: Nombre del archivo original
+            acta_document: Word del acta si ya se generó
+            transcript_document: Word de la transcripción si ya se generó
+            lifetime_hours: Vigencia de archivos y enlaces (por defecto `file_lifetime_hours`)
+
+        Returns:
+            Diccionario con IDs, tokens de descarga y vencimiento de los archivos registrados
+        """
+        acta_source = json.dumps({"acta": acta_data, "filename": filename}, ensure_ascii=False).encode("utf-8")
+        transcript_source = json.dumps({"transcript": transcript, "filename": filename}, ensure_ascii=False).encode("utf-8")
+
+        acta_id, transcript_id = await asyncio.gather(
+            file_manager.save_bytes(acta_source, "acta", filename, "json", lifetime_hours),
+            file_manager.save_bytes(transcript_source, "transcript", filename, "json", lifetime_hours)
+        )
+
+        # Reutilizar los Word ya generados para el email; con poco espacio en disco
+        # no se guardan y se generan de nuevo si se descargan
+        low_on_space = file_manager.low_on_space()
+        if acta_document and not low_on_space:
+            await file_manager.save_artifact(acta_id, "acta", "docx", acta_document)
+        if transcript_document and not low_on_space:
+            await file_manager.save_artifact(transcript_id, "transcript", "docx", transcript_document)
+
+        expires_at = datetime.now() + timedelta(hours=lifetime_hours or file_manager.file_lifetime_hours)
+        acta_key = file_manager.storage_key(acta_id, "acta")
+        transcript_key = file_manager.storage_key(transcript_id, "transcript")
+
+        logger.info(f"Descargas registradas - Acta: {acta_id}, Transcript: {transcript_id}")
+        return {
+            "acta_id": acta_id,
+            "transcript_id": transcript_id,
+            "acta_token": sign_download(acta_key, "acta", expires_at),
+            "transcript_token": sign_download(transcript_key, "transcript", expires_at),
+            "bundle_token": sign_bundle([acta_key, transcript_key], expires_at),
+            "expires_at": expires_at.isoformat(timespec="seconds")
+        }
+
+    async def get_export(self, file_id: str, file_type: str, file_format: str) -> Optional[str]:
+        """
+        Obtener ruta del archivo en el formato pedido, generándolo si hace falta.
+
+        Args:
+            file_id: ID del archivo registrado
+            file_type: Tipo de archivo ('acta' o 'transcript')
+            file_format: Formato de EXPORT_FORMATS
+
+        Returns:
+            Clave de almacenamiento del archivo o None si los datos de origen ya no existen
+        """
+        artifact_key = await file_manager.get_artifact_key(file_id, file_type, file_format)
+        if artifact_key:
+            return artifact_key
+
+        key = (file_id, file_format)
+        task = self._rendering.get(key)
+        if task is None:
+            task = asyncio.create_task(self._render(file_id, file_type, file_format))
+            self._rendering[key] = task
+            task.add_done_callback(lambda _: self._rendering.pop(key, None))
+
+        return await asyncio.shield(task)
+
+    async def bundle(self, files: List[Tuple[str, str]], formats: List[str]) -> Optional[AsyncIterator[bytes]]:
+        """
+        Preparar ZIP con los archivos en los formatos pedidos.
+
+        Los formatos que falten se generan antes de empezar, para que un
+        archivo vencido dé 404 y no un ZIP cortado. El ZIP se arma mientras
+        se envía, leyendo cada archivo por bloques: no se escribe en disco
+        y la memoria usada no depende del tamaño de los documentos.
+
+        Args:
+            files: Pares (file_id, file_type) a incluir
+            formats: Formatos de EXPORT_FORMATS
+
+        Returns:
+            Iterador de bloques del ZIP, o None si algún archivo ya no existe
+        """
+        members = [(file_id, file_type, file_format) for file_id, file_type in files for file_format in formats]
+        keys = await asyncio.gather(*(self.get_export(*member) for member in members))
+        if not all(keys):
+            return None
+        return self._stream_bundle(members)
+
+    async def _stream_bundle(self, members: List[Tuple[str, str, str]]) -> AsyncIterator[bytes]:
+        """Escribir el ZIP por bloques; los .docx ya vienen comprimidos y se guardan sin recomprimir."""
+        sink = _ZipSink()
+        with zipfile.ZipFile(sink, "w") as archive:
+            for file_id, file_type, file_format in members:
+                # La caché pudo descartar el artefacto desde que se preparó el ZIP
+                key = await self.get_export(file_id, file_type, file_format)
+                if not key:
+                    logger.warning(f"Archivo no disponible para el ZIP: {file_id}.{file_format}")
+                    continue
+
+                info = zipfile.ZipInfo(f"{file_type}.{file_format}", time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_STORED if file_format == "docx" else zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                with archive.open(info, "w") as member:
+                    async for chunk in file_manager.storage.stream(key):
+                        member.write(chunk)
+                        if data := sink.drain():
+                            yield data
+                if data := sink.drain():
+                    yield data
+        # Directorio central, escrito al cerrar el ZIP
+        yield sink.drain()
+
+    async def _render(self, file_id: str, file_type: str, file_format: str) -> Optional[str]:
+        """Generar artefacto a partir de los datos de origen y guardarlo en caché."""
+        source_content = await file_manager.get_source(file_id, file_type)
+        if source_content is None:
+            return None
+
+        source = json.loads(source_content)
+        filename = source["filename"]
+        data = source[file_type]
+
+        if file_format == "docx":
+            if file_type == "acta":
+                content = await resend_email_service.render_acta_document(data, filename)
+            else:
+                content = await resend_email_service.render_transcript_document(data, filename)
+        else:
+            text = await asyncio.to_thread(TEXT_RENDERERS[(file_type, file_format)], data, filename)
+            content = text.encode("utf-8")
+
+        logger.info(f"Artefacto generado bajo demanda: {file_id}.{file_format}")
+        return await file_manager.save_artifact(file_id, file_type, file_format, content)
+
+
+# Instancia global del servicio
+export_service = ExportService()
@@ -4,16 +4,37 @@ import os
 import uuid
 import time
 import shutil
+import hashlib
+import asyncio
+import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 import logging
 
+from voxcliente.config import settings
+from voxcliente.services.cache import TTLCache
+from voxcliente.services.file_registry import create_file_registry
+from voxcliente.services.storage_backend import create_storage_backend
+
 logger = logging.getLogger(__name__)
 
 
 class FileManager:
-    """Gestor de archivos temporales para descarga."""
+    """
+    Gestor de archivos temporales para descarga.
+    
+    El registro de archivos vive en un backend compartido (SQLite o
+    PostgreSQL), así que cualquier worker puede servir un archivo generado
+    por otro. El contenido se guarda en un backend de almacenamiento
+    (directorio local o bucket S3) bajo claves derivadas del ID.
+    
+    El almacén tiene una cuota de bytes (`file_store_max_mb`) calculada con
+    los totales que mantiene el registro, y los nuevos audios se rechazan
+    si el disco de uploads o descargas se está quedando sin espacio.
+    """
     
     def __init__(self):
         """Inicializar gestor de archivos."""
@@ -24,12 +45,31 @@ class FileManager:
         # Crear directorios si no existen
         self._ensure_directories()
         
-        # Registro de archivos: {file_id: {path, created_at, file_type}}
-        self.file_registry: Dict[str, Dict] = {}
+        # Registro de archivos: {file_id: {path, created_at, expires_at, file_type, artifacts}}
+        self.registry = create_file_registry(settings.file_registry_backend)
+        
+        # Contenido de los archivos, por clave de almacenamiento ('actas/<id>.<ext>')
+        self.storage = create_storage_backend(settings.storage_backend, self.temp_dir)
+        
+        # Artefactos renderizados por este proceso, de menos a más recientemente usado:
+        # {clave: tamaño en bytes}
+        self._artifacts: "OrderedDict[str, int]" = OrderedDict()
+        self._artifact_bytes = 0
+        self._artifacts_lock = threading.Lock()
+        self._quota_lock = asyncio.Lock()
         
         # Tiempo de vida de archivos (1 hora)
         self.file_lifetime_hours = 1
         
+        # ETag de archivos servidos: {ruta: (mtime_ns, tamaño, etag)}
+        self._etags = TTLCache(max_entries=4096, ttl_seconds=self.file_lifetime_hours * 3600)
+        
+        # Archivos en disco sin registro y con más de esta antigüedad se consideran huérfanos
+        self.orphan_grace_seconds = 300
+        
+        # Tarea de limpieza en segundo plano
+        self._janitor_task: Optional[asyncio.Task] = None
+        
         logger.info(f"FileManager inicializado. Directorio temporal: {self.temp_dir}")
     
     def _ensure_directories(self) -> None:
@@ -47,7 +87,7 @@ class FileManager:
         """Generar ID único para archivo."""
         return str(uuid.uuid4())
     
-    def save_file(self, source_file_path: str, file_type: str, original_filename: str) -> str:
+    async def save_file(self, source_file_path: str, file_type: str, original_filename: str) -> str:
         """
         Guardar archivo temporalmente y registrar para descarga.
         
@@ -60,63 +100,316 @@ class FileManager:
             ID único del archivo guardado
         """
         try:
-            file_id = self.generate_file_id()
-            
-            # Determinar directorio destino
-            if file_type == "acta":
-                dest_dir = self.actas_dir
-            elif file_type == "transcript":
-                dest_dir = self.transcripts_dir
-            else:
-                raise ValueError(f"Tipo de archivo no válido: {file_type}")
-            
-            # Crear archivo destino
-            dest_file_path = dest_dir / f"{file_id}.docx"
+            content = await asyncio.to_thread(Path(source_file_path).read_bytes)
+        except Exception as e:
+            logger.error(f"Error leyendo archivo {file_type}: {e}")
+            raise
+        
+        return await self.save_bytes(content, file_type, original_filename)
+    
+    async def save_bytes(self, content: bytes, file_type: str, original_filename: str, extension: str = "docx",
+                         lifetime_hours: Optional[float] = None) -> str:
+        """
+        Guardar contenido ya generado en memoria y registrar para descarga.
+        
+        Args:
+            content: Contenido del archivo
+            file_type: Tipo de archivo ('acta' o 'transcript')
+            original_filename: Nombre del archivo original
+            extension: Extensión del archivo guardado
+            lifetime_hours: Tiempo de vida del archivo (por defecto `file_lifetime_hours`)
             
-            # Copiar archivo
-            shutil.copy2(source_file_path, dest_file_path)
+        Returns:
+            ID único del archivo guardado
+        """
+        try:
+            file_id = self.generate_file_id()
+            key = self.storage_key(file_id, file_type, extension)
             
-            # Registrar archivo
-            self.file_registry[file_id] = {
-                "path": str(dest_file_path),
-                "created_at": datetime.now(),
-                "file_type": file_type,
-                "original_filename": original_filename
-            }
+            await self.storage.put(key, content)
             
-            logger.info(f"Archivo guardado: {file_id} -> {dest_file_path}")
+            await self._register_file(file_id, key, file_type, original_filename, len(content), lifetime_hours)
+            await self.enforce_quota()
             return file_id
             
         except Exception as e:
             logger.error(f"Error guardando archivo {file_type}: {e}")
             raise
     
-    def get_file_path(self, file_id: str) -> Optional[Path]:
+    def storage_key(self, file_id: str, file_type: str, extension: str = "json") -> str:
+        """Clave de almacenamiento del archivo según su tipo (ruta relativa al directorio temporal)."""
+        if file_type == "acta":
+            dest_dir = self.actas_dir
+        elif file_type == "transcript":
+            dest_dir = self.transcripts_dir
+        else:
+            raise ValueError(f"Tipo de archivo no válido: {file_type}")
+        
+        return f"{dest_dir.name}/{file_id}.{extension}"
+    
+    def parse_storage_key(self, storage_key: str) -> Optional[Tuple[str, str]]:
+        """(file_id, file_type) de una clave de `storage_key`, o None si no tiene esa forma."""
+        directory, _, name = storage_key.partition("/")
+        file_type = {self.actas_dir.name: "acta", self.transcripts_dir.name: "transcript"}.get(directory)
+        file_id = name.split(".", 1)[0]
+        try:
+            uuid.UUID(file_id)
+        except ValueError:
+            return None
+        return (file_id, file_type) if file_type else None
+    
+    async def _register_file(self, file_id: str, key: str, file_type: str, original_filename: str, size_bytes: int,
+                             lifetime_hours: Optional[float] = None) -> None:
+        """Registrar archivo guardado para descarga."""
+        created_at = datetime.now()
+        lifetime_hours = lifetime_hours or self.file_lifetime_hours
+        await self.registry.add({
+            "file_id": file_id,
+            "file_type": file_type,
+            "original_filename": original_filename,
+            "path": key,
+            "size_bytes": size_bytes,
+            "created_at": created_at,
+            "expires_at": created_at + timedelta(hours=lifetime_hours)
+        })
+        
+        logger.info(f"Archivo guardado: {file_id} -> {key}")
+    
+    async def save_artifact(self, file_id: str, file_type: str, file_format: str, content: bytes) -> str:
         """
-        Obtener ruta del archivo por ID.
+        Guardar versión renderizada de un archivo.
+        
+        La clave se deriva del ID, así que cualquier worker la encuentra sin
+        consultar el registro. Los artefactos forman una caché con límite de
+        bytes (`artifact_cache_max_mb`): al superarlo se eliminan los usados
+        hace más tiempo, que se vuelven a generar si se piden de nuevo. Con
+        poco espacio en disco solo se conserva el último.
+        
+        Args:
+            file_id: ID del archivo de origen
+            file_type: Tipo de archivo ('acta' o 'transcript')
+            file_format: Formato del artefacto ('docx', 'md', 'html', 'txt')
+            content: Contenido renderizado
+            
+        Returns:
+            Clave de almacenamiento del artefacto
+        """
+        key = self.storage_key(file_id, file_type, file_format)
+        await self.storage.put(key, content)
+        
+        local_path = self.storage.local_path(key)
+        if local_path:
+            stat_result = await asyncio.to_thread(local_path.stat)
+            self._etags.set(str(local_path), (stat_result.st_mtime_ns, stat_result.st_size, self._content_etag(content)))
+        
+        # Si otro backend/worker no lo tiene registrado, la limpieza de huérfanos lo borra
+        await self.registry.set_artifact(file_id, file_format, key, len(content))
+        
+        max_bytes = 0 if self.low_on_space() else settings.artifact_cache_max_mb * 1024 * 1024
+        with self._artifacts_lock:
+            self._artifact_bytes += len(content) - self._artifacts.pop(key, 0)
+            self._artifacts[key] = len(content)
+            evicted = self._evict_artifacts(max_bytes)
+        
+        for evicted_key in evicted:
+            await self._delete_artifact_file(evicted_key)
+        
+        await self.enforce_quota()
+        return key
+    
+    async def record_download(self, file_id: str) -> None:
+        """Registrar descarga de un archivo (orden LRU de la cuota de bytes)."""
+        try:
+            await self.registry.touch(file_id, datetime.now())
+        except Exception as e:
+            logger.warning(f"No se pudo registrar la descarga de {file_id}: {e}")
+    
+    async def get_artifact_key(self, file_id: str, file_type: str, file_format: str) -> Optional[str]:
+        """Obtener clave de un artefacto ya renderizado, o None si hay que generarlo."""
+        key = self.storage_key(file_id, file_type, file_format)
+        exists = await self.storage.exists(key)
+        
+        with self._artifacts_lock:
+            if key in self._artifacts:
+                if exists:
+                    self._artifacts.move_to_end(key)
+                else:
+                    self._artifact_bytes -= self._artifacts.pop(key)
+        
+        return key if exists else None
+    
+    @staticmethod
+    def _content_etag(content: bytes) -> str:
+        """ETag fuerte: hash BLAKE2b de 128 bits del contenido."""
+        return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+    
+    @staticmethod
+    def _file_etag(path: Path) -> str:
+        """ETag fuerte de un archivo en disco, leyéndolo por bloques."""
+        with open(path, "rb") as file:
+            digest = hashlib.file_digest(file, lambda: hashlib.blake2b(digest_size=16))
+        return f'"{digest.hexdigest()}"'
+    
+    async def get_etag(self, path: Path, stat_result: os.stat_result) -> str:
+        """
+        ETag del contenido del archivo, calculado una vez por versión.
+        
+        Se reutiliza mientras no cambien mtime ni tamaño; los artefactos
+        generados en este proceso ya lo tienen calculado al guardarse.
+        """
+        key = str(path)
+        cached = self._etags.get(key)
+        if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+        
+        etag = await asyncio.to_thread(self._file_etag, path)
+        self._etags.set(key, (stat_result.st_mtime_ns, stat_result.st_size, etag))
+        return etag
+    
+    async def get_source(self, file_id: str, file_type: str) -> Optional[bytes]:
+        """Datos de origen (JSON) de un archivo, o None si ya no existen."""
+        return await self.storage.get(self.storage_key(file_id, file_type, "json"))
+    
+    def _evict_artifacts(self, max_bytes: int) -> List[str]:
+        """Sacar de la caché los artefactos menos usados hasta quedar bajo `max_bytes` (con el lock tomado)."""
+        evicted = []
+        # Nunca descartar el último artefacto agregado, aunque supere el límite por sí solo
+        while self._artifact_bytes > max_bytes and len(self._artifacts) > 1:
+            key, size = self._artifacts.popitem(last=False)
+            self._artifact_bytes -= size
+            evicted.append(key)
+        return evicted
+    
+    def _forget_artifact(self, key: str) -> None:
+        """Sacar un artefacto de la caché de este proceso, si está."""
+        with self._artifacts_lock:
+            size = self._artifacts.pop(key, None)
+            if size is not None:
+                self._artifact_bytes -= size
+    
+    async def _delete_artifact_file(self, key: str) -> None:
+        """Borrar artefacto del almacenamiento y su entrada en el registro."""
+        file_id, file_format = key.rsplit("/", 1)[-1].split(".", 1)
+        await self.registry.delete_artifact(file_id, file_format)
+        await self.storage.delete(key)
+    
+    async def _store_bytes(self) -> int:
+        """Bytes del almacén (datos de origen y artefactos) según los totales del registro."""
+        stats = await self.registry.stats()
+        return sum(totals["size_bytes"] for totals in stats.values())
+    
+    async def enforce_quota(self) -> int:
+        """
+        Mantener el almacén bajo la cuota de bytes (`file_store_max_mb`).
+        
+        El orden es LRU según `last_accessed` del registro, que se
+        actualiza en cada descarga, así que todos los workers eliminan en
+        el mismo orden. Primero descarta los artefactos de los archivos
+        descargados hace más tiempo, que se regeneran si se vuelven a
+        pedir; si no alcanza, elimina esos archivos con sus datos de origen.
+        
+        Returns:
+            Número de artefactos y archivos eliminados
+        """
+        # Una sola pasada a la vez; las demás verían los mismos totales
+        if self._quota_lock.locked():
+            return 0
+        
+        async with self._quota_lock:
+            max_bytes = settings.file_store_max_mb * 1024 * 1024
+            evicted = 0
+            try:
+                while await self._store_bytes() > max_bytes:
+                    least_used = await self.registry.least_recently_used(1, with_artifacts=True)
+                    if least_used:
+                        for key in least_used[0]["artifacts"].values():
+                            self._forget_artifact(key)
+                            await self._delete_artifact_file(key)
+                            evicted += 1
+                        continue
+                    
+                    # Sin artefactos que descartar: el archivo descargado hace más tiempo
+                    least_used = await self.registry.least_recently_used(1)
+                    if not least_used or not await self._remove_file(least_used[0]):
+                        break
+                    evicted += 1
+            except Exception as e:
+                logger.error(f"Error aplicando cuota de almacenamiento: {e}")
+            
+            if evicted:
+                logger.warning(f"Cuota de almacenamiento superada: {evicted} artefactos/archivos eliminados")
+            return evicted
+    
+    def _disk_paths(self) -> List[Path]:
+        """Volúmenes que usa el procesamiento: spool de uploads y, con almacenamiento local, descargas."""
+        spool_dir = Path(settings.spool_dir or tempfile.gettempdir())
+        paths = [spool_dir if spool_dir.is_dir() else Path(tempfile.gettempdir())]
+        if self.storage.local_path(self.actas_dir.name):
+            paths.append(self.temp_dir)
+        return paths
+    
+    def free_disk_bytes(self) -> int:
+        """Espacio libre del volumen más lleno entre los que usa el procesamiento."""
+        return min(shutil.disk_usage(path).free for path in self._disk_paths())
+    
+    def low_on_space(self) -> bool:
+        """Si el espacio libre está bajo `low_free_disk_mb` (no se guardan artefactos opcionales)."""
+        return self.free_disk_bytes() < settings.low_free_disk_mb * 1024 * 1024
+    
+    async def has_disk_space(self, incoming_bytes: int = 0) -> bool:
+        """
+        Verificar si hay espacio para aceptar un nuevo audio.
+        
+        Si el espacio libre, descontando el tamaño anunciado del upload,
+        queda bajo `min_free_disk_mb`, primero intenta liberar espacio
+        eliminando archivos vencidos y la caché de artefactos.
+        
+        Args:
+            incoming_bytes: Tamaño anunciado del audio (0 si se desconoce)
+            
+        Returns:
+            True si se puede aceptar el audio
+        """
+        min_free_bytes = settings.min_free_disk_mb * 1024 * 1024 + incoming_bytes
+        if self.free_disk_bytes() >= min_free_bytes:
+            return True
+        
+        await self.cleanup_old_files()
+        with self._artifacts_lock:
+            evicted = list(self._artifacts)
+            self._artifacts.clear()
+            self._artifact_bytes = 0
+        for key in evicted:
+            await self._delete_artifact_file(key)
+        
+        return self.free_disk_bytes() >= min_free_bytes
+    
+    async def get_file_path(self, file_id: str) -> Optional[Path]:
+        """
+        Obtener ruta local del archivo por ID.
         
         Args:
             file_id: ID único del archivo
             
         Returns:
-            Ruta del archivo o None si no existe
+            Ruta del archivo o None si no existe (o el almacenamiento no es local)
         """
-        if file_id not in self.file_registry:
+        file_info = await self.registry.get(file_id)
+        if not file_info:
             logger.warning(f"Archivo no encontrado en registro: {file_id}")
             return None
         
-        file_info = self.file_registry[file_id]
-        file_path = Path(file_info["path"])
+        file_path = self.storage.local_path(file_info["path"])
         
-        if not file_path.exists():
-            logger.warning(f"Archivo no existe en disco: {file_path}")
+        if not file_path or not await self.storage.exists(file_info["path"]):
+            logger.warning(f"Archivo no existe en almacenamiento: {file_info['path']}")
             # Limpiar registro
-            del self.file_registry[file_id]
+            await self.registry.delete(file_id)
             return None
         
         return file_path
     
-    def get_file_info(self, file_id: str) -> Optional[Dict]:
+    async def get_file_info(self, file_id: str) -> Optional[Dict]:
         """
         Obtener información del archivo por ID.
         
@@ -126,85 +419,153 @@ class FileManager:
         Returns:
             Información del archivo o None si no existe
         """
-        if file_id not in self.file_registry:
+        file_info = await self.registry.get(file_id)
+        if not file_info:
             return None
         
-        file_info = self.file_registry[file_id].copy()
-        file_path = Path(file_info["path"])
-        
-        if not file_path.exists():
+        if not await self.storage.exists(file_info["path"]):
             # Limpiar registro si archivo no existe
-            del self.file_registry[file_id]
+            await self.registry.delete(file_id)
             return None
         
         # Agregar información adicional
-        file_info["size_bytes"] = file_path.stat().st_size
         file_info["exists"] = True
         
         return file_info
     
-    def cleanup_old_files(self) -> int:
+    async def cleanup_old_files(self) -> int:
         """
-        Limpiar archivos antiguos basado en tiempo de vida.
+        Limpiar archivos expirados, por lotes y en orden de expiración.
         
         Returns:
             Número de archivos eliminados
         """
         try:
-            cutoff_time = datetime.now() - timedelta(hours=self.file_lifetime_hours)
-            files_to_remove = []
+            removed_count = 0
+            batch_size = settings.file_cleanup_batch_size
+            while True:
+                batch = await self.registry.expired(datetime.now(), batch_size)
+                batch_removed = 0
+                for file_info in batch:
+                    if await self._remove_file(file_info):
+                        batch_removed += 1
+                removed_count += batch_removed
+                
+                if len(batch) < batch_size or not batch_removed:
+                    break
+                # Ceder el event loop entre lotes
+                await asyncio.sleep(0)
+            
+            if removed_count:
+                logger.info(f"Limpieza completada: {removed_count} archivos eliminados")
+            return removed_count
             
-            # Identificar archivos antiguos
-            for file_id, file_info in self.file_registry.items():
-                if file_info["created_at"] < cutoff_time:
-                    files_to_remove.append(file_id)
+        except Exception as e:
+            logger.error(f"Error en limpieza de archivos: {e}")
+            return 0
+    
+    async def reconcile_orphans(self) -> int:
+        """
+        Eliminar archivos del almacenamiento que no están en el registro.
+        
+        Quedan así tras una caída entre guardar y registrar, o al reiniciar
+        con el backend en memoria.
+        
+        Returns:
+            Número de archivos eliminados
+        """
+        try:
+            # Solo archivos más antiguos que el margen de gracia (ya deberían estar registrados)
+            candidates = []
+            for directory in (self.actas_dir, self.transcripts_dir):
+                for key in await self.storage.list_older_than(directory.name, self.orphan_grace_seconds):
+                    candidates.append((key.rsplit("/", 1)[-1].split(".", 1)[0], key))
+            registered = await self.registry.existing({file_id for file_id, _ in candidates})
             
-            # Eliminar archivos
             removed_count = 0
-            for file_id in files_to_remove:
-                if self._remove_file(file_id):
+            for file_id, key in candidates:
+                if file_id not in registered:
+                    await self.storage.delete(key)
                     removed_count += 1
             
-            logger.info(f"Limpieza completada: {removed_count} archivos eliminados")
+            if removed_count:
+                logger.info(f"Archivos huérfanos eliminados: {removed_count}")
             return removed_count
             
         except Exception as e:
-            logger.error(f"Error en limpieza de archivos: {e}")
+            logger.error(f"Error eliminando archivos huérfanos: {e}")
             return 0
     
-    def _remove_file(self, file_id: str) -> bool:
+    def start(self) -> None:
+        """Iniciar limpieza en segundo plano."""
+        self._janitor_task = asyncio.create_task(self._janitor_loop())
+    
+    async def stop(self) -> None:
+        """Detener limpieza en segundo plano."""
+        if self._janitor_task:
+            self._janitor_task.cancel()
+            self._janitor_task = None
+        await self.storage.close()
+    
+    async def _janitor_loop(self) -> None:
+        """
+        Eliminar archivos al vencer, despertando en el próximo vencimiento.
+        
+        La espera tiene un máximo (`file_janitor_max_sleep_seconds`) para ver
+        archivos registrados por otros workers. Los huérfanos se revisan al
+        iniciar y luego una vez por tiempo de vida de archivo.
+        """
+        last_reconcile = None
+        while True:
+            next_expiry = None
+            try:
+                if last_reconcile is None or time.monotonic() - last_reconcile >= self.file_lifetime_hours * 3600:
+                    await self.reconcile_orphans()
+                    last_reconcile = time.monotonic()
+                
+                await self.cleanup_old_files()
+                await self.enforce_quota()
+                next_expiry = await self.registry.next_expiry()
+            except Exception as e:
+                logger.error(f"Error en limpieza de archivos: {e}")
+            
+            delay = settings.file_janitor_max_sleep_seconds
+            if next_expiry:
+                delay = min(delay, max((next_expiry - datetime.now()).total_seconds(), 1))
+            await asyncio.sleep(delay)
+    
+    async def _remove_file(self, file_info: Dict) -> bool:
         """
         Eliminar archivo específico.
         
         Args:
-            file_id: ID único del archivo
+            file_info: Entrada del registro del archivo
             
         Returns:
             True si se eliminó correctamente
         """
+        file_id = file_info["file_id"]
         try:
-            if file_id not in self.file_registry:
-                return False
+            # Eliminar versiones renderizadas
+            for key in file_info["artifacts"].values():
+                self._forget_artifact(key)
+                await self.storage.delete(key)
             
-            file_info = self.file_registry[file_id]
-            file_path = Path(file_info["path"])
+            # Eliminar archivo del almacenamiento
+            await self.storage.delete(file_info["path"])
+            logger.debug(f"Archivo eliminado del almacenamiento: {file_info['path']}")
             
-            # Eliminar archivo del disco
-            if file_path.exists():
-                file_path.unlink()
-                logger.debug(f"Archivo eliminado del disco: {file_path}")
-            
-            # Eliminar del registro
-            del self.file_registry[file_id]
+            # Eliminar del registro (también sus artefactos)
+            removed = await self.registry.delete(file_id)
             logger.debug(f"Archivo eliminado del registro: {file_id}")
             
-            return True
+            return removed
             
         except Exception as e:
             logger.error(f"Error eliminando archivo {file_id}: {e}")
             return False
     
-    def get_stats(self) -> Dict:
+    async def get_stats(self) -> Dict:
         """
         Obtener estadísticas del gestor de archivos.
         
@@ -212,22 +573,21 @@ class FileManager:
             Diccionario con estadísticas
         """
         try:
-            total_files = len(self.file_registry)
-            acta_files = sum(1 for info in self.file_registry.values() if info["file_type"] == "acta")
-            transcript_files = sum(1 for info in self.file_registry.values() if info["file_type"] == "transcript")
-            
-            # Calcular tamaño total
-            total_size = 0
-            for file_info in self.file_registry.values():
-                file_path = Path(file_info["path"])
-                if file_path.exists():
-                    total_size += file_path.stat().st_size
+            stats = await self.registry.stats()
+            acta_files = stats.get("acta", {}).get("files", 0)
+            transcript_files = stats.get("transcript", {}).get("files", 0)
+            artifacts = stats.get("artifacts", {"files": 0, "size_bytes": 0})
+            total_size = sum(type_stats["size_bytes"] for type_stats in stats.values())
             
             return {
-                "total_files": total_files,
+                "total_files": acta_files + transcript_files,
                 "acta_files": acta_files,
                 "transcript_files": transcript_files,
                 "total_size_mb": round(total_size / 1024 / 1024, 2),
+                "store_max_mb": settings.file_store_max_mb,
+                "artifacts": artifacts["files"],
+                "artifact_size_mb": round(artifacts["size_bytes"] / 1024 / 1024, 2),
+                "free_disk_mb": round(self.free_disk_bytes() / 1024 / 1024, 2),
                 "file_lifetime_hours": self.file_lifetime_hours
             }
             
@@ -235,7 +595,7 @@ class FileManager:
             logger.error(f"Error obteniendo estadísticas: {e}")
             return {"error": str(e)}
     
-    def cleanup_all(self) -> int:
+    async def cleanup_all(self) -> int:
         """
         Limpiar todos los archivos temporales.
         
@@ -244,11 +604,16 @@ class FileManager:
         """
         try:
             removed_count = 0
-            file_ids = list(self.file_registry.keys())
-            
-            for file_id in file_ids:
-                if self._remove_file(file_id):
-                    removed_count += 1
+            while True:
+                batch = await self.registry.expired()
+                batch_removed = 0
+                for file_info in batch:
+                    if await self._remove_file(file_info):
+                        batch_removed += 1
+                removed_count += batch_removed
+                # Sin avances (registro vacío o errores), no insistir
+                if not batch_removed:
+                    break
             
             logger.info(f"Limpieza completa: {removed_count} archivos eliminados")
             return removed_count
@@ -0,0 +1,418 @@
+"""Registro de archivos de descarga con backends intercambiables."""
+
+import heapq
+import asyncio
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from voxcliente.config import settings
+from voxcliente.database import FileRegistryService
+
+logger = logging.getLogger(__name__)
+
+# Una entrada del registro:
+# {file_id, file_type, original_filename, path (clave de almacenamiento), size_bytes,
+#  created_at, expires_at, last_accessed (última descarga), artifacts: {formato: clave}}
+Entry = Dict
+
+# Totales por tipo de archivo y de artefactos ('artifacts'):
+# {tipo: {files, size_bytes}}, mantenidos al registrar y eliminar
+Totals = Dict[str, Dict[str, int]]
+
+
+class MemoryFileRegistry:
+    """Backend en memoria del proceso (un solo worker)."""
+
+    def __init__(self):
+        """Inicializar registro vacío."""
+        self._entries: Dict[str, Entry] = {}
+        # Tamaño de los artefactos de cada archivo: {file_id: {formato: bytes}}
+        self._artifact_sizes: Dict[str, Dict[str, int]] = {}
+        self._totals: Totals = {}
+        # Min-heap de (expires_at, file_id); las entradas ya eliminadas se descartan al llegar al tope
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+
+    def _count(self, kind: str, files: int, size_bytes: int) -> None:
+        totals = self._totals.setdefault(kind, {"files": 0, "size_bytes": 0})
+        totals["files"] += files
+        totals["size_bytes"] += size_bytes
+
+    async def add(self, entry: Entry) -> None:
+        """Registrar archivo."""
+        self._entries[entry["file_id"]] = {"last_accessed": entry["created_at"], **entry, "artifacts": {}}
+        self._artifact_sizes[entry["file_id"]] = {}
+        self._count(entry["file_type"], 1, entry["size_bytes"])
+        heapq.heappush(self._expiry_heap, (entry["expires_at"], entry["file_id"]))
+
+    async def get(self, file_id: str) -> Optional[Entry]:
+        """Obtener entrada con sus artefactos, o None si no existe."""
+        entry = self._entries.get(file_id)
+        return {**entry, "artifacts": dict(entry["artifacts"])} if entry else None
+
+    async def delete(self, file_id: str) -> bool:
+        """Quitar archivo del registro."""
+        entry = self._entries.pop(file_id, None)
+        if entry is None:
+            return False
+
+        artifact_sizes = self._artifact_sizes.pop(file_id)
+        self._count(entry["file_type"], -1, -entry["size_bytes"])
+        self._count("artifacts", -len(artifact_sizes), -sum(artifact_sizes.values()))
+        return True
+
+    async def set_artifact(self, file_id: str, file_format: str, path: str, size_bytes: int = 0) -> bool:
+        """Registrar artefacto renderizado; False si el archivo ya no está registrado."""
+        entry = self._entries.get(file_id)
+        if not entry:
+            return False
+        entry["artifacts"][file_format] = path
+
+        previous = self._artifact_sizes[file_id].get(file_format)
+        self._artifact_sizes[file_id][file_format] = size_bytes
+        self._count("artifacts", 0 if previous is not None else 1, size_bytes - (previous or 0))
+        return True
+
+    async def delete_artifact(self, file_id: str, file_format: str) -> None:
+        """Quitar artefacto del registro."""
+        entry = self._entries.get(file_id)
+        if entry and entry["artifacts"].pop(file_format, None) is not None:
+            self._count("artifacts", -1, -self._artifact_sizes[file_id].pop(file_format))
+
+    async def touch(self, file_id: str, accessed_at: datetime) -> None:
+        """Registrar descarga del archivo."""
+        entry = self._entries.get(file_id)
+        if entry:
+            entry["last_accessed"] = accessed_at
+
+    async def least_recently_used(self, limit: int, with_artifacts: bool = False) -> List[Entry]:
+        """Entradas descargadas hace más tiempo primero; solo las que tienen artefactos si `with_artifacts`."""
+        entries = (entry for entry in self._entries.values() if entry["artifacts"] or not with_artifacts)
+        entries = heapq.nsmallest(limit, entries, key=lambda entry: entry["last_accessed"])
+        return [{**entry, "artifacts": dict(entry["artifacts"])} for entry in entries]
+
+    async def expired(self, before: Optional[datetime] = None, limit: int = 500) -> List[Entry]:
+        """Entradas que expiran antes de `before` (todas si es None), de la más próxima a vencer a la más lejana."""
+        if before is None:
+            entries = heapq.nsmallest(limit, self._entries.values(), key=lambda entry: entry["expires_at"])
+            return [{**entry, "artifacts": dict(entry["artifacts"])} for entry in entries]
+
+        entries, pending = [], []
+        while self._expiry_heap and len(entries) < limit and self._expiry_heap[0][0] < before:
+            item = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(item[1])
+            if entry:
+                entries.append({**entry, "artifacts": dict(entry["artifacts"])})
+                pending.append(item)
+
+        # Siguen en el heap hasta que se eliminen del registro
+        for item in pending:
+            heapq.heappush(self._expiry_heap, item)
+        return entries
+
+    async def next_expiry(self) -> Optional[datetime]:
+        """Próximo vencimiento registrado, o None si no hay archivos."""
+        while self._expiry_heap and self._expiry_heap[0][1] not in self._entries:
+            heapq.heappop(self._expiry_heap)
+        return self._expiry_heap[0][0] if self._expiry_heap else None
+
+    async def existing(self, file_ids: Iterable[str]) -> Set[str]:
+        """IDs que siguen registrados."""
+        return {file_id for file_id in file_ids if file_id in self._entries}
+
+    async def stats(self) -> Totals:
+        """Cantidad y tamaño de archivos por tipo y de artefactos, sin recorrer el registro."""
+        return {kind: dict(totals) for kind, totals in self._totals.items()}
+
+
+class SQLiteFileRegistry:
+    """
+    Backend en un archivo SQLite, compartido por los workers de un mismo host.
+
+    Usa modo WAL para que las lecturas no se bloqueen con las escrituras de
+    otros procesos, y una conexión por thread del executor. Los totales
+    para estadísticas y cuota los mantienen triggers en la tabla `totals`.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        file_id TEXT PRIMARY KEY,
+        file_type TEXT NOT NULL,
+        original_filename TEXT,
+        path TEXT NOT NULL,
+        size_bytes INTEGER DEFAULT 0,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        last_accessed REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_files_expires_at ON files(expires_at);
+    CREATE INDEX IF NOT EXISTS idx_files_last_accessed ON files(last_accessed);
+    CREATE TABLE IF NOT EXISTS artifacts (
+        file_id TEXT NOT NULL REFERENCES files(file_id) ON DELETE CASCADE,
+        format TEXT NOT NULL,
+        path TEXT NOT NULL,
+        size_bytes INTEGER DEFAULT 0,
+        PRIMARY KEY (file_id, format)
+    );
+    CREATE TABLE IF NOT EXISTS totals (
+        kind TEXT PRIMARY KEY,
+        files INTEGER NOT NULL DEFAULT 0,
+        size_bytes INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TRIGGER IF NOT EXISTS files_count_insert AFTER INSERT ON files BEGIN
+        INSERT INTO totals (kind, files, size_bytes) VALUES (NEW.file_type, 1, NEW.size_bytes)
+        ON CONFLICT (kind) DO UPDATE SET files = files + 1, size_bytes = size_bytes + excluded.size_bytes;
+    END;
+    CREATE TRIGGER IF NOT EXISTS files_count_delete AFTER DELETE ON files BEGIN
+        UPDATE totals SET files = files - 1, size_bytes = size_bytes - OLD.size_bytes WHERE kind = OLD.file_type;
+    END;
+    CREATE TRIGGER IF NOT EXISTS artifacts_count_insert AFTER INSERT ON artifacts BEGIN
+        INSERT INTO totals (kind, files, size_bytes) VALUES ('artifacts', 1, NEW.size_bytes)
+        ON CONFLICT (kind) DO UPDATE SET files = files + 1, size_bytes = size_bytes + excluded.size_bytes;
+    END;
+    CREATE TRIGGER IF NOT EXISTS artifacts_count_update AFTER UPDATE OF size_bytes ON artifacts BEGIN
+        UPDATE totals SET size_bytes = size_bytes + NEW.size_bytes - OLD.size_bytes WHERE kind = 'artifacts';
+    END;
+    CREATE TRIGGER IF NOT EXISTS artifacts_count_delete AFTER DELETE ON artifacts BEGIN
+        UPDATE totals SET files = files - 1, size_bytes = size_bytes - OLD.size_bytes WHERE kind = 'artifacts';
+    END;
+    """
+
+    def __init__(self, db_path: str):
+        """Inicializar base de datos del registro."""
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión del thread actual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _entry(row: sqlite3.Row, artifacts: Dict[str, str]) -> Entry:
+        entry = dict(row)
+        entry["created_at"] = datetime.fromtimestamp(entry["created_at"])
+        entry["expires_at"] = datetime.fromtimestamp(entry["expires_at"])
+        entry["last_accessed"] = datetime.fromtimestamp(entry["last_accessed"])
+        entry["artifacts"] = artifacts
+        return entry
+
+    def _artifacts(self, conn: sqlite3.Connection, file_id: str) -> Dict[str, str]:
+        rows = conn.execute("SELECT format, path FROM artifacts WHERE file_id = ?", (file_id,))
+        return {row["format"]: row["path"] for row in rows}
+
+    def _add(self, entry: Entry) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO files (file_id, file_type, original_filename, path, size_bytes, created_at, expires_at, "
+                "last_accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry["file_id"], entry["file_type"], entry["original_filename"], entry["path"],
+                 entry["size_bytes"], entry["created_at"].timestamp(), entry["expires_at"].timestamp(),
+                 entry["created_at"].timestamp())
+            )
+
+    def _get(self, file_id: str) -> Optional[Entry]:
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        return self._entry(row, self._artifacts(conn, file_id)) if row else None
+
+    def _delete(self, file_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,)).rowcount > 0
+
+    def _set_artifact(self, file_id: str, file_format: str, path: str, size_bytes: int) -> bool:
+        with self._connect() as conn:
+            # Upsert en lugar de REPLACE, que borraría la fila sin disparar el trigger de totales
+            cursor = conn.execute(
+                "INSERT INTO artifacts (file_id, format, path, size_bytes) "
+                "SELECT file_id, ?, ?, ? FROM files WHERE file_id = ? "
+                "ON CONFLICT (file_id, format) DO UPDATE SET path = excluded.path, size_bytes = excluded.size_bytes",
+                (file_format, path, size_bytes, file_id)
+            )
+            return cursor.rowcount > 0
+
+    def _delete_artifact(self, file_id: str, file_format: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM artifacts WHERE file_id = ? AND format = ?", (file_id, file_format))
+
+    def _touch(self, file_id: str, accessed_at: datetime) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE files SET last_accessed = ? WHERE file_id = ?", (accessed_at.timestamp(), file_id))
+
+    def _least_recently_used(self, limit: int, with_artifacts: bool) -> List[Entry]:
+        conn = self._connect()
+        where = "WHERE EXISTS (SELECT 1 FROM artifacts WHERE artifacts.file_id = files.file_id) " if with_artifacts else ""
+        rows = conn.execute(f"SELECT * FROM files {where}ORDER BY last_accessed LIMIT ?", (limit,)).fetchall()
+        return [self._entry(row, self._artifacts(conn, row["file_id"])) for row in rows]
+
+    def _expired(self, before: Optional[datetime], limit: int) -> List[Entry]:
+        conn = self._connect()
+        if before is None:
+            rows = conn.execute("SELECT * FROM files ORDER BY expires_at LIMIT ?", (limit,)).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM files WHERE expires_at < ? ORDER BY expires_at LIMIT ?",
+                (before.timestamp(), limit)
+            ).fetchall()
+        return [self._entry(row, self._artifacts(conn, row["file_id"])) for row in rows]
+
+    def _next_expiry(self) -> Optional[datetime]:
+        row = self._connect().execute("SELECT MIN(expires_at) AS expires_at FROM files").fetchone()
+        return datetime.fromtimestamp(row["expires_at"]) if row["expires_at"] is not None else None
+
+    def _existing(self, file_ids: List[str]) -> Set[str]:
+        conn = self._connect()
+        found: Set[str] = set()
+        # Por bloques, bajo el límite de parámetros de SQLite
+        for start in range(0, len(file_ids), 500):
+            chunk = file_ids[start:start + 500]
+            rows = conn.execute(
+                f"SELECT file_id FROM files WHERE file_id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            found.update(row["file_id"] for row in rows)
+        return found
+
+    def _stats(self) -> Totals:
+        rows = self._connect().execute("SELECT kind, files, size_bytes FROM totals")
+        return {row["kind"]: {"files": row["files"], "size_bytes": row["size_bytes"]} for row in rows}
+
+    async def add(self, entry: Entry) -> None:
+        """Registrar archivo."""
+        await asyncio.to_thread(self._add, entry)
+
+    async def get(self, file_id: str) -> Optional[Entry]:
+        """Obtener entrada con sus artefactos, o None si no existe."""
+        return await asyncio.to_thread(self._get, file_id)
+
+    async def delete(self, file_id: str) -> bool:
+        """Quitar archivo (y sus artefactos) del registro."""
+        return await asyncio.to_thread(self._delete, file_id)
+
+    async def set_artifact(self, file_id: str, file_format: str, path: str, size_bytes: int = 0) -> bool:
+        """Registrar artefacto renderizado; False si el archivo ya no está registrado."""
+        return await asyncio.to_thread(self._set_artifact, file_id, file_format, path, size_bytes)
+
+    async def delete_artifact(self, file_id: str, file_format: str) -> None:
+        """Quitar artefacto del registro."""
+        await asyncio.to_thread(self._delete_artifact, file_id, file_format)
+
+    async def touch(self, file_id: str, accessed_at: datetime) -> None:
+        """Registrar descarga del archivo."""
+        await asyncio.to_thread(self._touch, file_id, accessed_at)
+
+    async def least_recently_used(self, limit: int, with_artifacts: bool = False) -> List[Entry]:
+        """Entradas descargadas hace más tiempo primero; solo las que tienen artefactos si `with_artifacts`."""
+        return await asyncio.to_thread(self._least_recently_used, limit, with_artifacts)
+
+    async def expired(self, before: Optional[datetime] = None, limit: int = 500) -> List[Entry]:
+        """Entradas que expiran antes de `before` (todas si es None), por índice de expiración."""
+        return await asyncio.to_thread(self._expired, before, limit)
+
+    async def next_expiry(self) -> Optional[datetime]:
+        """Próximo vencimiento registrado, o None si no hay archivos."""
+        return await asyncio.to_thread(self._next_expiry)
+
+    async def existing(self, file_ids: Iterable[str]) -> Set[str]:
+        """IDs que siguen registrados."""
+        return await asyncio.to_thread(self._existing, list(file_ids))
+
+    async def stats(self) -> Totals:
+        """Cantidad y tamaño de archivos por tipo y de artefactos, sin recorrer el registro."""
+        return await asyncio.to_thread(self._stats)
+
+
+class PostgresFileRegistry:
+    """
+    Backend compartido en la tabla file_registry de PostgreSQL (varios hosts).
+
+    Con almacenamiento local, `uploads/temp` debe ser un volumen compartido
+    por todos los workers; con S3 no hace falta.
+    """
+
+    @staticmethod
+    def _uuid(file_id: str) -> Optional[UUID]:
+        try:
+            return UUID(file_id)
+        except ValueError:
+            return None
+
+    async def add(self, entry: Entry) -> None:
+        """Registrar archivo."""
+        await FileRegistryService.add_file({**entry, "file_id": UUID(entry["file_id"])})
+
+    async def get(self, file_id: str) -> Optional[Entry]:
+        """Obtener entrada con sus artefactos, o None si no existe."""
+        uuid = self._uuid(file_id)
+        return await FileRegistryService.get_file(uuid) if uuid else None
+
+    async def delete(self, file_id: str) -> bool:
+        """Quitar archivo (y sus artefactos) del registro."""
+        uuid = self._uuid(file_id)
+        return await FileRegistryService.delete_file(uuid) if uuid else False
+
+    async def set_artifact(self, file_id: str, file_format: str, path: str, size_bytes: int = 0) -> bool:
+        """Registrar artefacto renderizado; False si el archivo ya no está registrado."""
+        return await FileRegistryService.set_artifact(UUID(file_id), file_format, path, size_bytes)
+
+    async def delete_artifact(self, file_id: str, file_format: str) -> None:
+        """Quitar artefacto del registro."""
+        await FileRegistryService.delete_artifact(UUID(file_id), file_format)
+
+    async def touch(self, file_id: str, accessed_at: datetime) -> None:
+        """Registrar descarga del archivo."""
+        uuid = self._uuid(file_id)
+        if uuid:
+            await FileRegistryService.touch_file(uuid, accessed_at)
+
+    async def least_recently_used(self, limit: int, with_artifacts: bool = False) -> List[Entry]:
+        """Entradas descargadas hace más tiempo primero; solo las que tienen artefactos si `with_artifacts`."""
+        return await FileRegistryService.get_least_recently_used_files(limit, with_artifacts)
+
+    async def expired(self, before: Optional[datetime] = None, limit: int = 500) -> List[Entry]:
+        """Entradas que expiran antes de `before` (todas si es None), por índice de expiración."""
+        return await FileRegistryService.get_expired_files(before, limit)
+
+    async def next_expiry(self) -> Optional[datetime]:
+        """Próximo vencimiento registrado, o None si no hay archivos."""
+        return await FileRegistryService.get_next_expiry()
+
+    async def existing(self, file_ids: Iterable[str]) -> Set[str]:
+        """IDs que siguen registrados."""
+        uuids = [uuid for uuid in map(self._uuid, file_ids) if uuid]
+        return await FileRegistryService.get_existing_ids(uuids) if uuids else set()
+
+    async def stats(self) -> Totals:
+        """Cantidad y tamaño de archivos por tipo y de artefactos, sin recorrer el registro."""
+        return await FileRegistryService.get_stats()
+
+
+def create_file_registry(backend: str):
+    """
+    Crear backend del registro según configuración.
+
+    Args:
+        backend: 'sqlite', 'postgres' o 'memory'
+
+    Returns:
+        Backend del registro de archivos
+    """
+    if backend == "memory":
+        return MemoryFileRegistry()
+    if backend == "postgres":
+        return PostgresFileRegistry()
+    if backend != "sqlite":
+        logger.warning(f"Backend de registro de archivos desconocido '{backend}', usando sqlite")
+    return SQLiteFileRegistry(settings.file_registry_path)
@@ -0,0 +1,380 @@
+"""Gestor de trabajos en segundo plano para el pipeline de audio a acta."""
+
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Any, Callable, Awaitable, Set, AsyncIterator, List
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from voxcliente.config import settings
+from voxcliente.database import PipelineJobService, PipelineJobCreate, PipelineJobUpdate
+
+logger = logging.getLogger(__name__)
+
+# Progreso aproximado (%) al entrar en cada etapa del pipeline
+JOB_STAGES = {
+    "queued": 0,
+    "uploaded": 5,
+    "transcribing": 10,
+    "transcript_ready": 45,
+    "generating_acta": 50,
+    "acta_ready": 70,
+    "generating_files": 75,
+    "docx_ready": 85,
+    "sending_email": 90,
+    "email_queued": 95,
+    "completed": 100,
+    "failed": 100,
+}
+
+# Segundos sin eventos antes de enviar un keepalive a los suscriptores
+EVENT_KEEPALIVE_SECONDS = 15
+
+# Etapa equivalente a cada estado persistido en pipeline_jobs
+CHECKPOINT_STAGES = {
+    "pending": "uploaded",
+    "transcribing": "transcribing",
+    "transcribed": "transcript_ready",
+    "acta_ready": "acta_ready",
+    "completed": "completed",
+    "failed": "failed",
+}
+
+# Estados en los que el trabajo ya no cambiará
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class JobManager:
+    """Gestor simple de trabajos con concurrencia acotada sobre el event loop."""
+
+    def __init__(self):
+        """Inicializar límite de concurrencia y registro de trabajos."""
+        # Registro de trabajos: {job_id: {status, stage, progress, result, error, ...}}
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+        # Limita cuántos pipelines corren a la vez; el resto espera en cola
+        self._semaphore = asyncio.Semaphore(settings.max_concurrent_jobs)
+
+        # Referencias a tareas en curso para que no sean recolectadas
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # Tarea periódica de heartbeat y reanudación de trabajos abandonados
+        self._maintenance_task: Optional[asyncio.Task] = None
+
+        # Tiempo que se conservan los trabajos terminados (1 hora)
+        self.job_lifetime_hours = 1
+
+        logger.info(f"JobManager inicializado con {settings.max_concurrent_jobs} trabajos concurrentes")
+
+    def active_jobs(self) -> int:
+        """Número de trabajos en cola o en ejecución."""
+        return sum(1 for job in self.jobs.values() if job["status"] not in FINISHED_STATUSES)
+
+    def create_job(self, filename: str, email: str) -> str:
+        """
+        Registrar un trabajo nuevo en estado 'queued'.
+
+        Args:
+            filename: Nombre del archivo subido
+            email: Email del destinatario
+
+        Returns:
+            ID único del trabajo
+        """
+        self.cleanup_old_jobs()
+
+        if self.active_jobs() >= settings.max_queued_jobs:
+            raise HTTPException(status_code=503, detail="Servidor ocupado. Intenta nuevamente en unos minutos.")
+
+        job_id = str(uuid.uuid4())
+        self._register_job(job_id, filename, email, datetime.now())
+        self._add_event(self.jobs[job_id], "uploaded")
+        return job_id
+
+    def _register_job(self, job_id: str, filename: str, email: str, created_at: datetime) -> None:
+        """Agregar trabajo al registro en memoria."""
+        now = created_at
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "stage": "queued",
+            "progress": JOB_STAGES["queued"],
+            "filename": filename,
+            "email": email,
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None,
+            # Historial de etapas con tiempos, para /jobs/{id}/events
+            "events": [],
+            "_changed": asyncio.Event(),
+            # True si el trabajo tiene checkpoint en pipeline_jobs
+            "persisted": False
+        }
+
+        logger.info(f"Trabajo registrado: {job_id} ({filename})")
+
+    async def persist_job(self, job_id: str, file_size: int, audio_path: Optional[str],
+                          audio_url: Optional[str], audio_hash: Optional[str]) -> None:
+        """
+        Crear checkpoint inicial del trabajo en base de datos.
+
+        Si la base de datos falla el trabajo sigue, pero no podrá reanudarse.
+        """
+        job = self.jobs[job_id]
+        try:
+            await PipelineJobService.create_job(PipelineJobCreate(
+                job_id=job_id,
+                email=job["email"],
+                filename=job["filename"],
+                file_size=file_size,
+                audio_path=audio_path,
+                audio_url=audio_url,
+                audio_hash=audio_hash
+            ))
+            job["persisted"] = True
+        except Exception as e:
+            logger.warning(f"Trabajo {job_id} sin checkpoint en BD: {e}")
+
+    async def checkpoint(self, job_id: str, **fields) -> None:
+        """Guardar resultados de etapa del trabajo; los errores no detienen el pipeline."""
+        job = self.jobs.get(job_id)
+        if not job or not job["persisted"]:
+            return
+
+        try:
+            await PipelineJobService.update_job(uuid.UUID(job_id), PipelineJobUpdate(**fields))
+        except Exception as e:
+            logger.warning(f"No se pudo guardar checkpoint de {job_id}: {e}")
+
+    def update_stage(self, job_id: str, stage: str) -> None:
+        """Marcar la etapa actual del trabajo."""
+        job = self.jobs.get(job_id)
+        if not job:
+            return
+
+        job["status"] = "running"
+        self._add_event(job, stage)
+        logger.info(f"Trabajo {job_id}: etapa {stage}")
+
+    def _add_event(self, job: Dict[str, Any], stage: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Registrar evento de etapa con sus tiempos y despertar a los suscriptores."""
+        now = datetime.now()
+        last_time = job["events"][-1]["timestamp"] if job["events"] else job["created_at"]
+
+        job["stage"] = stage
+        # Etapas paralelas pueden terminar en cualquier orden; el progreso no retrocede
+        job["progress"] = max(job["progress"], JOB_STAGES.get(stage, 0))
+        job["updated_at"] = now
+        job["events"].append({
+            "stage": stage,
+            "progress": job["progress"],
+            "timestamp": now,
+            "elapsed_seconds": round((now - job["created_at"]).total_seconds(), 3),
+            "stage_seconds": round((now - last_time).total_seconds(), 3),
+            **(data or {})
+        })
+
+        job["_changed"].set()
+        job["_changed"] = asyncio.Event()
+
+    def submit(self, job_id: str, func: Callable[..., Awaitable[Dict[str, Any]]], *args) -> None:
+        """
+        Encolar la ejecución del trabajo como tarea del event loop.
+
+        La función recibe los callbacks `on_stage` (avance del pipeline) y
+        `on_checkpoint` (persistir resultados de etapa) como argumentos nombrados.
+        """
+        task = asyncio.create_task(self._run(job_id, func, *args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: str, func: Callable[..., Awaitable[Dict[str, Any]]], *args) -> None:
+        """Ejecutar el trabajo y guardar su resultado o error."""
+        job = self.jobs[job_id]
+        try:
+            async with self._semaphore:
+                result = await func(
+                    *args,
+                    on_stage=lambda stage: self.update_stage(job_id, stage),
+                    on_checkpoint=lambda **fields: self.checkpoint(job_id, **fields)
+                )
+            # Estado y evento final juntos, sin await entre ambos: los suscriptores
+            # dejan de escuchar apenas ven el estado terminado
+            job["result"] = result
+            job["status"] = "completed"
+            self._add_event(job, "completed", {"result": result})
+            await self.checkpoint(job_id, status="completed", result=jsonable_encoder(result))
+        except HTTPException as e:
+            logger.error(f"Trabajo {job_id} falló: {e.detail}")
+            await self._fail(job, e.detail)
+        except Exception as e:
+            logger.error(f"Trabajo {job_id} falló: {e}", exc_info=True)
+            await self._fail(job, f"Error interno del servidor: {str(e)}")
+
+    async def _fail(self, job: Dict[str, Any], error: str) -> None:
+        """Marcar trabajo como fallido en memoria y en su checkpoint."""
+        job["status"] = "failed"
+        job["error"] = error
+        self._add_event(job, "failed", {"error": error})
+        await self.checkpoint(job["job_id"], status="failed", error=error)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtener estado público del trabajo.
+
+        Args:
+            job_id: ID único del trabajo
+
+        Returns:
+            Estado del trabajo o None si no existe
+        """
+        job = self.jobs.get(job_id)
+        if not job:
+            return None
+
+        return {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "stage": job["stage"],
+            "progress": job["progress"],
+            "filename": job["filename"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+            "result": job["result"],
+            "error": job["error"],
+            "events": [
+                {k: v for k, v in event.items() if k not in ("result", "error")}
+                for event in job["events"]
+            ]
+        }
+
+    async def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtener estado del trabajo, buscando en base de datos si no está en memoria.
+
+        Permite consultar trabajos procesados por otro worker o antes de un reinicio.
+        """
+        job = self.get_job(job_id)
+        if job:
+            return job
+
+        try:
+            row = await PipelineJobService.get_job(uuid.UUID(job_id))
+        except Exception:
+            return None
+        if not row:
+            return None
+
+        stage = CHECKPOINT_STAGES.get(row["status"], "queued")
+        return {
+            "job_id": job_id,
+            "status": row["status"] if row["status"] in FINISHED_STATUSES else "running",
+            "stage": stage,
+            "progress": JOB_STAGES[stage],
+            "filename": row["filename"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "result": row["result"],
+            "error": row["error"],
+            "events": []
+        }
+
+    def start(self, resume_runner: Callable[..., Awaitable[Dict[str, Any]]]) -> None:
+        """
+        Iniciar tarea periódica de heartbeat y reanudación.
+
+        Args:
+            resume_runner: Función que continúa un trabajo a partir de su checkpoint
+        """
+        self._maintenance_task = asyncio.create_task(self._maintenance_loop(resume_runner))
+
+    async def stop(self) -> None:
+        """Detener tarea periódica."""
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+
+    async def _maintenance_loop(self, resume_runner: Callable[..., Awaitable[Dict[str, Any]]]) -> None:
+        """Mantener vivos los checkpoints propios y retomar trabajos abandonados."""
+        while True:
+            try:
+                running: List[uuid.UUID] = [
+                    uuid.UUID(job_id) for job_id, job in self.jobs.items()
+                    if job["persisted"] and job["status"] not in FINISHED_STATUSES
+                ]
+                if running:
+                    await PipelineJobService.touch_jobs(running)
+
+                for row in await PipelineJobService.claim_stale_jobs(settings.pipeline_stale_after_seconds):
+                    self._resume(row, resume_runner)
+            except Exception as e:
+                logger.error(f"Error en mantenimiento de trabajos: {e}")
+
+            await asyncio.sleep(settings.pipeline_heartbeat_seconds)
+
+    def _resume(self, row: Dict[str, Any], resume_runner: Callable[..., Awaitable[Dict[str, Any]]]) -> None:
+        """Registrar trabajo abandonado y encolarlo desde su último checkpoint."""
+        job_id = str(row["job_id"])
+        self._register_job(job_id, row["filename"], row["email"], row["created_at"])
+        job = self.jobs[job_id]
+        job["persisted"] = True
+        self._add_event(job, "uploaded")
+
+        logger.info(f"Reanudando trabajo {job_id} desde estado '{row['status']}'")
+        self.submit(job_id, resume_runner, row)
+
+    async def stream_events(self, job_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Emitir los eventos de etapa del trabajo a medida que ocurren.
+
+        Primero repite el historial y luego espera eventos nuevos hasta que
+        el trabajo termina. Emite None como keepalive cuando no hay novedades.
+
+        Args:
+            job_id: ID único del trabajo
+        """
+        sent = 0
+        while True:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+
+            while sent < len(job["events"]):
+                yield job["events"][sent]
+                sent += 1
+
+            if job["status"] in FINISHED_STATUSES:
+                return
+
+            try:
+                await asyncio.wait_for(job["_changed"].wait(), timeout=EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+
+    def cleanup_old_jobs(self) -> int:
+        """
+        Eliminar trabajos terminados más antiguos que su tiempo de vida.
+
+        Returns:
+            Número de trabajos eliminados
+        """
+        cutoff_time = datetime.now() - timedelta(hours=self.job_lifetime_hours)
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["status"] in FINISHED_STATUSES and job["updated_at"] < cutoff_time
+        ]
+
+        for job_id in expired:
+            del self.jobs[job_id]
+
+        if expired:
+            logger.info(f"Se eliminaron {len(expired)} trabajos antiguos")
+        return len(expired)
+
+
+# Instancia global del gestor de trabajos
+job_manager = JobManager()
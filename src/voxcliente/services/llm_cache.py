@@ -0,0 +1,122 @@
+"""Caché de resultados del LLM con backends intercambiables."""
+
+import copy
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from voxcliente.config import settings
+from voxcliente.database import LLMCacheService
+from voxcliente.services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def build_cache_key(prompt_hash: str, model: str, transcript: str) -> str:
+    """Clave de caché: SHA-256 de (versión del prompt, modelo, transcripción)."""
+    return hashlib.sha256(f"{prompt_hash}\0{model}\0{transcript}".encode("utf-8")).hexdigest()
+
+
+class MemoryLLMCache:
+    """Backend LRU en memoria del proceso."""
+
+    def __init__(self):
+        """Inicializar caché LRU con expiración."""
+        self.cache = TTLCache(
+            max_entries=settings.llm_cache_max_entries,
+            ttl_seconds=settings.llm_cache_ttl_hours * 3600
+        )
+
+    async def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Obtener resultado cacheado o None."""
+        entry = self.cache.get(cache_key)
+        return copy.deepcopy(entry["result"]) if entry else None
+
+    async def set(self, cache_key: str, prompt_hash: str, model: str, result: Dict[str, Any]) -> None:
+        """Guardar resultado."""
+        self.cache.set(cache_key, {"prompt_hash": prompt_hash, "result": copy.deepcopy(result)})
+
+    async def invalidate_stale(self, current_prompt_hash: str) -> None:
+        """Eliminar resultados generados con otras versiones del prompt."""
+        removed = self.cache.delete_matching(lambda entry: entry["prompt_hash"] != current_prompt_hash)
+        if removed:
+            logger.info(f"Caché LLM: {removed} resultados invalidados por cambio de prompt")
+
+
+class PostgresLLMCache:
+    """
+    Backend compartido en la tabla llm_cache de PostgreSQL.
+
+    Con los mismos límites que el backend en memoria: las lecturas ignoran
+    resultados con más de `llm_cache_ttl_hours`, y cada inserción elimina
+    los vencidos y los más antiguos por encima de `llm_cache_max_entries`.
+    Las inserciones siguen a una llamada al LLM, así que la purga no pesa.
+    Los errores de BD se registran y la caché se omite: nunca hacen fallar
+    la generación del acta.
+    """
+
+    def __init__(self):
+        """Inicializar límites de la caché."""
+        self.ttl = timedelta(hours=settings.llm_cache_ttl_hours) if settings.llm_cache_ttl_hours else None
+        self.max_entries = settings.llm_cache_max_entries
+
+    def _cutoff(self) -> Optional[datetime]:
+        """Resultados creados antes de este momento están vencidos (None: sin vencimiento)."""
+        return datetime.now() - self.ttl if self.ttl else None
+
+    async def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Obtener resultado cacheado o None (los errores de BD cuentan como fallo de caché)."""
+        try:
+            return await LLMCacheService.get_entry(cache_key, self._cutoff())
+        except Exception:
+            logger.warning("Caché LLM: error leyendo resultado cacheado", exc_info=True)
+            return None
+
+    async def set(self, cache_key: str, prompt_hash: str, model: str, result: Dict[str, Any]) -> None:
+        """Guardar resultado y purgar vencidos y excedentes."""
+        try:
+            await LLMCacheService.set_entry(cache_key, prompt_hash, model, result)
+            await self.purge()
+        except Exception:
+            logger.warning("Caché LLM: error guardando resultado", exc_info=True)
+
+    async def purge(self) -> None:
+        """Eliminar resultados vencidos y los más antiguos sobre el límite de entradas."""
+        removed = await LLMCacheService.purge(self._cutoff(), self.max_entries)
+        if removed:
+            logger.info(f"Caché LLM: {removed} resultados vencidos o sobre el límite eliminados")
+
+    async def invalidate_stale(self, current_prompt_hash: str) -> None:
+        """
+        Eliminar resultados vencidos al cambiar el prompt.
+
+        Los de otras versiones del prompt no se borran: la tabla es
+        compartida y durante un despliegue gradual conviven workers con el
+        prompt anterior y el nuevo. La versión forma parte de la clave, así
+        que nunca se leen con otra, y el TTL y el límite de entradas los
+        retiran.
+        """
+        try:
+            await self.purge()
+        except Exception:
+            logger.warning("Caché LLM: error purgando resultados", exc_info=True)
+
+
+def create_llm_cache(backend: str):
+    """
+    Crear backend de caché según configuración.
+
+    Args:
+        backend: 'memory', 'postgres' o 'none'
+
+    Returns:
+        Backend de caché o None si está deshabilitada
+    """
+    if backend == "memory":
+        return MemoryLLMCache()
+    if backend == "postgres":
+        return PostgresLLMCache()
+    if backend != "none":
+        logger.warning(f"Backend de caché LLM desconocido '{backend}', caché deshabilitada")
+    return None
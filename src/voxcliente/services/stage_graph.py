@@ -0,0 +1,103 @@
+"""Ejecución de etapas del pipeline como grafo de dependencias."""
+
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Función de etapa: recibe los resultados de las etapas previas por nombre
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StageGraph:
+    """
+    Grafo pequeño de etapas asíncronas.
+
+    Cada etapa arranca apenas terminan sus dependencias, de modo que las
+    etapas independientes corren en paralelo. Se registra el inicio y la
+    duración de cada una para poder ver la ruta crítica.
+    """
+
+    def __init__(self):
+        """Inicializar grafo vacío."""
+        self._stages: Dict[str, tuple[StageFunc, List[str]]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, func: StageFunc, depends_on: Optional[List[str]] = None) -> None:
+        """
+        Agregar etapa al grafo.
+
+        Args:
+            name: Nombre único de la etapa
+            func: Función asíncrona que recibe el diccionario de resultados
+            depends_on: Etapas que deben terminar antes (ya agregadas)
+        """
+        depends_on = depends_on or []
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(f"Etapa '{name}' depende de etapa desconocida '{dependency}'")
+        self._stages[name] = (func, depends_on)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Ejecutar todas las etapas respetando dependencias.
+
+        Si una etapa falla se cancelan las que siguen en curso y se
+        propaga la excepción.
+
+        Returns:
+            Resultados de cada etapa por nombre
+        """
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        started_at = time.perf_counter()
+
+        async def run_stage(name: str) -> Any:
+            func, depends_on = self._stages[name]
+            if depends_on:
+                await asyncio.gather(*(tasks[dependency] for dependency in depends_on))
+
+            stage_start = time.perf_counter()
+            try:
+                results[name] = await func(results)
+            finally:
+                self.timings[name] = {
+                    "start_seconds": round(stage_start - started_at, 3),
+                    "duration_seconds": round(time.perf_counter() - stage_start, 3)
+                }
+            return results[name]
+
+        # Las dependencias siempre se agregan antes, así que el orden de inserción es topológico
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(run_stage(name))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        total = round(time.perf_counter() - started_at, 3)
+        logger.info(f"Pipeline completado en {total}s; ruta crítica: {' -> '.join(self.critical_path())}")
+        return results
+
+    def critical_path(self) -> List[str]:
+        """Etapas que determinaron el tiempo total (la dependencia que terminó última en cada paso)."""
+        if not self.timings:
+            return []
+
+        def finished_at(name: str) -> float:
+            timing = self.timings.get(name, {"start_seconds": 0, "duration_seconds": 0})
+            return timing["start_seconds"] + timing["duration_seconds"]
+
+        path = [max(self.timings, key=finished_at)]
+        while True:
+            depends_on = self._stages[path[-1]][1]
+            if not depends_on:
+                break
+            path.append(max(depends_on, key=finished_at))
+        return list(reversed(path))
@@ -0,0 +1,312 @@
+"""Almacenamiento de archivos generados con backends intercambiables."""
+
+import hmac
+import time
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+from voxcliente.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de bloque al leer archivos en streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Hash SHA-256 del cuerpo vacío (GET, HEAD, DELETE)
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b"").hexdigest()
+
+S3_NAMESPACE = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+class LocalStorage:
+    """Archivos en un directorio local (o volumen compartido entre workers)."""
+
+    def __init__(self, root: Path):
+        """Inicializar almacenamiento bajo `root`."""
+        self.root = root
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Ruta en disco de la clave (para servirla con sendfile)."""
+        return self.root / key
+
+    def presigned_url(self, key: str, expires_in: int, filename: str, media_type: str) -> Optional[str]:
+        """Sin URLs firmadas: los archivos los sirve la aplicación."""
+        return None
+
+    async def put(self, key: str, content: bytes) -> None:
+        """Guardar contenido."""
+        await asyncio.to_thread(self._put, key, content)
+
+    def _put(self, key: str, content: bytes) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Leer contenido, o None si no existe."""
+        try:
+            return await asyncio.to_thread((self.root / key).read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def stream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Leer contenido por bloques (FileNotFoundError si no existe)."""
+        file = await asyncio.to_thread(open, self.root / key, "rb")
+        try:
+            while chunk := await asyncio.to_thread(file.read, chunk_size):
+                yield chunk
+        finally:
+            file.close()
+
+    async def exists(self, key: str) -> bool:
+        """Verificar si la clave existe."""
+        return await asyncio.to_thread((self.root / key).is_file)
+
+    async def delete(self, key: str) -> None:
+        """Eliminar clave (sin error si no existe)."""
+        await asyncio.to_thread((self.root / key).unlink, True)
+
+    async def list_older_than(self, prefix: str, seconds: float) -> List[str]:
+        """Claves bajo `prefix` modificadas hace más de `seconds`."""
+        return await asyncio.to_thread(self._list_older_than, prefix, seconds)
+
+    def _list_older_than(self, prefix: str, seconds: float) -> List[str]:
+        cutoff = time.time() - seconds
+        directory = self.root / prefix
+        if not directory.is_dir():
+            return []
+
+        keys = []
+        for path in directory.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    keys.append(path.relative_to(self.root).as_posix())
+            except FileNotFoundError:
+                continue
+        return keys
+
+    async def close(self) -> None:
+        """Nada que cerrar."""
+
+
+class S3Storage:
+    """
+    Archivos en un bucket compatible con S3 (AWS, MinIO, R2...).
+
+    Firma las peticiones con AWS Signature V4 usando direccionamiento por
+    ruta (`endpoint/bucket/clave`), que aceptan todos los compatibles. Las
+    descargas se entregan como URLs prefirmadas, así que los documentos no
+    pasan por la aplicación.
+    """
+
+    def __init__(self, endpoint_url: str, bucket: str, region: str,
+                 access_key_id: str, secret_access_key: str, prefix: str = ""):
+        """Inicializar cliente del bucket."""
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.host = urlsplit(self.endpoint_url).netloc
+        self.bucket = bucket
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.prefix = prefix
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Los objetos no tienen ruta local."""
+        return None
+
+    def _object_path(self, key: str) -> str:
+        return f"/{self.bucket}/" + quote(self.prefix + key, safe="/-_.~")
+
+    def _signing_key(self, date: str) -> bytes:
+        key = f"AWS4{self.secret_access_key}".encode("utf-8")
+        for part in (date, self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+        return key
+
+    @staticmethod
+    def _canonical_request(method: str, host: str, path: str, query: Dict[str, str],
+                           headers: Dict[str, str], payload_hash: str) -> str:
+        """Petición canónica de SigV4 (`path` ya codificado, cabeceras en minúsculas)."""
+        canonical_query = "&".join(
+            f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}" for name, value in sorted(query.items())
+        )
+        signed = {"host": host, **headers}
+        canonical_headers = "".join(f"{name}:{signed[name].strip()}\n" for name in sorted(signed))
+        return "\n".join([
+            method, path, canonical_query, canonical_headers, ";".join(sorted(signed)), payload_hash
+        ])
+
+    def _signature(self, method: str, host: str, path: str, query: Dict[str, str],
+                   headers: Dict[str, str], payload_hash: str, amz_date: str) -> str:
+        """Firma SigV4 de una petición (cabeceras en minúsculas)."""
+        canonical_request = self._canonical_request(method, host, path, query, headers, payload_hash)
+
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+        ])
+        return hmac.new(self._signing_key(amz_date[:8]), string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def _presign(self, method: str, host: str, path: str, expires_in: int,
+                 params: Optional[Dict[str, str]] = None, now: Optional[datetime] = None) -> str:
+        """Query string prefirmado (X-Amz-*) para `path`."""
+        amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key_id}/{amz_date[:8]}/{self.region}/s3/aws4_request",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": "host",
+            **(params or {})
+        }
+        query["X-Amz-Signature"] = self._signature(method, host, path, query, {}, "UNSIGNED-PAYLOAD", amz_date)
+        return "&".join(f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}" for name, value in query.items())
+
+    def presigned_url(self, key: str, expires_in: int, filename: str, media_type: str) -> Optional[str]:
+        """URL de descarga directa desde el bucket, válida por `expires_in` segundos."""
+        path = self._object_path(key)
+        query = self._presign("GET", self.host, path, expires_in, {
+            "response-content-disposition": f'attachment; filename="{filename}"',
+            "response-content-type": media_type
+        })
+        return f"{self.endpoint_url}{path}?{query}"
+
+    def _build_request(self, method: str, path: str, query: Optional[Dict[str, str]] = None,
+                       content: bytes = b"") -> httpx.Request:
+        """Petición firmada con cabecera Authorization."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(30.0))
+
+        query = query or {}
+        amz_date = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        payload_hash = hashlib.sha256(content).hexdigest() if content else EMPTY_PAYLOAD_HASH
+        headers = {"x-amz-content-sha256": payload_hash, "x-amz-date": amz_date}
+        signature = self._signature(method, self.host, path, query, headers, payload_hash, amz_date)
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{amz_date[:8]}/{self.region}/s3/aws4_request, "
+            f"SignedHeaders=host;x-amz-content-sha256;x-amz-date, Signature={signature}"
+        )
+
+        url = f"{self.endpoint_url}{path}"
+        if query:
+            url += "?" + "&".join(
+                f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}" for name, value in sorted(query.items())
+            )
+        return self._client.build_request(method, url, headers=headers, content=content or None)
+
+    async def _request(self, method: str, path: str, query: Optional[Dict[str, str]] = None,
+                       content: bytes = b"") -> httpx.Response:
+        """Enviar petición firmada y leer la respuesta completa."""
+        request = self._build_request(method, path, query, content)
+        return await self._client.send(request)
+
+    async def put(self, key: str, content: bytes) -> None:
+        """Guardar contenido."""
+        response = await self._request("PUT", self._object_path(key), content=content)
+        response.raise_for_status()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Leer contenido, o None si no existe."""
+        response = await self._request("GET", self._object_path(key))
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+    async def stream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Leer contenido por bloques sin cargar el objeto completo (FileNotFoundError si no existe)."""
+        request = self._build_request("GET", self._object_path(key))
+        response = await self._client.send(request, stream=True)
+        try:
+            if response.status_code == 404:
+                raise FileNotFoundError(key)
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def exists(self, key: str) -> bool:
+        """Verificar si la clave existe."""
+        response = await self._request("HEAD", self._object_path(key))
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    async def delete(self, key: str) -> None:
+        """Eliminar clave (S3 no da error si no existe)."""
+        response = await self._request("DELETE", self._object_path(key))
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    async def list_older_than(self, prefix: str, seconds: float) -> List[str]:
+        """Claves bajo `prefix` modificadas hace más de `seconds` (ListObjectsV2 paginado)."""
+        cutoff = time.time() - seconds
+        keys: List[str] = []
+        token: Optional[str] = None
+        while True:
+            query = {"list-type": "2", "prefix": self.prefix + prefix}
+            if token:
+                query["continuation-token"] = token
+            response = await self._request("GET", f"/{self.bucket}", query)
+            response.raise_for_status()
+
+            page, token = self._parse_listing(response.content)
+            keys += [key[len(self.prefix):] for key, modified in page if modified < cutoff]
+            if not token:
+                return keys
+
+    @staticmethod
+    def _parse_listing(body: bytes) -> Tuple[List[Tuple[str, float]], Optional[str]]:
+        """(clave, fecha de modificación) de una página de ListObjectsV2 y token de la siguiente."""
+        root = ElementTree.fromstring(body)
+        objects = [
+            (
+                item.findtext(f"{S3_NAMESPACE}Key"),
+                datetime.fromisoformat(item.findtext(f"{S3_NAMESPACE}LastModified").replace("Z", "+00:00")).timestamp()
+            )
+            for item in root.iter(f"{S3_NAMESPACE}Contents")
+        ]
+        truncated = root.findtext(f"{S3_NAMESPACE}IsTruncated") == "true"
+        return objects, root.findtext(f"{S3_NAMESPACE}NextContinuationToken") if truncated else None
+
+    async def close(self) -> None:
+        """Cerrar cliente HTTP."""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_storage_backend(backend: str, local_root: Path):
+    """
+    Crear backend de almacenamiento según configuración.
+
+    Args:
+        backend: 'local' o 's3'
+        local_root: Directorio del backend local
+
+    Returns:
+        Backend de almacenamiento
+    """
+    if backend == "s3":
+        return S3Storage(
+            endpoint_url=settings.s3_endpoint_url,
+            bucket=settings.s3_bucket,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+            prefix=settings.s3_prefix
+        )
+    if backend != "local":
+        logger.warning(f"Backend de almacenamiento desconocido '{backend}', usando local")
+    return LocalStorage(local_root)
@@ -1,10 +1,16 @@
 """Servicio de transcripción con AssemblyAI - Simplificado para MVP."""
 
+import copy
+import json
+import asyncio
+import hashlib
+import httpx
 import assemblyai as aai
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Awaitable
 from datetime import datetime
 from pathlib import Path
 from voxcliente.config import settings
+from voxcliente.services.cache import TTLCache
 
 
 class AssemblyAIService:
@@ -28,24 +34,96 @@ class AssemblyAIService:
         )
 
         self.transcriber = aai.Transcriber(config=config)
+        
+        # Huella de la configuración: cambia la clave de caché si cambian las opciones
+        self.config_fingerprint = json.dumps(config.raw.model_dump(exclude_none=True), sort_keys=True, default=str)
+        
+        # Caché de transcripciones por contenido del audio
+        self.cache = TTLCache(
+            max_entries=settings.transcript_cache_max_entries,
+            ttl_seconds=settings.transcript_cache_ttl_hours * 3600
+        )
     
-    def transcribe_file(self, file_path: str) -> Optional[Dict[str, Any]]:
+    async def upload_stream(self, chunks: AsyncIterator[bytes]) -> Optional[str]:
+        """
+        Subir audio a AssemblyAI a medida que se reciben sus bloques.
+        
+        Args:
+            chunks: Bloques del archivo en orden
+            
+        Returns:
+            URL del audio en AssemblyAI o None si hay error
+        """
+        try:
+            async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, write=None)) as client:
+                response = await client.post(
+                    f"{aai.settings.base_url}/v2/upload",
+                    headers={"authorization": settings.assemblyai_api_key},
+                    content=chunks
+                )
+                response.raise_for_status()
+                return response.json()["upload_url"]
+        except Exception as e:
+            print(f"Error subiendo audio a AssemblyAI: {e}")
+            return None
+    
+    def _cache_key(self, audio_hash: str) -> str:
+        """Clave de caché: hash del audio + opciones de transcripción."""
+        return hashlib.sha256(f"{audio_hash}:{self.config_fingerprint}".encode("utf-8")).hexdigest()
+    
+    def get_cached_transcription(self, audio_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Buscar transcripción previa del mismo audio con las mismas opciones.
+        
+        Un acierto no consume minutos de AssemblyAI, por lo que se reporta costo cero.
+        """
+        cached = self.cache.get(self._cache_key(audio_hash))
+        if not cached:
+            return None
+        
+        result = copy.deepcopy(cached)
+        result['assemblyai_usage']['cache_hit'] = True
+        result['assemblyai_cost']['cost_usd'] = 0.0
+        return result
+    
+    async def transcribe_file(self, file_path: Optional[str], audio_hash: Optional[str] = None,
+                              on_submitted: Optional[Callable[[str], Awaitable[None]]] = None,
+                              assemblyai_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Transcribir archivo local usando AssemblyAI con utterances.
         Basado en la documentación oficial de AssemblyAI.
         
         Args:
-            file_path: Ruta del archivo local
+            file_path: Ruta del archivo local o URL del audio ya subido a AssemblyAI
+            audio_hash: SHA-256 del contenido del audio; habilita la caché de transcripciones
+            on_submitted: Callback con el ID de AssemblyAI apenas se envía el trabajo
+            assemblyai_id: ID de una transcripción ya enviada; se espera su resultado sin reenviar el audio
             
         Returns:
             Diccionario con transcripción y información de costos o None si hay error
         """
+        if audio_hash:
+            cached = self.get_cached_transcription(audio_hash)
+            if cached:
+                print(f"Transcripción obtenida de caché para audio {audio_hash[:12]}")
+                return cached
+        
         try:
-            # Transcribir archivo local directamente
-            transcript = self.transcriber.transcribe(file_path)
+            if assemblyai_id:
+                # Reanudar transcripción enviada previamente (no se vuelve a cobrar)
+                transcript = await asyncio.wrap_future(aai.Transcript.get_by_id_async(assemblyai_id))
+            else:
+                # Enviar archivo o URL (subir un archivo local es bloqueante, va en un hilo)
+                transcript = await asyncio.to_thread(self.transcriber.submit, file_path)
+                if on_submitted and transcript.id:
+                    await on_submitted(transcript.id)
+            
+            # Esperar resultado en el pool de hilos del SDK
+            if transcript.status not in (aai.TranscriptStatus.completed, aai.TranscriptStatus.error):
+                transcript = await asyncio.wrap_future(transcript.wait_for_completion_async())
             
             # Guardar respuesta de AssemblyAI en archivo local para debugging
-            self._save_assemblyai_response(transcript, file_path)
+            await asyncio.to_thread(self._save_assemblyai_response, transcript, file_path or assemblyai_id)
             
             # Verificar si la transcripción fue exitosa
             if transcript.status == aai.TranscriptStatus.error:
@@ -71,12 +149,14 @@ class AssemblyAIService:
             duration_minutes = transcript.audio_duration / 60 if transcript.audio_duration else 0
             assemblyai_cost = duration_minutes * 0.0045
             
-            return {
+            result = {
                 'transcript': formatted_text,
                 'assemblyai_usage': {
+                    'transcript_id': transcript.id,
                     'audio_duration_seconds': transcript.audio_duration,
                     'audio_duration_minutes': round(duration_minutes, 2),
-                    'confidence': transcript.confidence
+                    'confidence': transcript.confidence,
+                    'cache_hit': False
                 },
                 'assemblyai_cost': {
                     'duration_minutes': round(duration_minutes, 2),
@@ -84,6 +164,11 @@ class AssemblyAIService:
                 }
             }
             
+            if audio_hash:
+                self.cache.set(self._cache_key(audio_hash), copy.deepcopy(result))
+            
+            return result
+            
         except Exception as e:
             print(f"Error en transcripción: {e}")
             return None
@@ -0,0 +1,261 @@
+"""Recepción de uploads de audio en streaming con envío simultáneo a AssemblyAI."""
+
+import os
+import asyncio
+import hashlib
+import logging
+import tempfile
+from typing import Dict, Any, Optional
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from voxcliente.config import settings
+from voxcliente.utils import validate_audio_file, validate_email
+from voxcliente.services.transcription_service import assemblyai_service
+
+logger = logging.getLogger(__name__)
+
+# Bloques en vuelo hacia AssemblyAI antes de frenar la lectura del cliente
+UPLOAD_QUEUE_CHUNKS = 16
+
+# Tamaño máximo de los campos de texto del formulario (email)
+MAX_FIELD_SIZE_BYTES = 64 * 1024
+
+# Marcador de la parte del formulario que contiene el audio
+_FILE_PART = object()
+
+
+class AudioSpool:
+    """
+    Copia local de un audio que se está recibiendo.
+
+    Escribe cada bloque a disco aplicando el límite de tamaño, calcula
+    el SHA-256 del contenido y, si se indica, reenvía el bloque al
+    endpoint de upload de AssemblyAI en paralelo.
+    """
+
+    def __init__(self, filename: str, tee_to_assemblyai: bool):
+        """Crear archivo temporal y, opcionalmente, iniciar la subida a AssemblyAI."""
+        if settings.spool_dir:
+            os.makedirs(settings.spool_dir, exist_ok=True)
+
+        self.max_size_bytes = settings.max_file_size_mb * 1024 * 1024
+        self.size = 0
+        self._hasher = hashlib.sha256()
+        self.temp_file = tempfile.NamedTemporaryFile(
+            delete=False,
+            suffix=f".{filename.split('.')[-1]}",
+            dir=settings.spool_dir
+        )
+        self.path = self.temp_file.name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._upload_task: Optional[asyncio.Task] = None
+        if tee_to_assemblyai:
+            self._queue = asyncio.Queue(maxsize=UPLOAD_QUEUE_CHUNKS)
+            self._upload_task = asyncio.create_task(self._upload())
+
+    async def write(self, chunk: bytes) -> None:
+        """Agregar bloque al archivo local y a la subida en curso."""
+        self.size += len(chunk)
+        if self.size > self.max_size_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Archivo muy grande. Máximo: {settings.max_file_size_mb}MB"
+            )
+
+        await asyncio.to_thread(self._write_chunk, chunk)
+        if self._queue is not None:
+            await self._queue.put(chunk)
+
+    def _write_chunk(self, chunk: bytes) -> None:
+        """Escribir bloque a disco y actualizar hash (se ejecuta fuera del event loop)."""
+        self.temp_file.write(chunk)
+        self._hasher.update(chunk)
+
+    @property
+    def streaming(self) -> bool:
+        """Si el audio se está reenviando a AssemblyAI."""
+        return self._upload_task is not None
+
+    @property
+    def sha256(self) -> str:
+        """Hash del contenido recibido hasta ahora."""
+        return self._hasher.hexdigest()
+
+    async def close(self) -> Optional[str]:
+        """
+        Cerrar copia local y esperar el fin de la subida a AssemblyAI.
+
+        Returns:
+            URL del audio en AssemblyAI o None si no se subió
+        """
+        self.temp_file.close()
+        if self._upload_task is None:
+            return None
+
+        await self._queue.put(None)
+        return await self._upload_task
+
+    def abort(self) -> None:
+        """Descartar copia local y cancelar la subida en curso."""
+        self.temp_file.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+        if self._upload_task is not None:
+            self._upload_task.cancel()
+
+    async def _upload(self) -> Optional[str]:
+        """Subir a AssemblyAI los bloques a medida que llegan a la cola."""
+        finished = False
+
+        async def chunks():
+            nonlocal finished
+            while (chunk := await self._queue.get()) is not None:
+                yield chunk
+            finished = True
+
+        try:
+            return await assemblyai_service.upload_stream(chunks())
+        except asyncio.CancelledError:
+            # Subida cancelada por abort(): nadie más escribe en la cola
+            finished = True
+            raise
+        finally:
+            # Si la subida falla a mitad, seguir vaciando la cola para no frenar la recepción
+            while not finished:
+                finished = await self._queue.get() is None
+
+
+def _validate_before_upload(filename: str, fields: Dict[str, bytearray]) -> None:
+    """Validar nombre del archivo y, si ya llegó, el email (HTTPException 400 si son inválidos)."""
+    is_file_valid, file_error = validate_audio_file(filename, None)
+    if not is_file_valid:
+        raise HTTPException(status_code=400, detail=file_error)
+
+    if "email" in fields:
+        is_email_valid, email_error = validate_email(fields["email"].decode("utf-8", errors="replace"))
+        if not is_email_valid:
+            raise HTTPException(status_code=400, detail=email_error)
+
+
+class UploadService:
+    """Servicio simple para recibir formularios multipart sin cargarlos en memoria."""
+
+    async def receive_audio_upload(self, request: Request) -> Dict[str, Any]:
+        """
+        Leer el formulario multipart directamente del stream de la petición.
+
+        El campo `file` se copia por bloques a disco (y a AssemblyAI si
+        `assemblyai_stream_upload` está habilitado) mientras se recibe.
+
+        El nombre del archivo y el email se validan antes de empezar a
+        recibir el audio, para no subir a AssemblyAI pedidos inválidos; si
+        el email llega después del archivo, el audio solo se copia a disco.
+
+        Args:
+            request: Petición con cuerpo multipart/form-data
+
+        Returns:
+            Diccionario con campos de texto, nombre, ruta local, tamaño y URL en AssemblyAI
+        """
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            raise HTTPException(status_code=400, detail="Se esperaba un formulario multipart con el archivo de audio")
+
+        # Eventos generados por el parser en cada bloque; se procesan de forma asíncrona
+        events = []
+        header = {"field": b"", "value": b"", "headers": {}}
+
+        def on_header_field(data: bytes, start: int, end: int) -> None:
+            header["field"] += data[start:end]
+
+        def on_header_value(data: bytes, start: int, end: int) -> None:
+            header["value"] += data[start:end]
+
+        def on_header_end() -> None:
+            header["headers"][header["field"].lower()] = header["value"]
+            header["field"] = header["value"] = b""
+
+        def on_headers_finished() -> None:
+            events.append(("headers", header["headers"]))
+            header["headers"] = {}
+
+        def on_part_data(data: bytes, start: int, end: int) -> None:
+            events.append(("data", data[start:end]))
+
+        def on_part_end() -> None:
+            events.append(("end", None))
+
+        parser = MultipartParser(options[b"boundary"], {
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        })
+
+        fields: Dict[str, bytearray] = {}
+        filename = None
+        spool: Optional[AudioSpool] = None
+        current_field = None
+
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+
+                for kind, payload in events:
+                    if kind == "headers":
+                        _, params = parse_options_header(payload.get(b"content-disposition", b""))
+                        name = params.get(b"name", b"").decode()
+                        if name == "file" and b"filename" in params and spool is None:
+                            filename = params[b"filename"].decode()
+                            email_received = "email" in fields
+                            _validate_before_upload(filename, fields)
+                            spool = AudioSpool(filename, settings.assemblyai_stream_upload and email_received)
+                            current_field = _FILE_PART
+                        else:
+                            current_field = name
+                            fields[name] = bytearray()
+                    elif kind == "data" and current_field is _FILE_PART:
+                        await spool.write(payload)
+                    elif kind == "data" and current_field:
+                        fields[current_field] += payload
+                        if len(fields[current_field]) > MAX_FIELD_SIZE_BYTES:
+                            raise HTTPException(status_code=400, detail="Campo de formulario demasiado grande")
+                    elif kind == "end":
+                        current_field = None
+
+                events.clear()
+
+            parser.finalize()
+
+            if spool is None:
+                raise HTTPException(status_code=400, detail="Archivo de audio requerido")
+
+            audio_url = await spool.close()
+
+        except BaseException:
+            if spool is not None:
+                spool.abort()
+            raise
+
+        if spool.size and not audio_url and spool.streaming:
+            logger.warning("No se pudo subir el audio en streaming; se usará la copia local")
+
+        return {
+            "fields": {name: value.decode("utf-8", errors="replace") for name, value in fields.items()},
+            "filename": filename,
+            "temp_path": spool.path,
+            "size": spool.size,
+            "sha256": spool.sha256,
+            "audio_url": audio_url
+        }
+
+
+# Instancia global del servicio
+upload_service = UploadService()
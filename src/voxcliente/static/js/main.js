@@ -126,7 +126,7 @@ document.addEventListener("DOMContentLoaded", function () {
           </svg>
         </div>
         <h3 class="text-lg font-semibold text-foreground mb-2">Procesando tu audio</h3>
-        <p class="text-sm text-muted-foreground">Nuestra IA está transcribiendo y generando las actas...</p>
+        <p id="processing-stage" class="text-sm text-muted-foreground">Nuestra IA está transcribiendo y generando las actas...</p>
         <p class="text-xs text-muted-foreground mt-2">⏱️ Procesando con IA avanzada, por favor mantén esta ventana abierta</p>
         <div class="flex justify-center gap-1 mt-4">
           <div class="w-2 h-2 bg-primary rounded-full animate-bounce" style="animation-delay: 0ms"></div>
@@ -169,10 +169,10 @@ document.addEventListener("DOMContentLoaded", function () {
       formData.append("email", email);
       formData.append("file", file);
 
-      const response = await fetch("/api/v1/transcribe", {
+      // Encolar trabajo: el servidor responde apenas recibe el archivo
+      const response = await fetch("/api/v1/jobs", {
         method: "POST",
         body: formData,
-        signal: AbortSignal.timeout(600000), // 10 minutos timeout
       });
 
       if (!response.ok) {
@@ -182,22 +182,21 @@ document.addEventListener("DOMContentLoaded", function () {
         );
       }
 
-      // Respuesta exitosa mejorada
-      const responseData = await response.json().catch(() => ({}));
+      const jobData = await response.json();
+
+      // Esperar resultado del procesamiento en segundo plano
+      const responseData = await waitForJob(jobData, (message) => {
+        const stageText = formCard.querySelector("#processing-stage");
+        if (stageText) {
+          stageText.textContent = message;
+        }
+      });
       const fileName = audioFileInput.files[0]?.name || "tu archivo";
 
       // Descargar archivos automáticamente si están disponibles
       if (responseData.download_files) {
         try {
-          await downloadFile(
-            responseData.download_files.acta_url,
-            responseData.download_files.acta_filename
-          );
-
-          await downloadFile(
-            responseData.download_files.transcript_url,
-            responseData.download_files.transcript_filename
-          );
+          await downloadDocuments(responseData.download_files);
 
           showNotification(
             `¡Listo! Tu acta profesional ya está descargada en tu dispositivo. Los archivos Word están listos para usar. También enviamos una copia por email (revisa spam si no la ves).`,
@@ -385,6 +384,97 @@ document.addEventListener("DOMContentLoaded", function () {
   validateForm();
 });
 
+// Mensajes visibles para cada etapa del procesamiento
+const JOB_STAGE_MESSAGES = {
+  uploaded: "Archivo recibido. Preparando transcripción...",
+  transcribing: "Transcribiendo el audio...",
+  transcript_ready: "Transcripción lista.",
+  generating_acta: "Generando el acta con IA...",
+  acta_ready: "Acta generada.",
+  generating_files: "Preparando documentos Word...",
+  docx_ready: "Documentos Word listos.",
+  sending_email: "Preparando el email con el acta...",
+  email_queued: "El acta llegará por email en unos minutos.",
+};
+
+// Esperar el resultado del trabajo escuchando sus eventos de progreso
+function waitForJob(jobData, onStage) {
+  if (typeof EventSource === "undefined") {
+    return pollJob(jobData.status_url);
+  }
+
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(jobData.events_url);
+
+    Object.keys(JOB_STAGE_MESSAGES).forEach((stage) => {
+      source.addEventListener(stage, (event) => {
+        const data = JSON.parse(event.data);
+        console.log(`Etapa ${stage} (${data.elapsed_seconds}s)`);
+        onStage(JOB_STAGE_MESSAGES[stage]);
+      });
+    });
+
+    source.addEventListener("completed", (event) => {
+      source.close();
+      resolve(JSON.parse(event.data).result);
+    });
+
+    source.addEventListener("failed", (event) => {
+      source.close();
+      reject(new Error(JSON.parse(event.data).error || "Error procesando el archivo"));
+    });
+
+    // Si el stream se corta, continuar consultando el estado
+    source.onerror = () => {
+      source.close();
+      pollJob(jobData.status_url).then(resolve, reject);
+    };
+  });
+}
+
+// Consultar periódicamente el estado del trabajo hasta que termine
+async function pollJob(statusUrl, intervalMs = 3000) {
+  while (true) {
+    const response = await fetch(statusUrl);
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(
+        errorData.detail || `Error: ${response.status} ${response.statusText}`
+      );
+    }
+
+    const job = await response.json();
+
+    if (job.status === "completed") {
+      return job.result;
+    }
+    if (job.status === "failed") {
+      throw new Error(job.error || "Error procesando el archivo");
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
+// Descargar acta y transcripción en un solo ZIP; si falla, por separado
+async function downloadDocuments(downloadFiles) {
+  if (downloadFiles.bundle_url) {
+    try {
+      await downloadFile(downloadFiles.bundle_url, downloadFiles.bundle_filename);
+      return;
+    } catch (bundleError) {
+      console.warn("No se pudo descargar el ZIP, descargando por separado:", bundleError);
+    }
+  }
+
+  await downloadFile(downloadFiles.acta_url, downloadFiles.acta_filename);
+  await downloadFile(
+    downloadFiles.transcript_url,
+    downloadFiles.transcript_filename
+  );
+}
+
 // Función para descargar archivos automáticamente
 async function downloadFile(url, filename) {
   try {
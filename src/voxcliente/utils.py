@@ -5,10 +5,13 @@ from typing import Optional
 from voxcliente.config import settings
 
 
-def validate_audio_file(filename: str, file_size_bytes: int) -> tuple[bool, Optional[str]]:
+def validate_audio_file(filename: str, file_size_bytes: Optional[int]) -> tuple[bool, Optional[str]]:
     """
     Valida archivo de audio de forma simple.
     
+    El tamaño puede ser None si el cliente no lo informó; en ese caso
+    el límite se aplica mientras se copia el archivo a disco.
+    
     Returns:
         (is_valid, error_message)
     """
@@ -17,7 +20,7 @@ def validate_audio_file(filename: str, file_size_bytes: int) -> tuple[bool, Opti
     
     # Validar tamaño usando configuración centralizada
     max_size_bytes = settings.max_file_size_mb * 1024 * 1024
-    if file_size_bytes > max_size_bytes:
+    if file_size_bytes is not None and file_size_bytes > max_size_bytes:
         return False, f"Archivo muy grande. Máximo: {settings.max_file_size_mb}MB"
     
     return True, None